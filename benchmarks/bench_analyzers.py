@@ -0,0 +1,180 @@
+"""Benchmark every analysis phase on synthetic corpora of growing size.
+
+For each corpus size, generates a seeded corpus (see benchmarks.corpus),
+parses it with solc and reports the best time of each phase: parsing, the
+class hierarchy, CHA and RTA call graphs, CFG construction and both data
+flow analyses. Results can be saved as a baseline and later runs compared
+against it; the run fails if a phase got slower than the tolerance allows.
+
+    python -m benchmarks.bench_analyzers --sizes 10 50 200 --save-baseline baseline.json
+    python -m benchmarks.bench_analyzers --sizes 10 50 200 --baseline baseline.json
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import CorpusParameters, add_arguments, write_corpus
+from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
+from src.analyzers.data_flow_analyzer import DataFlowAnalyzer
+from src.parsers.ast_parser import SolidityASTParser
+
+PHASES = [
+    "parse",
+    "class_hierarchy",
+    "cha_call_graph",
+    "rta_call_graph",
+    "cfg",
+    "reaching_definitions",
+    "live_variables",
+]
+
+
+def best_of(repeat, function):
+    """Return the best time of repeat calls and the result of the last one."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure(file_path, repeat, workers):
+    """Return the best time of every phase in PHASES on one source file."""
+    timings = {}
+
+    def parse():
+        parser = SolidityASTParser(file_path)
+        parser.parse()
+        return parser
+
+    timings["parse"], parser = best_of(repeat, parse)
+
+    class_hierarchy_analyzer = ClassHierarchyAnalyzer(parser)
+    timings["class_hierarchy"], _ = best_of(
+        repeat,
+        lambda: class_hierarchy_analyzer.build_class_hierarchy(parser.ast_v2),
+    )
+
+    call_graph_analyzer = CallGraphAnalyzer(parser, class_hierarchy_analyzer)
+    context = call_graph_analyzer.context
+    class_hierarchy = context.get("class_hierarchy")
+
+    def cha_call_graph():
+        # Drop the memoized call sites and dispatch index so each run pays for them
+        context.invalidate("call_sites")
+        context.invalidate("dispatch_index")
+        return call_graph_analyzer.build_cha_call_graph(class_hierarchy)
+
+    def rta_call_graph():
+        context.invalidate("call_sites")
+        context.invalidate("dispatch_index")
+        context.invalidate("instantiated_contracts")
+        return call_graph_analyzer.build_rta_call_graph(
+            class_hierarchy, context.get("instantiated_contracts")
+        )
+
+    timings["cha_call_graph"], _ = best_of(repeat, cha_call_graph)
+    timings["rta_call_graph"], _ = best_of(repeat, rta_call_graph)
+
+    cfg_analyzer = ControlFlowGraphAnalyzer(parser, workers=workers)
+    timings["cfg"], _ = best_of(repeat, cfg_analyzer.parse)
+
+    data_flow_analyzer = DataFlowAnalyzer(parser, cfg_analyzer, workers=workers)
+    timings["reaching_definitions"], _ = best_of(
+        repeat, data_flow_analyzer.compute_reaching_definitions
+    )
+    timings["live_variables"], _ = best_of(
+        repeat, data_flow_analyzer.compute_live_variables
+    )
+
+    timings["ast_nodes"] = len(parser.index.nodes_by_id)
+    timings["functions"] = sum(
+        len(info["functions"]) for info in class_hierarchy.values()
+    )
+    return timings
+
+
+def compare(results, baseline, tolerance):
+    """Return (size, phase, baseline seconds, seconds) for every slower phase."""
+    regressions = []
+    for size, timings in results.items():
+        baseline_timings = baseline.get("results", {}).get(size)
+        if baseline_timings is None:
+            continue
+        for phase in PHASES:
+            before = baseline_timings.get(phase)
+            after = timings.get(phase)
+            if before and after and after > before * (1 + tolerance):
+                regressions.append((size, phase, before, after))
+    return regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 50, 200], help="contracts"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--workers", type=int, default=1)
+    arg_parser.add_argument("--baseline", help="compare against this baseline file")
+    arg_parser.add_argument("--save-baseline", help="save the results to this file")
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed slowdown relative to the baseline, as a fraction",
+    )
+    add_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+    args.contracts = None
+
+    corpus = {
+        field: getattr(args, field)
+        for field in CorpusParameters._fields
+        if field != "contracts"
+    }
+    results = {}
+    print(f"{'contracts':>9} {'nodes':>8} " + " ".join(f"{p:>20}" for p in PHASES))
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            parameters = CorpusParameters(contracts=size, **corpus)
+            file_path = write_corpus(directory, parameters)
+            timings = measure(file_path, args.repeat, args.workers)
+            results[str(size)] = timings
+            print(
+                f"{size:>9} {timings['ast_nodes']:>8} "
+                + " ".join(f"{timings[phase]:>20.4f}" for phase in PHASES)
+            )
+
+    report = {"corpus": corpus, "repeat": args.repeat, "results": results}
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("corpus") != corpus:
+            print("warning: the baseline was measured on a different corpus")
+        regressions = compare(results, baseline, args.tolerance)
+        for size, phase, before, after in regressions:
+            print(
+                f"REGRESSION {phase} on {size} contracts: "
+                f"{before:.4f}s -> {after:.4f}s ({after / before - 1:+.0%})"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"no phase slower than the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark construction time and memory of the typed AST (ASTNode.create).
+
+Builds large source units by replicating the contracts of the ASTs in
+output/ and reports, per size, the best construction time and the memory
+held by the resulting tree.
+
+    python -m benchmarks.bench_nodes --copies 100 1000 5000
+"""
+
+import argparse
+import copy
+import gc
+import json
+import resource
+import time
+import tracemalloc
+
+from src.parsers.nodes import ASTNode
+
+AST_FILES = ["output/example.sol_json.ast", "output/HelloWorld.sol_json.ast"]
+
+
+def build_source_unit(copies):
+    """Return a SourceUnit dict holding copies of every contract in AST_FILES."""
+    contracts = []
+    for ast_file in AST_FILES:
+        with open(ast_file, "r") as f:
+            ast = json.load(f)
+        contracts.extend(
+            node for node in ast["nodes"] if node["nodeType"] == "ContractDefinition"
+        )
+
+    nodes = []
+    for copy_index in range(copies):
+        for contract in contracts:
+            contract = copy.deepcopy(contract)
+            contract["name"] = f"{contract['name']}{copy_index}"
+            nodes.append(contract)
+    return {"id": 0, "nodeType": "SourceUnit", "src": "0:0:0", "nodes": nodes}
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            count += "nodeType" in current
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+    return count
+
+
+def measure(source_unit, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        ASTNode.create(source_unit)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = ASTNode.create(source_unit)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del tree
+    return best, held
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--copies", type=int, nargs="+", default=[100, 1000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    print(f"{'nodes':>10} {'seconds':>10} {'us/node':>8} {'tree MiB':>9} {'B/node':>7}")
+    for copies in args.copies:
+        source_unit = build_source_unit(copies)
+        nodes = count_nodes(source_unit)
+        seconds, held = measure(source_unit, args.repeat)
+        print(
+            f"{nodes:>10} {seconds:>10.4f} {seconds / nodes * 1e6:>8.2f} "
+            f"{held / 2**20:>9.1f} {held / nodes:>7.0f}"
+        )
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"peak resident set size: {max_rss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
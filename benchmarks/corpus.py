@@ -0,0 +1,220 @@
+"""Seeded generator of synthetic Solidity corpora for the analyzer benchmarks.
+
+Contracts form inheritance trees of the given depth and fan-out, each with a
+number of functions whose bodies mix variable declarations, assignments,
+calls, branches and loops up to the given nesting. The same parameters and
+seed always produce the same source, and only constructs the CFG builder
+understands are used.
+
+    python -m benchmarks.corpus --contracts 50 --seed 1 > corpus.sol
+"""
+
+import argparse
+import os
+import random
+from typing import List, NamedTuple, Optional
+
+PRAGMA = "// SPDX-License-Identifier: MIT\npragma solidity ^0.8.0;\n"
+
+
+class CorpusParameters(NamedTuple):
+    contracts: int = 20
+    depth: int = 3
+    fanout: int = 2
+    functions: int = 4
+    call_density: float = 0.3
+    nesting: int = 2
+    statements: int = 4
+    seed: int = 0
+
+
+class _Contract(NamedTuple):
+    index: int
+    base: Optional[int]
+    ancestors: List[int]
+
+
+def _plan_contracts(parameters: CorpusParameters) -> List[_Contract]:
+    """Lay contracts out as inheritance trees, parents always before children."""
+    contracts: List[_Contract] = []
+    children = {}
+    frontier = []
+    for index in range(parameters.contracts):
+        base = None
+        while frontier:
+            candidate = frontier[0]
+            depth = len(contracts[candidate].ancestors) + 1
+            if (
+                depth < parameters.depth
+                and children.get(candidate, 0) < parameters.fanout
+            ):
+                base = candidate
+                break
+            frontier.pop(0)
+        ancestors = [] if base is None else [base] + contracts[base].ancestors
+        contracts.append(_Contract(index, base, ancestors))
+        if base is not None:
+            children[base] = children.get(base, 0) + 1
+        frontier.append(index)
+    return contracts
+
+
+class _FunctionWriter:
+    def __init__(
+        self, rng: random.Random, parameters: CorpusParameters, callees, creatable
+    ):
+        self.rng = rng
+        self.parameters = parameters
+        self.callees = callees
+        self.creatable = creatable
+        self.variables: List[str] = ["a"]
+        self.next_variable = 0
+        self.lines: List[str] = []
+
+    def new_variable(self) -> str:
+        name = f"v{self.next_variable}"
+        self.next_variable += 1
+        return name
+
+    def write(self, indent: int, text: str) -> None:
+        self.lines.append("    " * indent + text)
+
+    def block(self, indent: int, nesting: int) -> None:
+        # Variables declared in a block go out of scope when it ends
+        scope = len(self.variables)
+        for _ in range(self.rng.randint(1, self.parameters.statements)):
+            self.statement(indent, nesting)
+        del self.variables[scope:]
+
+    def statement(self, indent: int, nesting: int) -> None:
+        rng = self.rng
+        if self.callees and rng.random() < self.parameters.call_density:
+            callee = rng.choice(self.callees)
+            if self.creatable and rng.random() < 0.25:
+                contract = rng.choice(self.creatable)
+                self.write(
+                    indent,
+                    f"(new C{contract}()).c{contract}_f0({rng.choice(self.variables)});",
+                )
+            else:
+                self.write(indent, f"{callee}({rng.choice(self.variables)});")
+            return
+        choices = ["declare", "declare", "assign"]
+        if nesting < self.parameters.nesting:
+            choices += ["if", "for", "while"]
+        kind = rng.choice(choices)
+        if kind == "declare":
+            name = self.new_variable()
+            self.write(indent, f"uint256 {name} = {rng.randint(0, 100)};")
+            self.variables.append(name)
+        elif kind == "assign":
+            target = rng.choice(self.variables)
+            self.write(indent, f"{target} = {rng.choice(self.variables)};")
+        elif kind == "if":
+            self.write(
+                indent, f"if ({rng.choice(self.variables)} > {rng.randint(0, 100)}) {{"
+            )
+            self.block(indent + 1, nesting + 1)
+            if rng.random() < 0.5:
+                self.write(indent, "} else {")
+                self.block(indent + 1, nesting + 1)
+            self.write(indent, "}")
+        elif kind == "for":
+            counter = self.new_variable()
+            self.write(
+                indent,
+                f"for (uint256 {counter} = 0; {counter} < {rng.randint(1, 10)}; {counter}++) {{",
+            )
+            self.variables.append(counter)
+            self.block(indent + 1, nesting + 1)
+            self.variables.remove(counter)
+            self.write(indent, "}")
+        else:
+            counter = self.new_variable()
+            self.write(indent, f"uint256 {counter} = 0;")
+            self.variables.append(counter)
+            self.write(indent, f"while ({counter} < {rng.randint(1, 10)}) {{")
+            self.write(indent + 1, f"{counter} += 1;")
+            self.block(indent + 1, nesting + 1)
+            self.write(indent, "}")
+
+
+def generate_source(parameters: CorpusParameters) -> str:
+    """Return one Solidity source file holding the whole corpus."""
+    rng = random.Random(parameters.seed)
+    contracts = _plan_contracts(parameters)
+    parts = [PRAGMA]
+    for contract in contracts:
+        # Calls may target this contract's functions and its ancestors'
+        callees = [
+            f"c{owner}_f{function}"
+            for owner in [contract.index] + contract.ancestors
+            for function in range(parameters.functions)
+        ]
+        # Only contracts declared earlier, and not ancestors, are created, so
+        # contract creation never forms a cycle
+        creatable = [
+            index
+            for index in range(contract.index)
+            if index not in contract.ancestors and parameters.functions
+        ]
+        heading = f"contract C{contract.index}"
+        if contract.base is not None:
+            heading += f" is C{contract.base}"
+        parts.append(heading + " {")
+        for function in range(parameters.functions):
+            writer = _FunctionWriter(rng, parameters, callees, creatable)
+            name = f"c{contract.index}_f{function}"
+            parts.append(
+                f"    function {name}(uint256 a) public virtual returns (uint256) {{"
+            )
+            writer.block(2, 0)
+            writer.write(2, f"return {rng.choice(writer.variables)};")
+            parts.extend(writer.lines)
+            parts.append("    }")
+        if contract.base is not None and parameters.functions:
+            # Override one inherited function so dispatch has several targets
+            name = f"c{contract.base}_f0"
+            parts.append(
+                f"    function {name}(uint256 a) public virtual override returns (uint256) {{"
+            )
+            parts.append("        return a;")
+            parts.append("    }")
+        parts.append("}\n")
+    return "\n".join(parts)
+
+
+def write_corpus(directory: str, parameters: CorpusParameters) -> str:
+    """Write the corpus to directory and return the path of the source file."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f"corpus_{parameters.contracts}_{parameters.seed}.sol"
+    )
+    with open(path, "w") as source_file:
+        source_file.write(generate_source(parameters))
+    return path
+
+
+def add_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    """Add a command line option for every CorpusParameters field."""
+    defaults = CorpusParameters()
+    for field in CorpusParameters._fields:
+        arg_parser.add_argument(
+            "--" + field.replace("_", "-"),
+            type=type(getattr(defaults, field)),
+            default=getattr(defaults, field),
+        )
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+    parameters = CorpusParameters(
+        **{field: getattr(args, field) for field in CorpusParameters._fields}
+    )
+    print(generate_source(parameters))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
 from src.parsers.ast_parser import SolidityASTParser
+from src.parsers.compile_cache import CompileCache
 from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
 from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
 from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
 from src.analyzers.data_flow_analyzer import DataFlowAnalyzer
+from src.exporters.graph_exporter import EXPORTER
+from src.utils.metrics import export_from_environment
 
 if __name__ == "__main__":
     # ast_file_path = "output/example.sol_json.ast"
     file_path = "contracts/example.sol"
-    parser = SolidityASTParser(file_path)
+    parser = SolidityASTParser(file_path, cache=CompileCache())
     parser.parse()
 
     # Class Hierarchy Analysis
@@ -35,3 +38,9 @@ if __name__ == "__main__":
     # # Data Flow Analysis
     # data_flow_analyzer = DataFlowAnalyzer(parser, control_flow_graph_analyzer)
     # data_flow_analyzer.analyze()
+
+    # Wait for the images being rendered, if SOLIDITY_RENDER asked for any
+    EXPORTER.close()
+
+    # Write phase timings and counters if SOLIDITY_METRICS or SOLIDITY_TRACE is set
+    export_from_environment()
@@ -1,10 +1,28 @@
 from abc import ABC, abstractmethod
+from src.analyzers.analysis_context import AnalysisContext
+from src.exporters.graph_exporter import EXPORTER, GraphExporter
+from src.utils.metrics import METRICS, Metrics
 
 
 class AbstractAnalyzer(ABC):
     def __init__(self, parser):
         self.parser = parser
 
+    @property
+    def context(self) -> AnalysisContext:
+        """Intermediate results shared by all analyzers of the current parse."""
+        return AnalysisContext.for_parser(self.parser)
+
+    @property
+    def metrics(self) -> Metrics:
+        """Phase timings and counters shared with the parser and other analyzers."""
+        return METRICS
+
+    @property
+    def exporter(self) -> GraphExporter:
+        """Writes graphs as DOT/JSON files and renders them if images are wanted."""
+        return EXPORTER
+
     @abstractmethod
     def analyze(self):
         pass
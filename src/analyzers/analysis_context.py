@@ -0,0 +1,102 @@
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Set
+
+
+def provide_ast(context: "AnalysisContext") -> Any:
+    """The typed AST, recorded as depending on the index of the same parse."""
+    if context.parser.keep_raw:
+        context.get("index")
+    return context.parser.ast_v2
+
+
+class AnalysisContext:
+    """Memoized intermediate results shared by every analyzer of one parse.
+
+    Analyzers register a provider per result name (e.g. "class_hierarchy",
+    "call_sites"); each result is computed on first request and reused by
+    later requests, across algorithms and analyzers. Results that a provider
+    requests while it runs are recorded as its dependencies, so invalidating
+    a result also drops everything that was derived from it. Providers must
+    therefore read the parse through the "index", "ast" (typed AST) and
+    "snapshot" results rather than through the parser. The typed AST comes
+    from the same parse as the index and is registered as derived from it,
+    so invalidating "index" drops every result of the parse.
+    """
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.ast = parser.ast
+        self.ast_v2 = parser.ast_v2
+        self.snapshot = parser.snapshot
+        self.providers: Dict[str, Callable[["AnalysisContext"], Any]] = {}
+        self.results: Dict[str, Any] = {}
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+        self._computing: List[str] = []
+        self.register("index", lambda context: context.parser.index)
+        self.register("ast", provide_ast)
+        self.register("snapshot", lambda context: context.parser.snapshot)
+
+    @classmethod
+    def for_parser(cls, parser) -> "AnalysisContext":
+        """Return the context attached to parser, creating it after each parse
+        or snapshot load.
+
+        A new parse invalidates every result, but providers registered on
+        the previous context are kept.
+        """
+        context = getattr(parser, "analysis_context", None)
+        if (
+            context is None
+            or context.ast is not parser.ast
+            or context.ast_v2 is not parser.ast_v2
+            or context.snapshot is not parser.snapshot
+        ):
+            previous = context
+            context = cls(parser)
+            if previous is not None:
+                context.providers.update(previous.providers)
+            parser.analysis_context = context
+        return context
+
+    def register(self, name: str, provider: Callable[["AnalysisContext"], Any]):
+        """Register provider for name unless another analyzer already did."""
+        self.providers.setdefault(name, provider)
+
+    def get(self, name: str) -> Any:
+        """Return the result for name, computing it on first request."""
+        if self._computing:
+            self.dependents[name].add(self._computing[-1])
+        if name in self.results:
+            return self.results[name]
+        if name in self._computing:
+            raise ValueError(f"Cyclic dependency on analysis result {name}")
+        if name not in self.providers:
+            raise KeyError(f"No provider registered for analysis result {name}")
+
+        self._computing.append(name)
+        try:
+            result = self.providers[name](self)
+        finally:
+            self._computing.pop()
+        self.results[name] = result
+        return result
+
+    def put(self, name: str, result: Any) -> None:
+        """Store a result computed outside of its provider, e.g. while streaming.
+
+        Results derived from a previous value of name are dropped.
+        """
+        self.invalidate(name)
+        self.results[name] = result
+
+    def peek(self, name: str) -> Any:
+        """Return the result for name if it was computed, without computing it."""
+        return self.results.get(name)
+
+    def invalidate(self, name: str) -> None:
+        """Drop the result for name and every result that depends on it."""
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            self.results.pop(current, None)
+            pending.extend(self.dependents.pop(current, ()))
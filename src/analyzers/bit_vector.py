@@ -0,0 +1,42 @@
+from typing import Dict, Hashable, Iterable, List, Set
+
+
+class BitVectorDomain:
+    """Dense integer ids for a universe of data flow facts.
+
+    Sets of facts are stored as Python ints used as arbitrary-precision bit
+    vectors, so union, intersection and difference are word-level OR, AND
+    and AND-NOT operations. encode and decode map between the readable sets
+    and their bit vectors.
+    """
+
+    def __init__(self, facts: Iterable[Hashable] = ()):
+        self.facts: List[Hashable] = []
+        self.ids: Dict[Hashable, int] = {}
+        for fact in facts:
+            self.add(fact)
+
+    def __len__(self) -> int:
+        return len(self.facts)
+
+    def add(self, fact: Hashable) -> int:
+        """Return the id of fact, assigning the next free id if it is new."""
+        fact_id = self.ids.get(fact)
+        if fact_id is None:
+            fact_id = self.ids[fact] = len(self.facts)
+            self.facts.append(fact)
+        return fact_id
+
+    def encode(self, facts: Iterable[Hashable]) -> int:
+        bits = 0
+        for fact in facts:
+            bits |= 1 << self.add(fact)
+        return bits
+
+    def decode(self, bits: int) -> Set[Hashable]:
+        facts = set()
+        while bits:
+            lowest_bit = bits & -bits
+            facts.add(self.facts[lowest_bit.bit_length() - 1])
+            bits ^= lowest_bit
+        return facts
@@ -1,66 +1,150 @@
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
 from src.analyzers.abstract_analyzer import AbstractAnalyzer
 from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.dispatch_index import (
+    CallSite,
+    DispatchIndex,
+    call_signature,
+    snapshot_call_signature,
+)
+from src.exporters.views import (
+    contract_call_counts,
+    contract_function_counts,
+    neighborhood,
+)
+from src.parsers.visitor import ASTVisitor
 from graphviz import Digraph
 
+CALL_GRAPH_NODE_ATTRIBUTES = ("contract", "function")
+CALL_GRAPH_EDGE_ATTRIBUTES = ("algorithm", "src")
+
+
+class CallEdge(NamedTuple):
+    """One resolved call: caller and callee "Contract.function" keys.
+
+    Functions are keyed as in the class hierarchy's "keys": by name, or by
+    name(parameter types) for overloads after the first.
+    """
+
+    source: str
+    target: str
+    algorithm: str
+    src: Optional[str]
+
+
+def function_call_name(function_call_node: dict) -> Optional[str]:
+    """The name of the function a FunctionCall calls, if it names one."""
+    if "expression" in function_call_node:
+        if function_call_node["expression"]["nodeType"] == "Identifier":
+            return function_call_node["expression"]["name"]
+        elif function_call_node["expression"]["nodeType"] == "MemberAccess":
+            return function_call_node["expression"]["memberName"]
+    return None
+
+
+def collect_function_calls(function_node: dict) -> List[Tuple[str, dict, str]]:
+    """Return (function name, callee expression, src) per named call in function_node."""
+    function_calls = []
+
+    def add_call(node):
+        function_name = function_call_name(node)
+        if function_name:
+            function_calls.append((function_name, node["expression"], node.get("src")))
+
+    visitor = ASTVisitor()
+    visitor.register("FunctionCall", add_call)
+    # Calls with {value: ...} options wrap the callee in FunctionCallOptions
+    visitor.register("FunctionCallOptions", add_call)
+    visitor.visit(function_node)
+    return function_calls
+
+
+def new_expression_contract(node: dict) -> Optional[str]:
+    """The name of the contract a NewExpression instantiates."""
+    return node.get("typeName").get("pathNode").get("name")
+
 
 class CallGraphAnalyzer(AbstractAnalyzer):
     def __init__(self, parser, class_hierarchy_analyzer):
         self.parser = parser
         self.class_hierarchy_analyzer = class_hierarchy_analyzer
+        self.context.register(
+            "dispatch_index",
+            lambda context: DispatchIndex(context.get("class_hierarchy")),
+        )
+        self.context.register("call_sites", self.collect_call_sites)
+        self.context.register(
+            "instantiated_contracts",
+            lambda context: self.identify_instantiated_contracts(),
+        )
 
     def analyze(self, algorithm):
         "algorithm CHA or RTA"
-        class_hierarchy = self.class_hierarchy_analyzer.build_class_hierarchy(
-            self.parser.ast_v2
-        )
+        class_hierarchy = self.context.get("class_hierarchy")
+        instantiated_contracts = None
 
         if algorithm == "RTA":
-            instantiated_contracts = self.identify_instantiated_contracts(
-                self.parser.ast
-            )
-            call_graph = self.build_rta_call_graph(
-                class_hierarchy, instantiated_contracts, self.parser.ast
-            )
+            instantiated_contracts = self.context.get("instantiated_contracts")
+        elif algorithm != "CHA":
+            raise ValueError("Invalid algorithm")
 
-        elif algorithm == "CHA":
-            call_graph = self.build_cha_call_graph(class_hierarchy, self.parser.ast)
+        writer = self.exporter.open_stream(
+            self.graph_name(algorithm),
+            CALL_GRAPH_NODE_ATTRIBUTES,
+            CALL_GRAPH_EDGE_ATTRIBUTES,
+        )
+        if writer is not None:
+            with writer:
+                call_graph = self.write_call_graph(
+                    writer, class_hierarchy, algorithm, instantiated_contracts
+                )
         else:
-            raise ValueError("Invalid algorithm")
+            call_graph = self.write_call_graph(
+                None, class_hierarchy, algorithm, instantiated_contracts
+            )
         self.visualize(call_graph, algorithm)
 
-    def identify_instantiated_contracts(self, ast):
+    def identify_instantiated_contracts(self):
+        if self.parser.snapshot_only:
+            return self.identify_snapshot_instantiated_contracts(
+                self.context.get("snapshot")
+            )
         instantiated_contracts = set()
+        for node in self.context.get("index").of_type("NewExpression"):
+            contract_name = new_expression_contract(node)
+            if contract_name:
+                instantiated_contracts.add(contract_name)
+        return instantiated_contracts
 
-        def traverse(node):
-            if "nodeType" in node and node["nodeType"] == "NewExpression":
-                contract_name = node.get("typeName").get("pathNode").get("name")
-                if contract_name:
-                    instantiated_contracts.add(contract_name)
-
-            for key, value in node.items():
-                if isinstance(value, dict):
-                    traverse(value)
-                elif isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, dict):
-                            traverse(item)
-
-        traverse(ast)
+    def identify_snapshot_instantiated_contracts(self, snapshot):
+        instantiated_contracts = set()
+        for new_expression in snapshot.of_type("NewExpression"):
+            type_name = snapshot.child(new_expression, "typeName")
+            path_node = None
+            if type_name is not None:
+                path_node = snapshot.child(type_name, "pathNode")
+            if path_node is not None and snapshot.name(path_node):
+                instantiated_contracts.add(snapshot.name(path_node))
         return instantiated_contracts
 
-    def build_rta_call_graph(self, class_hierarchy, instantiated_contracts, ast):
+    def build_rta_call_graph(self, class_hierarchy, instantiated_contracts):
+        with self.metrics.span("call_graph", algorithm="RTA"):
+            return self._build_rta_call_graph(class_hierarchy, instantiated_contracts)
+
+    def _build_rta_call_graph(self, class_hierarchy, instantiated_contracts):
+        dispatch_index = self.get_dispatch_index(class_hierarchy)
         call_graph = {}
         for contract_name, contract_info in class_hierarchy.items():
-            for func in contract_info["functions"]:
+            for func in contract_info["keys"]:
                 func_key = f"{contract_name}.{func}"
                 call_graph[func_key] = set()
 
-                function_node = self.find_function_node(ast, contract_name, func)
-                if function_node:
-                    called_functions = self.find_function_calls(function_node)
-                    for called_func in called_functions:
+                called_functions = self.get_call_sites(contract_name, func)
+                if called_functions is not None:
+                    for called_func, signature, _ in called_functions:
                         target_functions = self.resolve_function_calls(
-                            called_func, class_hierarchy
+                            called_func, signature, dispatch_index
                         )
                         for target_func in target_functions:
                             # Only add to the call graph if the target function's class is instantiated
@@ -70,93 +154,232 @@ class CallGraphAnalyzer(AbstractAnalyzer):
 
         return call_graph
 
-    def build_cha_call_graph(self, class_hierarchy, ast):
+    def build_cha_call_graph(self, class_hierarchy):
+        with self.metrics.span("call_graph", algorithm="CHA"):
+            return self._build_cha_call_graph(class_hierarchy)
+
+    def _build_cha_call_graph(self, class_hierarchy):
+        dispatch_index = self.get_dispatch_index(class_hierarchy)
         call_graph = {}
         for contract_name, contract_info in class_hierarchy.items():
-            for func in contract_info["functions"]:
+            for func in contract_info["keys"]:
                 func_key = f"{contract_name}.{func}"
                 call_graph[func_key] = self.analyze_function(
-                    ast, contract_name, func, class_hierarchy
+                    contract_name, func, dispatch_index
                 )
         return call_graph
 
-    def visualize(self, call_graph, algorithm):
+    def visualize(self, call_graph, algorithm, filename=None, focus=None):
         dot = Digraph(comment="Call Graph Analysis")
+        edges = []
         for func_key, func_calls in call_graph.items():
-            dot.node(func_key, label=func_key)
+            if func_key == focus:
+                dot.node(func_key, label=func_key, style="filled", fillcolor="orange")
+            else:
+                dot.node(func_key, label=func_key)
             for called_func in func_calls:
                 dot.edge(func_key, called_func)
+                edges.append({"source": func_key, "target": called_func})
+        filename = filename or self.graph_name(algorithm)
+        data = {
+            "graph": filename,
+            "algorithm": algorithm,
+            "nodes": list(call_graph),
+            "edges": edges,
+        }
+        return self.exporter.export(filename, dot, data)
+
+    def visualize_neighborhood(
+        self, call_graph, algorithm, function, hops=1, direction="both"
+    ):
+        """Draw only the functions within hops calls of function ("Contract.name").
+
+        direction is "callees", "callers" or "both"; see views.neighborhood.
+        """
+        subgraph = neighborhood(call_graph, function, hops, direction)
+        filename = f"{self.graph_name(algorithm)}-{function}-{hops}"
+        return self.visualize(subgraph, algorithm, filename=filename, focus=function)
+
+    def visualize_contracts(self, call_graph, algorithm):
+        """Draw one node per contract and one edge per calling pair of contracts.
+
+        Edges are labeled with the number of call graph edges they stand for,
+        and nodes with their number of functions.
+        """
+        dot = Digraph(comment="Call Graph Analysis (contracts)")
+        function_counts = contract_function_counts(call_graph)
+        call_counts = contract_call_counts(call_graph)
+        for contract, functions in function_counts.items():
+            dot.node(contract, label=f"{contract}\n{functions} functions")
+        for (caller, callee), calls in call_counts.items():
+            dot.edge(caller, callee, label=str(calls))
+        filename = f"{self.graph_name(algorithm)}-contracts"
+        data = {
+            "graph": filename,
+            "algorithm": algorithm,
+            "nodes": [
+                {"id": contract, "functions": functions}
+                for contract, functions in function_counts.items()
+            ],
+            "edges": [
+                {"source": caller, "target": callee, "calls": calls}
+                for (caller, callee), calls in call_counts.items()
+            ],
+        }
+        return self.exporter.export(filename, dot, data)
+
+    @staticmethod
+    def graph_name(algorithm):
         if algorithm == "RTA":
-            filename = "call-graph-rta"
+            return "call-graph-rta"
         elif algorithm == "CHA":
-            filename = "call-graph-cha"
-        else:
-            raise ValueError("Invalid algorithm")
-        dot.render(filename, format="png", cleanup=True)
-        print(f"Call Graph using {algorithm} saved as cha.png")
+            return "call-graph-cha"
+        raise ValueError("Invalid algorithm")
 
-    def resolve_function_calls(self, called_func, class_hierarchy):
-        target_functions = set()
+    def iter_call_edges(
+        self, class_hierarchy, algorithm, instantiated_contracts=None
+    ) -> Iterator[CallEdge]:
+        """Yield an edge per call site and target while the call graph is resolved.
 
+        Nothing is accumulated, and calls to one target from different sites
+        are separate edges carrying their own src. With algorithm "RTA",
+        targets in contracts that are never instantiated are skipped.
+        """
+        self.graph_name(algorithm)
+        dispatch_index = self.get_dispatch_index(class_hierarchy)
         for contract_name, contract_info in class_hierarchy.items():
-            if called_func in contract_info["functions"]:
-                target_functions.add(f"{contract_name}.{called_func}")
+            for func in contract_info["keys"]:
+                func_key = f"{contract_name}.{func}"
+                for call_site in self.get_call_sites(contract_name, func) or ():
+                    for target_func in self.resolve_function_calls(
+                        call_site.name, call_site.signature, dispatch_index
+                    ):
+                        if (
+                            algorithm == "RTA"
+                            and target_func.split(".")[0] not in instantiated_contracts
+                        ):
+                            continue
+                        yield CallEdge(func_key, target_func, algorithm, call_site.src)
+
+    def write_call_graph(
+        self, writer, class_hierarchy, algorithm, instantiated_contracts=None
+    ) -> Dict[str, Set[str]]:
+        """Stream every function, then every call edge, to a graph writer.
+
+        The call sites are resolved once, and the call graph is collected
+        from the same edges and returned, equal to what build_cha_call_graph
+        or build_rta_call_graph would return. writer may be None to only
+        collect it.
+        """
+        call_graph = {}
+        with self.metrics.span("call_graph", algorithm=algorithm):
+            for contract_name, contract_info in class_hierarchy.items():
+                for func in contract_info["keys"]:
+                    func_key = f"{contract_name}.{func}"
+                    call_graph[func_key] = set()
+                    if writer is not None:
+                        writer.write_node(
+                            func_key, contract=contract_name, function=func
+                        )
+            for edge in self.iter_call_edges(
+                class_hierarchy, algorithm, instantiated_contracts
+            ):
+                call_graph[edge.source].add(edge.target)
+                if writer is not None:
+                    writer.write_edge(
+                        edge.source, edge.target, algorithm=edge.algorithm, src=edge.src
+                    )
+        return call_graph
 
-            for base_contract_name in contract_info["baseContracts"]:
-                if called_func in class_hierarchy[base_contract_name]["functions"]:
-                    target_functions.add(f"{base_contract_name}.{called_func}")
+    def resolve_function_calls(self, called_func, signature, dispatch_index):
+        """Resolve a call to every function in the hierarchy it may dispatch to.
 
-        return target_functions
+        Functions are matched by name and parameter signature, so calls to one
+        overload do not produce edges to the others.
+        """
+        self.metrics.count("call_sites_resolved")
+        return dispatch_index.resolve(called_func, signature)
 
-    def analyze_function(self, ast, contract_name, func, class_hierarchy):
-        function_node = self.find_function_node(ast, contract_name, func)
+    def get_dispatch_index(self, class_hierarchy):
+        """Return the memoized dispatch index unless given a different hierarchy."""
+        if class_hierarchy is self.context.peek("class_hierarchy"):
+            return self.context.get("dispatch_index")
+        return DispatchIndex(class_hierarchy)
+
+    def collect_call_sites(self, context):
+        """Find the call sites of every function definition in the parsed AST."""
+        if context.parser.snapshot_only:
+            return self.collect_snapshot_call_sites(context.get("snapshot"))
+        return {
+            function_key: self.find_function_calls(function_node)
+            for function_key, function_node in context.get("index").functions.items()
+        }
+
+    def get_call_sites(self, contract_name, func):
+        """Return the memoized call sites of a function, or None if it has no definition.
+
+        func is the function's key, so each overload has its own call sites.
+        """
+        return self.context.get("call_sites").get((contract_name, func))
+
+    def analyze_function(self, contract_name, func, dispatch_index):
         function_calls = set()
-        if function_node:
-            for called_func in self.find_function_calls(function_node):
+        called_functions = self.get_call_sites(contract_name, func)
+        if called_functions is not None:
+            for called_func, signature, _ in called_functions:
                 for target_func in self.resolve_function_calls(
-                    called_func, class_hierarchy
+                    called_func, signature, dispatch_index
                 ):
                     function_calls.add(target_func)
 
         return function_calls
 
-    def find_function_node(self, ast, contract_name, function_name):
-        for node in ast["nodes"]:
-            if (
-                node["nodeType"] == "ContractDefinition"
-                and node["name"] == contract_name
-            ):
-                for sub_node in node["nodes"]:
-                    if (
-                        sub_node["nodeType"] == "FunctionDefinition"
-                        and sub_node["name"] == function_name
-                    ):
-                        return sub_node
-        return None
+    def find_function_node(self, contract_name, function_name):
+        return self.context.get("index").get_function(contract_name, function_name)
 
     def get_function_call_name(self, function_call_node):
-        if "expression" in function_call_node:
-            if function_call_node["expression"]["nodeType"] == "Identifier":
-                return function_call_node["expression"]["name"]
-            elif function_call_node["expression"]["nodeType"] == "MemberAccess":
-                return function_call_node["expression"]["memberName"]
-        return None
+        return function_call_name(function_call_node)
 
     def find_function_calls(self, function_node):
-        function_calls = []
+        """Return a CallSite (function name, parameter signature, src) per call."""
+        index = self.context.get("index")
+        return [
+            CallSite(function_name, call_signature(expression, index), src)
+            for function_name, expression, src in collect_function_calls(function_node)
+        ]
 
-        def traverse(node):
-            function_name = self.get_function_call_name(node)
-            if function_name:
-                function_calls.append(function_name)
-
-            for key, value in node.items():
-                if isinstance(value, dict):
-                    traverse(value)
-                elif isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, dict):
-                            traverse(item)
+    def collect_snapshot_call_sites(self, snapshot):
+        """collect_call_sites for a parser that only has an ASTSnapshot loaded."""
+        call_sites = {}
+        for contract in snapshot.of_type("ContractDefinition"):
+            contract_name = snapshot.name(contract)
+            for key, function in snapshot.contract_functions(contract).items():
+                call_sites.setdefault(
+                    (contract_name, key),
+                    self.find_snapshot_function_calls(snapshot, function),
+                )
+        return call_sites
 
-        traverse(function_node)
+    def find_snapshot_function_calls(self, snapshot, function):
+        """find_function_calls for the FunctionDefinition at index function."""
+        function_calls = []
+        for node in snapshot.descendants(function):
+            if snapshot.node_type(node) not in ("FunctionCall", "FunctionCallOptions"):
+                continue
+            expression = snapshot.child(node, "expression")
+            if expression is None or snapshot.node_type(expression) not in (
+                "Identifier",
+                "MemberAccess",
+            ):
+                continue
+            function_name = snapshot.name(expression)
+            if function_name:
+                start, length, file_index = snapshot.src(node)
+                function_calls.append(
+                    CallSite(
+                        function_name,
+                        snapshot_call_signature(snapshot, expression),
+                        f"{start}:{length}:{file_index}" if start != -1 else None,
+                    )
+                )
         return function_calls
@@ -1,47 +1,100 @@
 from src.analyzers.abstract_analyzer import AbstractAnalyzer
 from graphviz import Digraph
+from src.parsers.ast_index import overload_keys
 from src.parsers.nodes import ASTNode, ContractDefinition, FunctionDefinition
+from src.parsers.visitor import ASTVisitor
+
+
+def contract_entry(node: ContractDefinition) -> dict:
+    """The class hierarchy entry of one typed ContractDefinition."""
+    entry = {
+        "baseContracts": [],
+        "functions": [],
+        "signatures": [],
+        "keys": [],
+    }
+    key_names = []
+    for base_contracts in node.baseContracts:
+        entry["baseContracts"].append(base_contracts["baseName"]["name"])
+    for inner_node in node.nodes:
+        if type(inner_node) == FunctionDefinition:
+            entry["functions"].append(inner_node.name)
+            key_names.append(inner_node.name or inner_node.kind or "")
+            entry["signatures"].append(
+                ",".join(
+                    parameter.typeString or "" for parameter in inner_node.parameters
+                )
+            )
+    # One key per function, the same as in ASTIndex.functions
+    entry["keys"] = overload_keys(zip(key_names, entry["signatures"]))
+    return entry
 
 
 class ClassHierarchyAnalyzer(AbstractAnalyzer):
     def __init__(self, parser):
         self.parser = parser
+        self.context.register("class_hierarchy", self.provide_class_hierarchy)
+
+    def provide_class_hierarchy(self, context):
+        """Build the hierarchy from the typed AST, or from the snapshot if only it is loaded."""
+        if context.parser.snapshot_only:
+            return self.build_snapshot_class_hierarchy(context.get("snapshot"))
+        return self.build_class_hierarchy(context.get("ast"))
 
     def visualize(self, class_hierarchy):
         dot = Digraph(comment="Class Hierarchy Analysis")
+        edges = []
         for contract, funcs in class_hierarchy.items():
             for base in funcs["baseContracts"]:
                 dot.node(base, label=base)
                 dot.edge(base, contract)
+                edges.append({"source": base, "target": contract})
             dot.node(contract, label=contract)
 
-        dot.render("cha", format="png", cleanup=True)
-        print(f"CHA saved as cha.png")
+        data = {"graph": "cha", "nodes": list(class_hierarchy), "edges": edges}
+        return self.exporter.export("cha", dot, data)
 
     def analyze(self):
-        class_hierarchy = self.build_class_hierarchy(self.parser.ast_v2)
+        class_hierarchy = self.context.get("class_hierarchy")
         self.visualize(class_hierarchy)
 
     def build_class_hierarchy(self, ast):
+        with self.metrics.span("class_hierarchy"):
+            return self._build_class_hierarchy(ast)
+
+    def _build_class_hierarchy(self, ast):
         hierarchy = {}
         for node in ast.nodes:
             if type(node) == ContractDefinition:
-                hierarchy[node.name] = {"baseContracts": [], "functions": []}
-                for base_contracts in node.baseContracts:
-                    hierarchy[node.name]["baseContracts"].append(
-                        base_contracts["baseName"]["name"]
-                    )
-                for inner_node in node.nodes:
-                    if type(inner_node) == FunctionDefinition:
-                        hierarchy[node.name]["functions"].append(inner_node.name)
+                hierarchy[node.name] = contract_entry(node)
 
         return hierarchy
 
-    def traverse_ast(self, ast, callback):
-        def traverse(node):
-            callback(node)
-            for key, value in node.items():
-                if isinstance(value, dict):
-                    traverse(value)
+    def build_snapshot_class_hierarchy(self, snapshot):
+        """Build the same hierarchy as build_class_hierarchy from an ASTSnapshot."""
+        with self.metrics.span("class_hierarchy"):
+            hierarchy = {}
+            for contract in snapshot.children(0):
+                if snapshot.node_type(contract) != "ContractDefinition":
+                    continue
+                base_contracts = []
+                for child in snapshot.children(contract):
+                    if snapshot.field(child) == "baseContracts":
+                        base_name = snapshot.child(child, "baseName")
+                        base_contracts.append(snapshot.name(base_name))
+                functions = snapshot.contract_functions(contract)
+                hierarchy[snapshot.name(contract)] = {
+                    "baseContracts": base_contracts,
+                    "functions": [
+                        snapshot.name(function) for function in functions.values()
+                    ],
+                    "signatures": [
+                        snapshot.declaration_signature(function)
+                        for function in functions.values()
+                    ],
+                    "keys": list(functions),
+                }
+            return hierarchy
 
-        traverse(ast)
+    def traverse_ast(self, ast, callback):
+        ASTVisitor().register(None, callback).visit(ast)
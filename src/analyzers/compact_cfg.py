@@ -0,0 +1,125 @@
+import copy
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class CompactCFG:
+    """Integer-indexed control flow graph with CSR adjacency arrays.
+
+    Nodes are numbered 0..n-1. Successors of node i are
+    succ_targets[succ_offsets[i]:succ_offsets[i + 1]], with the edge
+    annotations in the parallel succ_annotations array (interned codes, -1
+    for none); predecessors are stored the same way. The string labels and
+    statements are kept only for visualization, while the per-node defs,
+    gens and uses feed the data flow analyses. Everything is flat, so the
+    graph is cheap to pickle between processes. A graph made by relabeled()
+    shares its structure with base, the graph it was made from.
+    """
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self.node_types: List[str] = []
+        self.statements: List[list] = []
+        self.defs: List[Set[str]] = []
+        self.gens: List[Set[tuple]] = []
+        self.uses: List[Set[str]] = []
+        self.annotations: List[str] = []
+        self.succ_offsets = array("i", [0])
+        self.succ_targets = array("i")
+        self.succ_annotations = array("i")
+        self.pred_offsets = array("i", [0])
+        self.pred_targets = array("i")
+        self.pred_annotations = array("i")
+        self._index_by_label: Optional[Dict[str, int]] = None
+        self.base: Optional["CompactCFG"] = None
+
+    @classmethod
+    def from_cfg(cls, cfg) -> "CompactCFG":
+        """Freeze a ControlFlowGraph into the compact representation."""
+        compact = cls()
+        index_by_label = {label: index for index, label in enumerate(cfg.nodes)}
+        annotation_codes: Dict[str, int] = {}
+
+        def intern(annotation) -> int:
+            if annotation is None:
+                return -1
+            annotation = str(annotation)
+            if annotation not in annotation_codes:
+                annotation_codes[annotation] = len(compact.annotations)
+                compact.annotations.append(annotation)
+            return annotation_codes[annotation]
+
+        for label, node in cfg.nodes.items():
+            compact.labels.append(label)
+            compact.node_types.append(node.node_type)
+            compact.statements.append(node.statements)
+            compact.defs.append(node.defs)
+            compact.gens.append(node.gens)
+            compact.uses.append(node.uses)
+            for target, annotation in node.outgoing_edges:
+                compact.succ_targets.append(index_by_label[target.node_id])
+                compact.succ_annotations.append(intern(annotation))
+            compact.succ_offsets.append(len(compact.succ_targets))
+            for source, annotation in node.incoming_edges:
+                compact.pred_targets.append(index_by_label[source.node_id])
+                compact.pred_annotations.append(intern(annotation))
+            compact.pred_offsets.append(len(compact.pred_targets))
+
+        compact._index_by_label = index_by_label
+        return compact
+
+    def relabeled(
+        self, labels: List[str], statements: List[list], gens: List[Set[tuple]]
+    ) -> "CompactCFG":
+        """Return a view of this graph with other labels, statements and gens.
+
+        The adjacency arrays, node types, defs and uses are shared, so
+        analyses solved on the base graph hold for the view node by node.
+        """
+        view = copy.copy(self)
+        view.labels = labels
+        view.statements = statements
+        view.gens = gens
+        view._index_by_label = None
+        view.base = self if self.base is None else self.base
+        return view
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_index_by_label"] = None
+        return state
+
+    def node_ids(self) -> range:
+        return range(len(self.labels))
+
+    def successors(self, node: int) -> array:
+        return self.succ_targets[self.succ_offsets[node] : self.succ_offsets[node + 1]]
+
+    def predecessors(self, node: int) -> array:
+        return self.pred_targets[self.pred_offsets[node] : self.pred_offsets[node + 1]]
+
+    def edge_count(self) -> int:
+        return len(self.succ_targets)
+
+    def edges(self) -> List[Tuple[int, int, Optional[str]]]:
+        """Return every (source, target, annotation) edge."""
+        edges = []
+        for source in self.node_ids():
+            for position in range(
+                self.succ_offsets[source], self.succ_offsets[source + 1]
+            ):
+                code = self.succ_annotations[position]
+                annotation = self.annotations[code] if code != -1 else None
+                edges.append((source, self.succ_targets[position], annotation))
+        return edges
+
+    def index_of(self, label: str) -> Optional[int]:
+        """Return the integer id of the node with the given string label."""
+        if self._index_by_label is None:
+            self._index_by_label = {
+                node_label: index for index, node_label in enumerate(self.labels)
+            }
+        return self._index_by_label.get(label)
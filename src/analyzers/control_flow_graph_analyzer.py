@@ -1,7 +1,25 @@
 from src.analyzers.abstract_analyzer import AbstractAnalyzer
+from src.analyzers.compact_cfg import CompactCFG
+from src.analyzers.fingerprint import (
+    DedupStats,
+    body_fingerprint,
+    contract_fingerprint,
+    node_ids,
+)
+from src.parsers.ast_index import contract_functions
+from src.utils.events import EVENTS
+from src.utils.parallel import map_in_chunks
 from graphviz import Digraph
-from typing import Dict, Tuple, Optional, List, Set
+from typing import Dict, Iterable, Tuple, Optional, List, Set
 from collections import OrderedDict
+import copy
+import re
+
+CFG_NODE_ATTRIBUTES = ("type", "contract", "function")
+CFG_EDGE_ATTRIBUTES = ("annotation",)
+
+# CFG node labels start with the AST id of the node they were built from
+LABEL_ID = re.compile(r"^(entry_|exit_|return_)?(\d+)(.*)$")
 
 
 class Statement:
@@ -90,7 +108,7 @@ class CFGNode:
                 self.uses.add(right_variable)
             self.gens.add((statement_id, left_variable, right_variable))
         else:
-            print("none statement", statement)
+            EVENTS.debug("cfg_untracked_statement", statement=statement)
 
     def add_incoming_edge(self, node, annotation=None):
         """Add an incoming edge to the node."""
@@ -102,8 +120,16 @@ class CFGNode:
 
 
 class ControlFlowGraph:
+    """Mutable control flow graph of labelled CFGNodes, built by the parse_* methods.
+
+    node_ids, successors, predecessors and index_of number the nodes
+    0..n-1 in insertion order, the same graph API as CompactCFG, so the
+    DataFlowSolver runs on either.
+    """
+
     def __init__(self) -> None:
         self.nodes: Dict[str, CFGNode] = OrderedDict()
+        self._index_by_label: Optional[Dict[str, int]] = None
 
     def add_node(self, node_id: str, node_type: str) -> CFGNode:
         """Add a new node to the control flow graph."""
@@ -111,8 +137,42 @@ class ControlFlowGraph:
             node_id = str(node_id)
         node = CFGNode(node_id=node_id, node_type=node_type)
         self.nodes[node_id] = node
+        self._index_by_label = None
         return node
 
+    def node_ids(self) -> range:
+        return range(len(self.nodes))
+
+    def successors(self, node: int) -> List[int]:
+        index_by_label = self._index()
+        return [
+            index_by_label[target.node_id]
+            for target, _ in self._node(node).outgoing_edges
+        ]
+
+    def predecessors(self, node: int) -> List[int]:
+        index_by_label = self._index()
+        return [
+            index_by_label[source.node_id]
+            for source, _ in self._node(node).incoming_edges
+        ]
+
+    def index_of(self, label: str) -> Optional[int]:
+        """Return the integer id of the node with the given string label."""
+        return self._index().get(label)
+
+    def _index(self) -> Dict[str, int]:
+        if self._index_by_label is None:
+            self._index_by_label = {
+                label: index for index, label in enumerate(self.nodes)
+            }
+            self._nodes_by_index = list(self.nodes.values())
+        return self._index_by_label
+
+    def _node(self, node: int) -> CFGNode:
+        self._index()
+        return self._nodes_by_index[node]
+
     def connect_nodes(
         self, from_node: CFGNode, to_node: CFGNode, annotation: Optional[str] = None
     ) -> None:
@@ -120,11 +180,127 @@ class ControlFlowGraph:
         from_node.add_outgoing_edge(to_node, annotation)
         to_node.add_incoming_edge(from_node, annotation)
 
+    def compact(self) -> CompactCFG:
+        """Return an integer-indexed copy of this graph for the analyses."""
+        return CompactCFG.from_cfg(self)
+
+    def add_compact(self, compact: CompactCFG) -> None:
+        """Add the nodes and edges of a CompactCFG to this graph."""
+        nodes = []
+        for index, label in enumerate(compact.labels):
+            node = self.add_node(label, compact.node_types[index])
+            node.statements = list(compact.statements[index])
+            node.defs = set(compact.defs[index])
+            node.gens = set(compact.gens[index])
+            node.uses = set(compact.uses[index])
+            nodes.append(node)
+        for source, target, annotation in compact.edges():
+            self.connect_nodes(nodes[source], nodes[target], annotation)
+
+
+def collect_function_definitions(contract_node: dict) -> Dict[Tuple[str, str], dict]:
+    """Return the FunctionDefinitions of a contract keyed by (contract, function).
+
+    Constructors, fallback and receive functions are keyed by their kind.
+    Overloads after the first are keyed by name(parameter types). The keys
+    are those of the call graph and of ASTIndex.functions.
+    """
+    contract_name = contract_node["name"]
+    return {
+        (contract_name, key): node
+        for key, node in contract_functions(contract_node).items()
+    }
+
+
+def build_function_cfgs(
+    function_nodes: List[dict],
+) -> List[Tuple[Optional[CompactCFG], Optional[str]]]:
+    """Worker entry point: build the CompactCFG of each FunctionDefinition dict.
+
+    Returns (graph, error) per function, so one function the CFG builder
+    cannot handle does not fail the others.
+    """
+    results = []
+    for function_node in function_nodes:
+        analyzer = ControlFlowGraphAnalyzer(parser=None)
+        try:
+            analyzer.parse_function(function_node)
+        except Exception as e:
+            results.append((None, repr(e)))
+            continue
+        results.append((analyzer.cfg.compact(), None))
+    return results
+
+
+def function_ids(function_node: dict) -> List[int]:
+    """The id of a FunctionDefinition followed by the node_ids of its body."""
+    return [function_node["id"]] + node_ids(function_node.get("body"))
+
+
+def relabel_cfg(
+    graph: CompactCFG, original_ids: List[int], function_node: dict
+) -> CompactCFG:
+    """Return graph, built from the function with original_ids, as the CFG of function_node.
+
+    original_ids are the function_ids of the function graph was built from.
+    The two functions have the same body fingerprint, so their bodies only
+    differ in node ids. The result shares the structure of graph and has
+    the labels and statement ids function_node would have given it.
+    """
+    ids = dict(zip(original_ids, function_ids(function_node)))
+
+    def relabel(label: str) -> str:
+        match = LABEL_ID.match(label)
+        if match is None:
+            return label
+        prefix, node_id, suffix = match.groups()
+        if prefix in ("entry_", "exit_"):
+            suffix = f"_{function_node['name']}"
+        return f"{prefix or ''}{ids.get(int(node_id), node_id)}{suffix}"
+
+    def restatement(statement):
+        if not isinstance(statement, Statement):
+            return statement
+        statement = copy.copy(statement)
+        statement.statement_id = ids.get(statement.statement_id, statement.statement_id)
+        return statement
+
+    labels = [relabel(label) for label in graph.labels]
+    if labels == graph.labels and all(old == new for old, new in ids.items()):
+        return graph
+    return graph.relabeled(
+        labels,
+        [[restatement(statement) for statement in node] for node in graph.statements],
+        [
+            {
+                (ids.get(statement_id, statement_id), *rest)
+                for statement_id, *rest in gens
+            }
+            for gens in graph.gens
+        ],
+    )
+
 
 class ControlFlowGraphAnalyzer(AbstractAnalyzer):
-    def __init__(self, parser):
+    """Builds one control flow graph per function.
+
+    parse() builds the functions independently, in this process by default
+    or on a shared pool of up to workers processes (all CPUs if None), and
+    keeps each result as a CompactCFG in self.function_cfgs, keyed by
+    (contract, function). Functions whose CFG cannot be built are left out
+    and their error is kept in self.errors under the same key. The parse_*
+    methods add nodes to self.cfg, the graph of the function being built;
+    combined_cfg() merges every function for visualization.
+    """
+
+    def __init__(self, parser, workers: Optional[int] = 1):
         self.parser = parser
+        self.workers = workers
         self.cfg = ControlFlowGraph()
+        self.function_cfgs: Dict[Tuple[str, str], CompactCFG] = {}
+        self.errors: Dict[Tuple[str, str], str] = {}
+        self.dedup_stats: Dict[str, DedupStats] = {}
+        self.reset()
 
     def _format_node_label(self, node):
         """Format the label for a node."""
@@ -136,7 +312,7 @@ class ControlFlowGraphAnalyzer(AbstractAnalyzer):
         statements = "\n".join(statements)
         return f"ID: {node_id}\nNODE_TYPE: {node_type}\nSTATEMENTS: {statements}"
 
-    def visualize(self, filename="cfg"):
+    def visualize(self, filename="cfg", cfg=None):
         dot = Digraph(comment="Control Flow Graph")
         node_colors = {
             "FunctionEntry": "lightblue",
@@ -147,39 +323,173 @@ class ControlFlowGraphAnalyzer(AbstractAnalyzer):
             "BinaryOperation": "orange",
             "Return": "lightgreen",
         }
+        if cfg is None:
+            cfg = self.combined_cfg()
+        nodes = []
+        edges = []
         # Add nodes to the graph
-        for node_id, node in self.cfg.nodes.items():
+        for node_id, node in cfg.nodes.items():
             label = self._format_node_label(node)
             color = node_colors.get(node.node_type, "white")
 
             dot.node(node_id, label, style="filled", fillcolor=color)
+            nodes.append(
+                {
+                    "id": node_id,
+                    "type": node.node_type,
+                    "statements": [str(statement) for statement in node.statements],
+                }
+            )
 
         # Add edges to the graph
-        for node_id, node in self.cfg.nodes.items():
+        for node_id, node in cfg.nodes.items():
             for target_node, annotation in node.outgoing_edges:
                 edge_attrs = {}
                 if annotation:
                     edge_attrs["label"] = str(annotation)
                 edge_attrs["color"] = "red"
                 dot.edge(node_id, target_node.node_id, **edge_attrs)
-
-        # Render the graph to a file
-        dot.render(filename, format="png", cleanup=True)
-        print(f"CFG saved as {filename}.png")
+                edges.append(
+                    {
+                        "source": node_id,
+                        "target": target_node.node_id,
+                        "annotation": str(annotation) if annotation else None,
+                    }
+                )
+
+        data = {"graph": filename, "nodes": nodes, "edges": edges}
+        return self.exporter.export(filename, dot, data)
+
+    def visualize_function(self, contract_name, function_name):
+        """Draw the CFG of one function only.
+
+        Functions are named as in function_cfgs: overloads after the first
+        are function_name(parameter types). If parse() has not run, only this
+        function's CFG is built.
+        """
+        key = (contract_name, function_name)
+        graph = self.function_cfgs.get(key)
+        if graph is None:
+            contract_node = self.parser.index.get_contract(contract_name)
+            function_node = None
+            if contract_node is not None:
+                function_node = collect_function_definitions(contract_node).get(key)
+            if function_node is None:
+                raise ValueError(f"Unknown function {contract_name}.{function_name}")
+            ((graph, error),) = build_function_cfgs([function_node])
+            if error is not None:
+                raise ValueError(
+                    f"Cannot build the CFG of {contract_name}.{function_name}: {error}"
+                )
+        cfg = ControlFlowGraph()
+        cfg.add_compact(graph)
+        return self.visualize(f"cfg-{contract_name}.{function_name}", cfg)
 
     def analyze(self):
         self.parse()
         self.visualize()
+        writer = self.exporter.open_stream(
+            "cfg", CFG_NODE_ATTRIBUTES, CFG_EDGE_ATTRIBUTES
+        )
+        if writer is not None:
+            with writer:
+                self.write_cfg(writer)
+
+    def write_cfg(self, writer):
+        """Stream the nodes and annotated edges of every function CFG to a writer."""
+        for (contract_name, function_name), graph in self.function_cfgs.items():
+            for node in graph.node_ids():
+                writer.write_node(
+                    graph.labels[node],
+                    type=graph.node_types[node],
+                    contract=contract_name,
+                    function=function_name,
+                )
+            for source, target, annotation in graph.edges():
+                writer.write_edge(
+                    graph.labels[source], graph.labels[target], annotation=annotation
+                )
+
+    def combined_cfg(self) -> ControlFlowGraph:
+        """Return a single graph holding the CFG of every function."""
+        cfg = ControlFlowGraph()
+        for function_cfg in self.function_cfgs.values():
+            cfg.add_compact(function_cfg)
+        return cfg
 
     def parse(self):
-        for node in self.parser.ast["nodes"]:
-            if node["nodeType"] == "ContractDefinition":
-                self.parse_contract(node)
+        """Build the CFG of every function, once per structurally distinct body.
 
-    def parse_contract(self, contract_node):
-        for node in contract_node["nodes"]:
-            if node["nodeType"] == "FunctionDefinition":
-                self.parse_function(node)
+        Contracts identical up to their name share all their function CFGs,
+        and functions with identical bodies share one build. Each function
+        still gets its own labels and statement ids: the others get a
+        relabel_cfg view of the first one's graph. self.dedup_stats counts how
+        many contracts and functions were distinct.
+        """
+        self.reset()
+        self.add_contracts(self.parser.index.of_type("ContractDefinition"))
+
+    def reset(self):
+        """Forget every CFG built so far."""
+        self.function_cfgs = {}
+        self.errors = {}
+        self.dedup_stats = {"contracts": DedupStats(), "functions": DedupStats()}
+        self._contracts_by_fingerprint: Dict[str, str] = {}
+        self._body_by_key: Dict[Tuple[str, str], str] = {}
+        # Body fingerprint -> (graph, error, function_ids of the function built)
+        self._bodies: Dict[str, tuple] = {}
+
+    def add_contracts(self, contract_nodes: Iterable[dict]):
+        """Build the CFGs of the functions of contract_nodes, as parse() does.
+
+        Bodies and contracts already seen by earlier calls since reset() are
+        not built again, so contracts can be added one at a time while an AST
+        is streamed. Only the ids of each distinct body are kept, not its AST.
+        """
+        contract_stats = self.dedup_stats["contracts"]
+        function_stats = self.dedup_stats["functions"]
+        new_bodies = {}
+        functions = []
+        for contract_node in contract_nodes:
+            contract_stats.total += 1
+            function_definitions = collect_function_definitions(contract_node)
+            function_stats.total += len(function_definitions)
+            fingerprint = contract_fingerprint(contract_node)
+            original = self._contracts_by_fingerprint.get(fingerprint)
+            if original is None:
+                self._contracts_by_fingerprint[fingerprint] = contract_node["name"]
+                contract_stats.distinct += 1
+            for key, function_node in function_definitions.items():
+                if original is not None:
+                    body = self._body_by_key[(original, key[1])]
+                else:
+                    body = body_fingerprint(function_node)
+                    if body not in self._bodies and body not in new_bodies:
+                        new_bodies[body] = function_node
+                self._body_by_key[key] = body
+                functions.append((key, body, function_node))
+        function_stats.distinct += len(new_bodies)
+
+        distinct_nodes = list(new_bodies.values())
+        with self.metrics.span("cfg", functions=len(distinct_nodes)):
+            results = map_in_chunks(build_function_cfgs, distinct_nodes, self.workers)
+        graphs = [graph for graph, _ in results if graph is not None]
+        self.metrics.count("cfg_nodes", sum(len(graph) for graph in graphs))
+        self.metrics.count("cfg_edges", sum(graph.edge_count() for graph in graphs))
+        for body, function_node, (graph, error) in zip(
+            new_bodies, distinct_nodes, results
+        ):
+            self._bodies[body] = (graph, error, function_ids(function_node))
+
+        for key, body, function_node in functions:
+            graph, error, original_ids = self._bodies[body]
+            if error is not None:
+                self.errors[key] = error
+                EVENTS.warning("cfg_failed", function=f"{key[0]}.{key[1]}", error=error)
+            else:
+                self.function_cfgs[key] = relabel_cfg(
+                    graph, original_ids, function_node
+                )
 
     def parse_function(self, function_node):
         function_id = function_node["id"]
@@ -188,7 +498,9 @@ class ControlFlowGraphAnalyzer(AbstractAnalyzer):
         entry_node = self.cfg.add_node(
             f"entry_{function_id}_{function_name}", "FunctionEntry"
         )
-        # Parse the body of the function
+        # Parse the body of the function; functions without one (interface
+        # and abstract functions) go straight from entry to exit
+        end_node = entry_node
         body_node = function_node.get("body")
         if body_node:
             end_node = self.parse_block(block_node=body_node, parent_node=entry_node)
@@ -438,7 +750,6 @@ class ControlFlowGraphAnalyzer(AbstractAnalyzer):
         )
         # Parse the body of the loop
         if "body" in while_node:
-            print("parsing block for while node body")
             self.parse_block(while_node["body"], loop_body_node)
 
         # Create a back edge from the body to the condition (for repeating the loop)
@@ -1,66 +1,267 @@
+from typing import Dict, List, Optional, Tuple
+
 from src.analyzers.abstract_analyzer import AbstractAnalyzer
+from src.analyzers.bit_vector import BitVectorDomain
+from src.analyzers.compact_cfg import CompactCFG
 from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
+from src.analyzers.data_flow_framework import (
+    BACKWARD,
+    FORWARD,
+    BitVectorProblem,
+    DataFlowSolver,
+    SolverStats,
+)
+from src.analyzers.fingerprint import DedupStats
+from src.utils.events import EVENTS
+from src.utils.parallel import map_in_chunks
+
+
+class ReachingDefinitions(BitVectorProblem):
+    """Forward analysis of the variables whose definitions reach each node."""
+
+    direction = FORWARD
+
+    def __init__(self, graph: CompactCFG, variables: BitVectorDomain, all_defs):
+        self.graph = graph
+        self.variables = variables
+        all_defs_bits = variables.encode(all_defs)
+        # Directly use the gen sets as computed in the CFGNodes
+        self.gen_bits = [
+            variables.encode(var for _, var, _ in gens) for gens in graph.gens
+        ]
+        # Definitions a node could kill: those it redefines itself
+        self.kill_bits = [all_defs_bits & gen_bits for gen_bits in self.gen_bits]
+
+    def transfer(self, node_id, in_bits):
+        # OUT[node] = GEN[node] U (IN[node] - KILL[node]), where KILL[node] is
+        # the definitions in IN that are redefined by this node
+        kill = self.kill_bits[node_id] & in_bits
+        return self.gen_bits[node_id] | (in_bits & ~kill)
+
+    def trace(self, node_id, in_bits, out_bits):
+        # Dump all relevant sets to the trace sinks
+        EVENTS.trace(
+            "reaching_definitions",
+            node=self.graph.labels[node_id],
+            in_set=self.variables.decode(in_bits),
+            gen=self.variables.decode(self.gen_bits[node_id]),
+            kill=self.variables.decode(self.kill_bits[node_id] & in_bits),
+            out_set=self.variables.decode(out_bits),
+        )
+
+
+class LiveVariables(BitVectorProblem):
+    """Backward analysis of the variables that may be read after each node."""
+
+    direction = BACKWARD
+
+    def __init__(self, graph: CompactCFG, variables: BitVectorDomain):
+        self.graph = graph
+        self.variables = variables
+        self.uses_bits = [variables.encode(uses) for uses in graph.uses]
+        self.defs_bits = [variables.encode(defs) for defs in graph.defs]
+
+    def transfer(self, node_id, live_out):
+        # Live-IN = USES | (Live-OUT - DEFS)
+        return self.uses_bits[node_id] | (live_out & ~self.defs_bits[node_id])
+
+    def trace(self, node_id, live_out, live_in):
+        # Dump all relevant sets to the trace sinks for debugging/verification
+        EVENTS.trace(
+            "live_variables",
+            node=self.graph.labels[node_id],
+            live_in=self.variables.decode(live_in),
+            live_out=self.variables.decode(live_out),
+        )
+
+
+class FunctionDataFlow:
+    """Reaching definitions and live variables of one function's CFG.
+
+    The analyses run on the function's CompactCFG, so nodes are integer ids.
+    Facts are variable names with dense ids in self.variables and each
+    IN/OUT set is stored as an int bit vector in a list indexed by node id.
+    """
+
+    def __init__(self, graph: CompactCFG):
+        self.graph = graph
+        self.variables = BitVectorDomain()
+        self.solver_stats = {}
+        # Reaching Definitions
+        self.in_bits = [0] * len(graph)
+        self.out_bits = [0] * len(graph)
+        # Live Variables
+        self.live_in_bits = [0] * len(graph)
+        self.live_out_bits = [0] * len(graph)
+
+    def __getstate__(self):
+        # The graph is already in the parent process; only ship the results
+        state = self.__dict__.copy()
+        state["graph"] = None
+        return state
+
+    def decode_all(self, bits_by_node, graph: Optional[CompactCFG] = None):
+        """Decode bits_by_node into sets keyed by the labels of graph.
+
+        graph defaults to self.graph; a relabeled view of it can be passed to
+        read the facts under the labels of another function with this body.
+        """
+        graph = self.graph if graph is None else graph
+        return {
+            label: self.variables.decode(bits)
+            for label, bits in zip(graph.labels, bits_by_node)
+        }
+
+    def compute_live_variables(self):
+        """Compute live variables for each node in the CFG."""
+        solver = DataFlowSolver(self.graph)
+        result = solver.solve(LiveVariables(self.graph, self.variables))
+        self.live_in_bits = result.before
+        self.live_out_bits = result.after
+        self.solver_stats["live_variables"] = result.stats
+
+    def compute_reaching_definitions(self):
+        """Compute reaching definitions for each node in the CFG."""
+        solver = DataFlowSolver(self.graph)
+        problem = ReachingDefinitions(
+            self.graph, self.variables, self.calculate_all_defs()
+        )
+        result = solver.solve(problem)
+        self.in_bits = result.before
+        self.out_bits = result.after
+        self.solver_stats["reaching_definitions"] = result.stats
+
+    def calculate_all_defs(self):
+        """Aggregate all definitions across the CFG to assist in calculating KILL sets."""
+        all_defs = set()
+        for defs in self.graph.defs:
+            all_defs |= defs  # defs is the set of variable names defined by the node
+        return all_defs
+
+
+def solve_functions(graphs: List[CompactCFG]) -> List[FunctionDataFlow]:
+    """Worker entry point: run both analyses on each function CFG."""
+    results = []
+    for graph in graphs:
+        data_flow = FunctionDataFlow(graph)
+        data_flow.compute_reaching_definitions()
+        data_flow.compute_live_variables()
+        results.append(data_flow)
+    return results
 
 
 class DataFlowAnalyzer(AbstractAnalyzer):
-    def __init__(self, parser, cfg_analyzer: ControlFlowGraphAnalyzer):
+    """Reaching definitions and live variables over every function CFG.
+
+    Functions are independent, so each is solved on its own FunctionDataFlow
+    in self.functions, keyed by (contract, function) like the CFGs, and
+    analyze() solves them in this process by default, or on a shared pool of
+    up to workers processes (all CPUs if None). The in_sets, out_sets, live_in_sets and
+    live_out_sets properties decode the results of every function into sets
+    keyed by the readable node labels. Functions whose CFGs are views of one
+    deduplicated CompactCFG share one FunctionDataFlow, so each distinct body
+    is solved once, and their facts are decoded under each one's own labels.
+    """
+
+    def __init__(
+        self,
+        parser,
+        cfg_analyzer: ControlFlowGraphAnalyzer,
+        workers: Optional[int] = 1,
+    ):
         self.parser = parser
         self.cfg_analyzer = cfg_analyzer
-        # Reaching Definitions
-        self.in_sets = {}
-        self.out_sets = {}
-        # Live Variables
-        self.live_in_sets = {}
-        self.live_out_sets = {}
+        self.workers = workers
+        self.functions: Dict[Tuple[str, str], FunctionDataFlow] = {}
+        data_flow_by_graph = {}
+        for key, graph in cfg_analyzer.function_cfgs.items():
+            base = graph if graph.base is None else graph.base
+            if id(base) not in data_flow_by_graph:
+                data_flow_by_graph[id(base)] = FunctionDataFlow(base)
+            self.functions[key] = data_flow_by_graph[id(base)]
+        EVENTS.debug("data_flow_initialized", functions=len(self.functions))
+
+    @property
+    def in_sets(self):
+        return self.decode_all("in_bits")
 
-        for node_id in cfg_analyzer.cfg.nodes:
-            self.in_sets[node_id] = set()
-            self.out_sets[node_id] = set()
-            self.live_in_sets[node_id] = set()
-            self.live_out_sets[node_id] = set()
-        print("DataFlowAnalyzer initialized")
+    @property
+    def out_sets(self):
+        return self.decode_all("out_bits")
+
+    @property
+    def live_in_sets(self):
+        return self.decode_all("live_in_bits")
+
+    @property
+    def live_out_sets(self):
+        return self.decode_all("live_out_bits")
+
+    @property
+    def solver_stats(self) -> Dict[str, SolverStats]:
+        """Solver counters of each analysis, summed over the distinct functions."""
+        totals = {}
+        for data_flow in self.distinct_functions():
+            for analysis, stats in data_flow.solver_stats.items():
+                total = totals.setdefault(analysis, SolverStats())
+                total.visits += stats.visits
+                total.updates += stats.updates
+                total.seconds += stats.seconds
+        return totals
+
+    @property
+    def dedup_stats(self) -> DedupStats:
+        """How many functions were solved out of how many were analyzed."""
+        return DedupStats(len(self.functions), len(self.distinct_functions()))
+
+    def distinct_functions(self) -> List[FunctionDataFlow]:
+        distinct = {}
+        for data_flow in self.functions.values():
+            distinct.setdefault(id(data_flow), data_flow)
+        return list(distinct.values())
+
+    def decode_all(self, attribute):
+        sets = {}
+        for key, data_flow in self.functions.items():
+            graph = self.cfg_analyzer.function_cfgs[key]
+            sets.update(data_flow.decode_all(getattr(data_flow, attribute), graph))
+        return sets
 
     def visualize(self):
         pass
 
     def analyze(self):
-        """Perform data flow analysis on the control flow graph."""
-        print("DataFlowAnalyzer analyzed")
-        self.compute_reaching_definitions()
-        print("-----")
-        self.compute_live_variables()
+        """Perform data flow analysis on the CFG of every function."""
+        distinct = self.distinct_functions()
+        graphs = [data_flow.graph for data_flow in distinct]
+        EVENTS.debug("data_flow_analyze", functions=len(graphs))
+        # Trace sinks live in this process, so solve here while tracing
+        workers = 1 if EVENTS.tracing else self.workers
+        with self.metrics.span("data_flow", functions=len(graphs)):
+            results = map_in_chunks(solve_functions, graphs, workers)
+        solved = {}
+        for previous, graph, data_flow in zip(distinct, graphs, results):
+            data_flow.graph = graph
+            solved[id(previous)] = data_flow
+        for key, data_flow in self.functions.items():
+            self.functions[key] = solved[id(data_flow)]
+        self.count_fixpoint("reaching_definitions", "live_variables")
+
+    def count_fixpoint(self, *analyses):
+        """Add the solver counters of the given analyses to the shared metrics."""
+        solver_stats = self.solver_stats
+        for analysis in analyses:
+            stats = solver_stats.get(analysis)
+            if stats is not None:
+                self.metrics.count("fixpoint_iterations", stats.visits)
+                self.metrics.count("fixpoint_updates", stats.updates)
 
     def compute_live_variables(self):
-        changed = True
-        while changed:
-            changed = False
-            # Process nodes in reverse order since it's a backward analysis
-            for node_id in reversed(list(self.cfg_analyzer.cfg.nodes.keys())):
-                node = self.cfg_analyzer.cfg.nodes[node_id]
-
-                # Calculate Live-Out by union of Live-In of all successors
-                live_out = set()
-                for succ_node, _ in node.outgoing_edges:
-                    live_out |= self.live_in_sets[succ_node.node_id]
-
-                if live_out != self.live_out_sets[node_id]:
-                    self.live_out_sets[node_id] = live_out
-                    changed = True
-
-                # Directly use uses and defs from CFGNode
-                uses = node.uses  # Directly access the uses set from the node
-                defs = node.defs  # Directly access the defs set from the node
-                live_in = uses | (live_out - defs)
-
-                if live_in != self.live_in_sets[node_id]:
-                    self.live_in_sets[node_id] = live_in
-                    changed = True
-
-                # Optional: print all relevant sets for debugging/verification
-                print("Node:", node_id)
-                print("Live-IN:", live_in)
-                print("Live-OUT:", live_out)
-                print("\n")
+        """Compute live variables for each node in the CFG, in this process."""
+        with self.metrics.span("live_variables"):
+            for data_flow in self.distinct_functions():
+                data_flow.compute_live_variables()
+        self.count_fixpoint("live_variables")
 
     def get_uses(self, node):
         # Placeholder for extracting variables used in the node before any assignment
@@ -75,61 +276,23 @@ class DataFlowAnalyzer(AbstractAnalyzer):
         return defs
 
     def compute_reaching_definitions(self):
-        """Compute reaching definitions for each node in the CFG."""
-        changed = True
-        while changed:
-            changed = False
-            for node_id, node in self.cfg_analyzer.cfg.nodes.items():
-                # Calculate IN[node] as the union of OUT[p] for all predecessors p of node
-                in_set = set()
-                for pred_node, _ in node.incoming_edges:
-                    in_set |= self.get_out_set(pred_node.node_id)
-
-                if in_set != self.get_in_set(node_id):
-                    self.in_sets[node_id] = in_set
-                    changed = True
-
-                # Directly use the gen set as computed in the CFGNode
-                gen_set = {var for _, var, _ in node.gens}
-
-                # Calculate KILL[node] - Definitions in IN that are redefined by this node
-                # This requires identifying variables defined in this node that could potentially
-                # kill definitions reaching this node from its predecessors.
-                kill_set = {
-                    def_var
-                    for def_var in self.calculate_all_defs()
-                    if def_var in gen_set and def_var in in_set
-                }
-
-                # OUT[node] = GEN[node] U (IN[node] - KILL[node])
-                # Here, we adjust to consider the gen set's variables for the union operation.
-                out_set = gen_set | (in_set - kill_set)
-
-                if out_set != self.get_out_set(node_id):
-                    self.out_sets[node_id] = out_set
-                    changed = True
-
-                # print all relveant sets
-                print("Node:", node_id)
-                print("IN:", in_set)
-                print("GEN:", gen_set)
-                print("KILL:", kill_set)
-                print("OUT:", out_set)
-                print("\n")
+        """Compute reaching definitions for each node in the CFG, in this process."""
+        with self.metrics.span("reaching_definitions"):
+            for data_flow in self.distinct_functions():
+                data_flow.compute_reaching_definitions()
+        self.count_fixpoint("reaching_definitions")
 
     def get_out_set(self, node_id):
         """Get the OUT set for a node, identified by its node_id."""
-        return self.out_sets.get(node_id, set())
+        return self.get_set("out_bits", node_id)
 
     def get_in_set(self, node_id):
         """Get the IN set for a node, identified by its node_id."""
-        return self.in_sets.get(node_id, set())
+        return self.get_set("in_bits", node_id)
 
-    def calculate_all_defs(self):
-        """Aggregate all definitions across the CFG to assist in calculating KILL sets."""
-        all_defs = set()
-        for node in self.cfg_analyzer.cfg.nodes.values():
-            all_defs |= (
-                node.defs
-            )  # Assuming node.defs is a set of variable names defined by the node
-        return all_defs
+    def get_set(self, attribute, node_id):
+        for key, data_flow in self.functions.items():
+            index = self.cfg_analyzer.function_cfgs[key].index_of(node_id)
+            if index is not None:
+                return data_flow.variables.decode(getattr(data_flow, attribute)[index])
+        return set()
@@ -0,0 +1,211 @@
+import heapq
+import time
+from abc import ABC, abstractmethod
+from functools import reduce
+from typing import Any, List
+
+from src.utils.events import EVENTS
+
+FORWARD = "forward"
+BACKWARD = "backward"
+
+
+class DataFlowProblem(ABC):
+    """A monotone data flow analysis.
+
+    Subclasses declare the lattice (bottom and meet), the direction and the
+    transfer function; DataFlowSolver computes the fixpoint for any of them.
+    Every node starts from initial(), which must be the identity of meet:
+    bottom() for union (may) problems, the full set for intersection (must)
+    problems, which therefore override initial().
+    """
+
+    direction = FORWARD
+
+    @abstractmethod
+    def bottom(self) -> Any:
+        """The least element of the lattice, and the default boundary value."""
+
+    @abstractmethod
+    def meet(self, left: Any, right: Any) -> Any:
+        """Combine the values flowing into a node from two neighbours."""
+
+    @abstractmethod
+    def transfer(self, node_id: int, value: Any) -> Any:
+        """Return the value leaving node_id given the value entering it."""
+
+    def initial(self) -> Any:
+        """Value of every node before the fixpoint is computed."""
+        return self.bottom()
+
+    def boundary(self, node_id: int) -> Any:
+        """Value entering a node without predecessors (successors if backward)."""
+        return self.bottom()
+
+    def trace(self, node_id: int, value_in: Any, value_out: Any) -> None:
+        """Called after every visit of a node, but only while a trace sink is registered."""
+
+
+class BitVectorProblem(DataFlowProblem):
+    """May-analysis over int bit vectors: bottom is 0 and meet is union."""
+
+    def bottom(self) -> int:
+        return 0
+
+    def meet(self, left: int, right: int) -> int:
+        return left | right
+
+
+class Worklist:
+    """Priority worklist that pops nodes in a fixed order, each queued at most once.
+
+    Node ids are the integers 0..len(order)-1, so the priorities and the
+    queued flags are flat arrays indexed by node id.
+    """
+
+    def __init__(self, order: List[int]):
+        self.order = order
+        self.priority = [0] * len(order)
+        for index, node_id in enumerate(order):
+            self.priority[node_id] = index
+        self.heap = list(range(len(order)))
+        self.queued = bytearray(b"\x01") * len(order)
+
+    def __bool__(self):
+        return bool(self.heap)
+
+    def push(self, node_id: int):
+        if not self.queued[node_id]:
+            self.queued[node_id] = 1
+            heapq.heappush(self.heap, self.priority[node_id])
+
+    def pop(self) -> int:
+        node_id = self.order[heapq.heappop(self.heap)]
+        self.queued[node_id] = 0
+        return node_id
+
+
+def reverse_postorder(graph) -> List[int]:
+    """Return the node ids of graph in reverse postorder of a depth-first search.
+
+    The search starts from every node without predecessors (function
+    entries) and then from any node not yet reached, so every node is
+    included exactly once.
+    """
+    node_ids = graph.node_ids()
+    roots = [node_id for node_id in node_ids if not graph.predecessors(node_id)]
+    visited = bytearray(len(node_ids))
+    postorder = []
+    for root in roots + list(node_ids):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [(root, iter(graph.successors(root)))]
+        while stack:
+            node_id, successors = stack[-1]
+            for successor in successors:
+                if not visited[successor]:
+                    visited[successor] = 1
+                    stack.append((successor, iter(graph.successors(successor))))
+                    break
+            else:
+                stack.pop()
+                postorder.append(node_id)
+    postorder.reverse()
+    return postorder
+
+
+class SolverStats:
+    """Counters collected while solving one problem."""
+
+    def __init__(self):
+        self.visits = 0
+        self.updates = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (
+            f"SolverStats(visits={self.visits}, updates={self.updates}, "
+            f"seconds={self.seconds:.6f})"
+        )
+
+
+class DataFlowResult:
+    """Fixpoint of a problem, in program order.
+
+    before[node] holds the value at the start of the node and after[node]
+    the value at its end: IN/OUT for forward problems, and the transfer
+    output/meet input respectively for backward ones. Both are lists indexed
+    by node id.
+    """
+
+    def __init__(self, before: List, after: List, stats: SolverStats):
+        self.before = before
+        self.after = after
+        self.stats = stats
+
+
+class DataFlowSolver:
+    """Worklist solver shared by every DataFlowProblem.
+
+    Nodes are scheduled in reverse postorder for forward problems and in
+    postorder for backward ones, and only the neighbours downstream of a
+    node whose value changed are requeued.
+
+    graph must number its nodes 0..n-1 and provide node_ids(),
+    successors(node_id) and predecessors(node_id), as CompactCFG and
+    ControlFlowGraph do.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._order = None
+
+    def order(self) -> List[int]:
+        if self._order is None:
+            self._order = reverse_postorder(self.graph)
+        return self._order
+
+    def solve(self, problem: DataFlowProblem) -> DataFlowResult:
+        start = time.perf_counter()
+        stats = SolverStats()
+        graph = self.graph
+        if problem.direction == FORWARD:
+            order = self.order()
+            upstream, downstream = graph.predecessors, graph.successors
+        else:
+            order = list(reversed(self.order()))
+            upstream, downstream = graph.successors, graph.predecessors
+
+        value_in = [problem.initial() for _ in order]
+        value_out = [problem.initial() for _ in order]
+        meet = problem.meet
+        # Only pay for the per-node hook when a trace sink is listening
+        trace = problem.trace if EVENTS.tracing else None
+
+        worklist = Worklist(order)
+        while worklist:
+            node_id = worklist.pop()
+            stats.visits += 1
+
+            neighbours = upstream(node_id)
+            if neighbours:
+                incoming = reduce(meet, (value_out[n] for n in neighbours))
+            else:
+                incoming = problem.boundary(node_id)
+            value_in[node_id] = incoming
+
+            outgoing = problem.transfer(node_id, incoming)
+            if outgoing != value_out[node_id]:
+                value_out[node_id] = outgoing
+                stats.updates += 1
+                for neighbour in downstream(node_id):
+                    worklist.push(neighbour)
+
+            if trace is not None:
+                trace(node_id, incoming, outgoing)
+
+        stats.seconds = time.perf_counter() - start
+        if problem.direction == FORWARD:
+            return DataFlowResult(value_in, value_out, stats)
+        return DataFlowResult(value_out, value_in, stats)
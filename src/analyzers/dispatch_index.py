@@ -0,0 +1,111 @@
+from collections import defaultdict
+from typing import Dict, FrozenSet, NamedTuple, Optional, Set, Tuple
+
+from src.parsers.ast_index import declaration_signature
+
+
+class CallSite(NamedTuple):
+    """A call found in a function body: callee name, parameter signature, src."""
+
+    name: str
+    signature: Optional[str]
+    src: Optional[str] = None
+
+
+def parse_parameter_types(type_string: str) -> Optional[str]:
+    """Extract the parameter list from a function type string.
+
+    "function (address,uint256) external" -> "address,uint256". Returns None
+    if type_string is not a function type.
+    """
+    if not type_string or not type_string.startswith("function"):
+        return None
+    start = type_string.find("(")
+    if start == -1:
+        return None
+    depth = 0
+    for position in range(start, len(type_string)):
+        character = type_string[position]
+        if character == "(":
+            depth += 1
+        elif character == ")":
+            depth -= 1
+            if depth == 0:
+                return type_string[start + 1 : position]
+    return None
+
+
+def call_signature(expression: dict, index) -> Optional[str]:
+    """Return the parameter signature of the function called by expression.
+
+    The referenced declaration is preferred since it identifies the exact
+    overload; otherwise the signature is read from the expression's function
+    type. Returns None when neither is available.
+    """
+    declaration = index.get_node(expression.get("referencedDeclaration"))
+    if declaration is not None and declaration.get("nodeType") == "FunctionDefinition":
+        return declaration_signature(declaration)
+    return expression_signature(expression)
+
+
+def expression_signature(expression: dict) -> Optional[str]:
+    """The parameter signature in the function type of a callee expression."""
+    type_string = expression.get("typeDescriptions", {}).get("typeString")
+    return parse_parameter_types(type_string)
+
+
+def snapshot_call_signature(snapshot, expression: int) -> Optional[str]:
+    """call_signature of the expression at index expression of an ASTSnapshot."""
+    reference = snapshot.reference(expression)
+    declaration = snapshot.index_of(reference) if reference is not None else None
+    if (
+        declaration is not None
+        and snapshot.node_type(declaration) == "FunctionDefinition"
+    ):
+        return snapshot.declaration_signature(declaration)
+    return parse_parameter_types(snapshot.type_string(expression))
+
+
+class DispatchIndex:
+    """Inverted index from called function to its possible targets.
+
+    Built once from a class hierarchy, it maps (function name, parameter
+    signature) and function name alone to the set of "Contract.function"
+    targets, so each call site resolves in constant time. Targets use the
+    function keys of the hierarchy, so overloads are distinct targets. The
+    target sets are frozen, so callers can keep them without copying.
+    """
+
+    def __init__(self, class_hierarchy: dict):
+        targets_by_signature: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        targets_by_name: Dict[str, Set[str]] = defaultdict(set)
+
+        for contract_name, contract_info in class_hierarchy.items():
+            for func, signature, key in zip(
+                contract_info["functions"],
+                contract_info["signatures"],
+                contract_info["keys"],
+            ):
+                target = f"{contract_name}.{key}"
+                targets_by_signature[(func, signature)].add(target)
+                targets_by_name[func].add(target)
+        self.targets_by_signature: Dict[Tuple[str, str], FrozenSet[str]] = {
+            key: frozenset(targets) for key, targets in targets_by_signature.items()
+        }
+        self.targets_by_name: Dict[str, FrozenSet[str]] = {
+            name: frozenset(targets) for name, targets in targets_by_name.items()
+        }
+
+    def resolve(
+        self, function_name: str, signature: Optional[str] = None
+    ) -> FrozenSet[str]:
+        """Return the targets a call to function_name may dispatch to.
+
+        Calls whose signature is unknown, or matches no declaration, fall
+        back to every function with that name.
+        """
+        if signature is not None:
+            targets = self.targets_by_signature.get((function_name, signature))
+            if targets:
+                return targets
+        return self.targets_by_name.get(function_name, frozenset())
@@ -0,0 +1,116 @@
+import hashlib
+import json
+from typing import Any, FrozenSet, List
+
+# Fields that change when unrelated code moves or is renumbered: node ids,
+# source offsets and everything derived from them. Names and types that
+# matter for the analyses (typeString, name, ...) are kept.
+IGNORED_FIELDS = frozenset(
+    {
+        "id",
+        "src",
+        "nameLocation",
+        "nameLocations",
+        "referencedDeclaration",
+        "overloadedDeclarations",
+        "scope",
+        "typeIdentifier",
+        "baseFunctions",
+        "linearizedBaseContracts",
+        "contractDependencies",
+        "usedErrors",
+        "usedEvents",
+        "exportedSymbols",
+        "absolutePath",
+        "sourceUnit",
+    }
+)
+
+_END = object()
+
+
+def fingerprint(node: Any, ignored_fields: FrozenSet[str] = IGNORED_FIELDS) -> str:
+    """Return a sha256 hex digest of an AST subtree that ignores ignored_fields.
+
+    Two subtrees have the same fingerprint when they are equal apart from
+    the ignored fields, so moving or renumbering code elsewhere in the file
+    does not change the fingerprint of a function or contract. The subtree is
+    walked iteratively with dict keys in sorted order.
+    """
+    digest = hashlib.sha256()
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if value is _END:
+            digest.update(b"}")
+        elif isinstance(value, dict):
+            digest.update(b"{")
+            stack.append(_END)
+            for key in sorted(value, reverse=True):
+                if key not in ignored_fields:
+                    stack.append(value[key])
+                    stack.append((key,))
+        elif isinstance(value, list):
+            digest.update(b"[")
+            stack.append(_END)
+            stack.extend(reversed(value))
+        elif isinstance(value, tuple):
+            # Dict keys are pushed as 1-tuples, which never occur in JSON
+            digest.update(json.dumps(value[0]).encode("utf-8") + b":")
+        else:
+            digest.update(json.dumps(value).encode("utf-8") + b",")
+    return digest.hexdigest()
+
+
+def contract_fingerprint(contract_node: dict) -> str:
+    """Fingerprint of a ContractDefinition that also ignores the contract's name."""
+    return fingerprint(
+        {
+            key: value
+            for key, value in contract_node.items()
+            if key not in ("name", "canonicalName")
+        }
+    )
+
+
+def body_fingerprint(function_node: dict) -> str:
+    """Fingerprint of the body of a FunctionDefinition, all its CFG depends on."""
+    return fingerprint(function_node.get("body"))
+
+
+def node_ids(node: Any, ignored_fields: FrozenSet[str] = IGNORED_FIELDS) -> List[int]:
+    """Return the ids of the nodes of a subtree in an order fixed by its shape.
+
+    Dict keys are visited in sorted order and ignored_fields are skipped, so
+    two subtrees with the same fingerprint list the ids of corresponding
+    nodes at the same positions.
+    """
+    ids = []
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            if "id" in value:
+                ids.append(value["id"])
+            for key in sorted(value, reverse=True):
+                if key not in ignored_fields:
+                    stack.append(value[key])
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+    return ids
+
+
+class DedupStats:
+    """Counts of the items seen and of the structurally distinct ones among them."""
+
+    def __init__(self, total: int = 0, distinct: int = 0):
+        self.total = total
+        self.distinct = distinct
+
+    @property
+    def saved(self) -> int:
+        """Items that reused the result of an identical one instead of being recomputed."""
+        return self.total - self.distinct
+
+    def __repr__(self):
+        return f"DedupStats(total={self.total}, distinct={self.distinct})"
@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import graphviz
+
+from src.exporters.streaming import WRITERS, TeeWriter, open_graph_writers
+from src.utils.events import EVENTS
+from src.utils.metrics import METRICS
+
+# Directory graph files are written to (default: the working directory)
+OUTPUT_DIR_ENV = "SOLIDITY_OUTPUT_DIR"
+# Comma-separated file formats written for every graph: dot, json and the
+# streaming formats ndjson, edgelist and graphml
+EXPORT_FORMATS_ENV = "SOLIDITY_EXPORT_FORMATS"
+# Set to an image format such as png or svg to also render every graph
+RENDER_ENV = "SOLIDITY_RENDER"
+# Number of graphs rendered at the same time (default: one per CPU)
+RENDER_WORKERS_ENV = "SOLIDITY_RENDER_WORKERS"
+
+EXPORT_FORMATS = ("dot", "json")
+
+
+def render_dot(dot_path: str, image_format: str, image_path: str) -> str:
+    """Lay out and render one DOT file with the graphviz dot binary."""
+    start = time.perf_counter()
+    graphviz.render("dot", image_format, dot_path, outfile=image_path)
+    EVENTS.info(
+        "rendered", path=image_path, seconds=round(time.perf_counter() - start, 3)
+    )
+    return image_path
+
+
+class GraphExporter:
+    """Writes the graphs built by the analyzers to files, without laying them out.
+
+    Every graph is written as DOT source and/or JSON, neither of which runs
+    graphviz; the streaming formats in WRITERS are written by the analyzers
+    edge by edge through open_stream. Images are rendered only when render_format is set, as a
+    separate stage on a pool of background threads that each wait on a dot
+    process, so analysis never waits for layout. close() waits for the
+    pending renders.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".",
+        formats: Iterable[str] = EXPORT_FORMATS,
+        render_format: Optional[str] = None,
+        workers: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.formats = set(formats)
+        self.render_format = render_format
+        self.workers = workers or os.cpu_count() or 1
+        self.pending: List[Tuple[str, Future]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def path(self, name: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{name}.{extension}")
+
+    def export(self, name: str, dot: graphviz.Digraph, data: dict) -> List[str]:
+        """Write one graph, given as DOT and as JSON-serializable data.
+
+        Returns the paths written. The DOT file is also written when only an
+        image was asked for, since it is the input of the render stage.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        paths = []
+        with METRICS.span("export", graph=name):
+            if "dot" in self.formats or self.render_format:
+                dot_path = self.path(name, "dot")
+                with open(dot_path, "w") as dot_file:
+                    dot_file.write(dot.source)
+                paths.append(dot_path)
+            if "json" in self.formats:
+                json_path = self.path(name, "json")
+                with open(json_path, "w") as json_file:
+                    json.dump(data, json_file, indent=2, default=str)
+                paths.append(json_path)
+        if paths:
+            EVENTS.info("exported", graph=name, paths=paths)
+        if self.render_format:
+            self.render(name, dot_path)
+        return paths
+
+    def open_stream(
+        self,
+        name: str,
+        node_attributes: Iterable[str] = (),
+        edge_attributes: Iterable[str] = (),
+    ) -> Optional[TeeWriter]:
+        """Open a writer for each streaming format asked for, or return None."""
+        formats = sorted(self.formats & set(WRITERS))
+        if formats:
+            EVENTS.info("streaming", graph=name, formats=formats)
+        return open_graph_writers(
+            self.directory, name, formats, node_attributes, edge_attributes
+        )
+
+    def render(self, name: str, dot_path: str) -> Future:
+        """Queue dot_path for rendering to an image next to it."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="render"
+            )
+        image_path = self.path(name, self.render_format)
+        future = self._executor.submit(
+            render_dot, dot_path, self.render_format, image_path
+        )
+        self.pending.append((image_path, future))
+        return future
+
+    def close(self) -> List[str]:
+        """Wait for the pending renders and return the paths of the images written.
+
+        A render that fails, e.g. because graphviz is not installed, is
+        reported as an error event and does not affect the others.
+        """
+        rendered = []
+        for image_path, future in self.pending:
+            try:
+                rendered.append(future.result())
+            except Exception as e:
+                EVENTS.error("render_failed", path=image_path, error=repr(e))
+        self.pending = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        return rendered
+
+
+def _formats_from_environment() -> Tuple[str, ...]:
+    formats = os.environ.get(EXPORT_FORMATS_ENV)
+    if formats is None:
+        return EXPORT_FORMATS
+    return tuple(name.strip() for name in formats.split(",") if name.strip())
+
+
+EXPORTER = GraphExporter(
+    directory=os.environ.get(OUTPUT_DIR_ENV, "."),
+    formats=_formats_from_environment(),
+    render_format=os.environ.get(RENDER_ENV) or None,
+    workers=int(os.environ.get(RENDER_WORKERS_ENV, 0)) or None,
+)
@@ -0,0 +1,239 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import IO, Dict, Iterable, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+# Records written between two flushes, so readers see output while it is produced
+FLUSH_EVERY = 1000
+
+
+class GraphWriter(ABC):
+    """Writes a graph node by node and edge by edge to a text stream.
+
+    Nothing is buffered beyond the stream itself, which is flushed every
+    flush_every records, so memory stays constant however large the graph
+    and a reader can follow the output while it is written. The attribute
+    names are given up front because some formats declare them in a header.
+    """
+
+    extension = ""
+
+    def __init__(
+        self,
+        stream: IO[str],
+        node_attributes: Iterable[str] = (),
+        edge_attributes: Iterable[str] = (),
+        flush_every: int = FLUSH_EVERY,
+        close_stream: bool = False,
+    ):
+        self.stream = stream
+        self.node_attributes = list(node_attributes)
+        self.edge_attributes = list(edge_attributes)
+        self.flush_every = flush_every
+        self.close_stream = close_stream
+        self.records = 0
+        self.write_header()
+
+    def write_header(self) -> None:
+        pass
+
+    def write_footer(self) -> None:
+        pass
+
+    @abstractmethod
+    def write_node(self, node_id: str, **attributes) -> None:
+        """Write one node with its attributes."""
+
+    @abstractmethod
+    def write_edge(self, source: str, target: str, **attributes) -> None:
+        """Write one edge between two node ids with its attributes."""
+
+    def written(self) -> None:
+        self.records += 1
+        if self.records % self.flush_every == 0:
+            self.stream.flush()
+
+    def close(self) -> None:
+        self.write_footer()
+        self.stream.flush()
+        if self.close_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class NDJSONWriter(GraphWriter):
+    """One JSON object per line: {"type": "node", "id": ...} or {"type": "edge", ...}."""
+
+    extension = "ndjson"
+
+    def write_node(self, node_id: str, **attributes) -> None:
+        record = {"type": "node", "id": node_id}
+        record.update(attributes)
+        self.stream.write(json.dumps(record, default=str) + "\n")
+        self.written()
+
+    def write_edge(self, source: str, target: str, **attributes) -> None:
+        record = {"type": "edge", "source": source, "target": target}
+        record.update(attributes)
+        self.stream.write(json.dumps(record, default=str) + "\n")
+        self.written()
+
+
+def _field(value) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("\t", " ").replace("\n", " ")
+
+
+class EdgeListWriter(GraphWriter):
+    """Tab-separated source, target and edge attributes, one edge per line.
+
+    Nodes without attributes are implied by the edges, so write_node writes
+    nothing; a "#" header line names the columns.
+    """
+
+    extension = "tsv"
+
+    def write_header(self) -> None:
+        self.stream.write("# " + "\t".join(["source", "target"] + self.edge_attributes))
+        self.stream.write("\n")
+
+    def write_node(self, node_id: str, **attributes) -> None:
+        pass
+
+    def write_edge(self, source: str, target: str, **attributes) -> None:
+        fields = [source, target] + [
+            attributes.get(name) for name in self.edge_attributes
+        ]
+        self.stream.write("\t".join(_field(field) for field in fields) + "\n")
+        self.written()
+
+
+class GraphMLWriter(GraphWriter):
+    """GraphML with string attributes, declared as keys in the header."""
+
+    extension = "graphml"
+
+    def write_header(self) -> None:
+        self.stream.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        )
+        for domain, names in (
+            ("node", self.node_attributes),
+            ("edge", self.edge_attributes),
+        ):
+            for name in names:
+                self.stream.write(
+                    f"  <key id={quoteattr(f'{domain}_{name}')} for={quoteattr(domain)} "
+                    f'attr.name={quoteattr(name)} attr.type="string"/>\n'
+                )
+        self.stream.write('  <graph edgedefault="directed">\n')
+
+    def write_footer(self) -> None:
+        self.stream.write("  </graph>\n</graphml>\n")
+
+    def data(self, domain: str, names: List[str], attributes: Dict[str, object]):
+        return "".join(
+            f"<data key={quoteattr(f'{domain}_{name}')}>"
+            f"{escape(str(attributes[name]))}</data>"
+            for name in names
+            if attributes.get(name) is not None
+        )
+
+    def write_node(self, node_id: str, **attributes) -> None:
+        data = self.data("node", self.node_attributes, attributes)
+        self.stream.write(f"    <node id={quoteattr(node_id)}>{data}</node>\n")
+        self.written()
+
+    def write_edge(self, source: str, target: str, **attributes) -> None:
+        data = self.data("edge", self.edge_attributes, attributes)
+        self.stream.write(
+            f"    <edge source={quoteattr(source)} target={quoteattr(target)}>"
+            f"{data}</edge>\n"
+        )
+        self.written()
+
+
+class TeeWriter:
+    """Forwards every node and edge to several writers, e.g. one per format."""
+
+    def __init__(self, writers: List[GraphWriter]):
+        self.writers = writers
+
+    def write_node(self, node_id: str, **attributes) -> None:
+        for writer in self.writers:
+            writer.write_node(node_id, **attributes)
+
+    def write_edge(self, source: str, target: str, **attributes) -> None:
+        for writer in self.writers:
+            writer.write_edge(source, target, **attributes)
+
+    def close(self) -> None:
+        for writer in self.writers:
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+WRITERS = {
+    "ndjson": NDJSONWriter,
+    "edgelist": EdgeListWriter,
+    "graphml": GraphMLWriter,
+}
+
+
+def open_graph_writer(
+    path: str,
+    format: str,
+    node_attributes: Iterable[str] = (),
+    edge_attributes: Iterable[str] = (),
+) -> GraphWriter:
+    """Open path for writing a graph in format, one of WRITERS."""
+    if format not in WRITERS:
+        raise ValueError(f"Unknown graph format {format}")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return WRITERS[format](
+        open(path, "w"),
+        node_attributes,
+        edge_attributes,
+        close_stream=True,
+    )
+
+
+def graph_path(directory: str, name: str, format: str) -> str:
+    return os.path.join(directory, f"{name}.{WRITERS[format].extension}")
+
+
+def open_graph_writers(
+    directory: str,
+    name: str,
+    formats: Iterable[str],
+    node_attributes: Iterable[str] = (),
+    edge_attributes: Iterable[str] = (),
+) -> Optional[TeeWriter]:
+    """Open a writer per format in directory, or return None if formats is empty."""
+    writers = [
+        open_graph_writer(
+            graph_path(directory, name, format),
+            format,
+            node_attributes,
+            edge_attributes,
+        )
+        for format in formats
+    ]
+    return TeeWriter(writers) if writers else None
@@ -0,0 +1,65 @@
+from collections import Counter, defaultdict, deque
+from typing import Dict, Set, Tuple
+
+CallGraph = Dict[str, Set[str]]
+
+DIRECTIONS = ("both", "callees", "callers")
+
+
+def contract_of(function_key: str) -> str:
+    return function_key.split(".")[0]
+
+
+def neighborhood(
+    call_graph: CallGraph, function: str, hops: int = 1, direction: str = "both"
+) -> CallGraph:
+    """Return the part of call_graph within hops calls of function.
+
+    direction "callees" follows calls, "callers" follows them backwards and
+    "both" does both. The result holds every edge of call_graph between two
+    of the functions reached, so its size depends on the neighborhood only.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Invalid direction {direction}")
+    if function not in call_graph:
+        raise ValueError(f"Unknown function {function}")
+    callers = defaultdict(set)
+    if direction != "callees":
+        for caller, callees in call_graph.items():
+            for callee in callees:
+                callers[callee].add(caller)
+
+    distance = {function: 0}
+    queue = deque([function])
+    while queue:
+        current = queue.popleft()
+        if distance[current] == hops:
+            continue
+        neighbors = set()
+        if direction != "callers":
+            neighbors |= call_graph.get(current, set())
+        if direction != "callees":
+            neighbors |= callers.get(current, set())
+        for neighbor in neighbors:
+            if neighbor not in distance:
+                distance[neighbor] = distance[current] + 1
+                queue.append(neighbor)
+
+    return {
+        node: {callee for callee in call_graph.get(node, ()) if callee in distance}
+        for node in distance
+    }
+
+
+def contract_call_counts(call_graph: CallGraph) -> Dict[Tuple[str, str], int]:
+    """Count the call graph edges between each (caller contract, callee contract) pair."""
+    counts = Counter()
+    for caller, callees in call_graph.items():
+        for callee in callees:
+            counts[contract_of(caller), contract_of(callee)] += 1
+    return dict(counts)
+
+
+def contract_function_counts(call_graph: CallGraph) -> Dict[str, int]:
+    """Count the functions of each contract in the call graph."""
+    return dict(Counter(contract_of(function) for function in call_graph))
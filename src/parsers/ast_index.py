@@ -0,0 +1,96 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.parsers.visitor import ASTVisitor
+
+
+def function_name(function_node: dict) -> str:
+    """Name of a FunctionDefinition dict; constructors, fallback and receive
+    functions are named by their kind."""
+    return function_node["name"] or function_node.get("kind", "")
+
+
+def declaration_signature(function_node: dict) -> str:
+    """Return the comma separated parameter types of a FunctionDefinition dict."""
+    parameters = function_node.get("parameters", {}).get("parameters", [])
+    return ",".join(
+        parameter.get("typeDescriptions", {}).get("typeString", "")
+        for parameter in parameters
+    )
+
+
+def overload_keys(declarations: Iterable[Tuple[str, str]]) -> List[str]:
+    """Return a key per function of one contract, given (name, signature) pairs.
+
+    The first function of each name is keyed by the name, and overloads
+    declared after it by name(signature), so every overload has its own key.
+    """
+    keys = []
+    seen = set()
+    for name, signature in declarations:
+        keys.append(f"{name}({signature})" if name in seen else name)
+        seen.add(name)
+    return keys
+
+
+def contract_functions(contract_node: dict) -> Dict[str, dict]:
+    """Return the FunctionDefinitions of a contract dict keyed by overload_keys."""
+    function_nodes = [
+        node
+        for node in contract_node.get("nodes", [])
+        if node.get("nodeType") == "FunctionDefinition"
+    ]
+    keys = overload_keys(
+        (function_name(node), declaration_signature(node)) for node in function_nodes
+    )
+    return dict(zip(keys, function_nodes))
+
+
+class ASTIndex:
+    """Lookup tables over a compact JSON AST, built in a single pass.
+
+    Maps node id -> node, nodeType -> nodes (in source order) and
+    (contract name, function key) -> FunctionDefinition, so analyzers can
+    find nodes without re-scanning the whole AST. Function keys are those of
+    contract_functions, so every overload is indexed.
+    """
+
+    def __init__(self, ast: Optional[dict] = None):
+        self.nodes_by_id: Dict[int, dict] = {}
+        self.nodes_by_type: Dict[str, List[dict]] = defaultdict(list)
+        self.contracts: Dict[str, dict] = {}
+        self.functions: Dict[Tuple[str, str], dict] = {}
+        if ast is not None:
+            self.build(ast)
+
+    def build(self, ast: dict) -> None:
+        """Index ast; can be called again to add further subtrees."""
+        visitor = ASTVisitor()
+        visitor.register(None, self.add_node)
+        visitor.register("ContractDefinition", self.add_contract)
+        visitor.visit(ast)
+
+    def add_node(self, node: dict) -> None:
+        node_type = node.get("nodeType")
+        if node_type is not None:
+            if "id" in node:
+                self.nodes_by_id[node["id"]] = node
+            self.nodes_by_type[node_type].append(node)
+
+    def add_contract(self, contract_node: dict) -> None:
+        contract_name = contract_node["name"]
+        self.contracts.setdefault(contract_name, contract_node)
+        for key, function_node in contract_functions(contract_node).items():
+            self.functions.setdefault((contract_name, key), function_node)
+
+    def get_node(self, node_id: int) -> Optional[dict]:
+        return self.nodes_by_id.get(node_id)
+
+    def get_contract(self, contract_name: str) -> Optional[dict]:
+        return self.contracts.get(contract_name)
+
+    def get_function(self, contract_name: str, function_name: str) -> Optional[dict]:
+        return self.functions.get((contract_name, function_name))
+
+    def of_type(self, node_type: str) -> List[dict]:
+        return self.nodes_by_type.get(node_type, [])
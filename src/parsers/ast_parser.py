@@ -1,15 +1,58 @@
-import json
-import subprocess
-import os
+from typing import Optional
+
+from src.parsers.ast_index import ASTIndex
+from src.parsers.ast_snapshot import ASTSnapshot, write_snapshot
+from src.parsers.ast_stream import iter_source_unit
 from src.parsers.nodes import ASTNode
+from src.parsers.solc import (
+    SolcError,
+    collect_sources,
+    compile_standard_json,
+    source_errors,
+)
+from src.utils.events import EVENTS
+from src.utils.metrics import METRICS
+
+# Compiler outputs requested from solc, also part of the compile cache key
+SOLC_OUTPUTS = ["ast"]
 
 
 class SolidityASTParser:
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache=None):
         self.file_path = file_path
+        self.cache = cache
         self.source_code = None
         self.ast = None
         self.ast_v2 = None
+        self.index = None
+        self.keep_raw = True
+        self.snapshot = None
+        self.analysis_context = None
+        self.metrics = METRICS
+
+    @property
+    def index(self) -> Optional[ASTIndex]:
+        """Lookup tables over the raw AST, needed by the call graph and CFG analyzers.
+
+        Raises ValueError if the AST was streamed with keep_raw False, rather
+        than letting analyzers fail later on a missing index.
+        """
+        if self._index is None and not self.keep_raw:
+            raise ValueError(
+                f"{self.file_path} was loaded with keep_raw=False, so only ast_v2 "
+                "is available; load it with keep_raw=True to run analyzers that "
+                "need the raw AST index"
+            )
+        return self._index
+
+    @index.setter
+    def index(self, index: Optional[ASTIndex]) -> None:
+        self._index = index
+
+    @property
+    def snapshot_only(self) -> bool:
+        """True if a snapshot is loaded but no AST, so analyzers read the snapshot."""
+        return self.snapshot is not None and self.ast is None and self.ast_v2 is None
 
     def load_code_file_file(self, file_path: str) -> None:
         """Load the source code from a file."""
@@ -23,77 +66,110 @@ class SolidityASTParser:
         """
         self.source_code = self.load_code_file_file(self.file_path)
 
-        subprocess.run(
-            [
-                "solc",
-                "-o",
-                "output",
-                "--bin",
-                "--ast-compact-json",
-                "--asm",
-                "--overwrite",
-                self.file_path,
-            ],
-            check=True,
-        )
-        print("file_path", self.file_path)  # contracts/example.sol
-        filename = self.file_path.split("/")[-1].split(".")[0]
-
-        for file in os.listdir("output"):
-            with open(f"output/{filename}.sol_json.ast", "r") as ast_file:
-                self.ast = json.load(ast_file)
-                break
-
-        self.ast_v2 = ASTNode.create(self.ast)
-        {
-            "arguments": [],
-            "expression": {
-                "argumentTypes": [],
-                "id": 44,
-                "isConstant": False,
-                "isLValue": False,
-                "isPure": False,
-                "lValueRequested": False,
-                "nodeType": "NewExpression",
-                "src": "578:11:0",
-                "typeDescriptions": {
-                    "typeIdentifier": "t_function_creation_nonpayable$__$returns$_t_contract$_Bitcoin_$21_$",
-                    "typeString": "function () returns (contract Bitcoin)",
-                },
-                "typeName": {
-                    "id": 43,
-                    "nodeType": "UserDefinedTypeName",
-                    "pathNode": {
-                        "id": 42,
-                        "name": "Bitcoin",
-                        "nameLocations": ["582:7:0"],
-                        "nodeType": "IdentifierPath",
-                        "referencedDeclaration": 21,
-                        "src": "582:7:0",
-                    },
-                    "referencedDeclaration": 21,
-                    "src": "582:7:0",
-                    "typeDescriptions": {
-                        "typeIdentifier": "t_contract$_Bitcoin_$21",
-                        "typeString": "contract Bitcoin",
-                    },
-                },
-            },
-            "id": 45,
-            "isConstant": False,
-            "isLValue": False,
-            "isPure": False,
-            "kind": "functionCall",
-            "lValueRequested": False,
-            "nameLocations": [],
-            "names": [],
-            "nodeType": "FunctionCall",
-            "src": "578:13:0",
-            "tryCall": False,
-            "typeDescriptions": {
-                "typeIdentifier": "t_contract$_Bitcoin_$21",
-                "typeString": "contract Bitcoin",
-            },
-        }
-        representation = self.ast_v2.visualize()
-        print(representation)
+        EVENTS.debug("parse", file=self.file_path)
+
+        with self.metrics.span("compile", file=self.file_path):
+            if self.cache is not None:
+                cache_key = self.cache.key(self.file_path, SOLC_OUTPUTS)
+                ast = self.cache.get(cache_key)
+                if ast is None:
+                    ast = self.compile()
+                    self.cache.put(cache_key, ast)
+            else:
+                ast = self.compile()
+
+        self.load_ast(ast)
+
+    def load_ast(self, ast: dict) -> None:
+        """Use an already compiled compact JSON AST instead of invoking solc."""
+        self.ast = ast
+        self.keep_raw = True
+        with self.metrics.span("ast_create"):
+            self.ast_v2 = ASTNode.create(self.ast)
+        with self.metrics.span("ast_index"):
+            self.index = ASTIndex(self.ast)
+        self.metrics.count("ast_nodes", len(self.index.nodes_by_id))
+
+    def stream_ast_file(self, ast_file: str, keep_raw: bool = True):
+        """Load a compact JSON AST file one top-level node at a time.
+
+        Yields (raw node, typed node) for each top-level node as soon as it
+        is built, so contracts can be handed to a consumer before the rest of
+        the file has been read; StreamingAnalysis analyzes each contract this
+        way. The JSON text is never held in memory as a whole.
+
+        With keep_raw True the raw AST and its index are also built, as by
+        load_ast. With keep_raw False each raw dict is dropped once the
+        consumer is done with it and only ast_v2 is kept, so the analyzers
+        that read the index (accessing parser.index raises ValueError) only
+        run on what the consumer computed.
+        """
+        header = {}
+        self.ast = None
+        self.ast_v2 = None
+        self.index = None
+        self.keep_raw = keep_raw
+        with open(ast_file, "r") as fp:
+            for event, value in iter_source_unit(fp):
+                if event == "field":
+                    key, field_value = value
+                    header[key] = field_value
+                elif event == "nodes":
+                    self.ast_v2 = ASTNode.create({**header, "nodes": []})
+                    if keep_raw:
+                        header["nodes"] = []
+                        self.ast = header
+                        self.index = ASTIndex()
+                else:
+                    typed_node = ASTNode.create(value)
+                    self.ast_v2.nodes.append(typed_node)
+                    if keep_raw:
+                        self.ast["nodes"].append(value)
+                        self.index.build(value)
+                    yield value, typed_node
+
+        # Fields that follow "nodes" in the file (e.g. src) arrive last
+        if self.ast_v2 is None:
+            self.ast_v2 = ASTNode.create(header)
+            if keep_raw:
+                self.ast = header
+                self.index = ASTIndex(header)
+        else:
+            self.ast_v2.id = header.get("id")
+            self.ast_v2.src = header.get("src")
+            self.ast_v2.license = header.get("license")
+            if keep_raw:
+                self.index.add_node(self.ast)
+
+    def load_ast_file(self, ast_file: str, keep_raw: bool = True) -> None:
+        """Load a compact JSON AST file through the streaming path; see stream_ast_file."""
+        with self.metrics.span("load_ast_file", file=ast_file):
+            for _ in self.stream_ast_file(ast_file, keep_raw):
+                pass
+
+    def save_snapshot(self, snapshot_path: str) -> None:
+        """Write a compact binary snapshot of the parsed AST to snapshot_path."""
+        write_snapshot(self.ast, snapshot_path)
+
+    def load_snapshot(self, snapshot_path: str) -> ASTSnapshot:
+        """Memory-map a snapshot written by save_snapshot without parsing any JSON.
+
+        The snapshot holds node ids, nodeTypes, parent/child structure, names,
+        kinds, typeStrings, referenced declarations and src ranges. When no
+        JSON AST is loaded, the class hierarchy, call sites and instantiated
+        contracts, and so the CHA and RTA call graphs, are read from the
+        snapshot; CFGs and data flow still require the JSON AST.
+        """
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self.snapshot = ASTSnapshot(snapshot_path)
+        return self.snapshot
+
+    def compile(self) -> dict:
+        """Compile the source file in memory and return its compact JSON AST."""
+        output = compile_standard_json(collect_sources([self.file_path]))
+        source_output = output.get("sources", {}).get(self.file_path)
+        if source_output is None or "ast" not in source_output:
+            errors = source_errors(output, self.file_path)
+            raise SolcError(f"solc failed to compile {self.file_path}", errors)
+        return source_output["ast"]
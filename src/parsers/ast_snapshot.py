@@ -0,0 +1,310 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.parsers.ast_index import overload_keys
+from src.parsers.visitor import iter_child_fields
+
+MAGIC = b"SAST"
+FORMAT_VERSION = 2
+
+# magic, version, byte order, node count, child count, string count, string bytes
+HEADER = struct.Struct("<4sIBxxxIIII")
+
+# Per-node int32 columns, in file order
+NODE_COLUMNS = (
+    "ids",
+    "types",
+    "fields",
+    "parents",
+    "names",
+    "src_starts",
+    "src_lengths",
+    "src_files",
+    "kinds",
+    "type_strings",
+    "references",
+)
+
+
+def _parse_src(src) -> Tuple[int, int, int]:
+    try:
+        start, length, file_index = src.split(":")
+        return int(start), int(length), int(file_index)
+    except (AttributeError, ValueError):
+        return -1, -1, -1
+
+
+def write_snapshot(ast: dict, path: str) -> None:
+    """Write a compact binary snapshot of a compact JSON AST.
+
+    Nodes are stored in pre-order as int32 columns: node id, interned
+    nodeType, interned field name in the parent, parent index, interned name
+    and src start/length/file, plus the interned kind and typeString and the
+    referencedDeclaration that the class hierarchy and call sites are read
+    from. Children are stored CSR-style as offsets into a single child index
+    array, and all strings live in one table.
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    columns = {column: array("i") for column in NODE_COLUMNS}
+    children: List[List[int]] = []
+
+    stack = [(ast, -1, None)]
+    while stack:
+        node, parent, field = stack.pop()
+        if "nodeType" in node:
+            index = len(children)
+            children.append([])
+            if parent != -1:
+                children[parent].append(index)
+            start, length, file_index = _parse_src(node.get("src"))
+            name = node.get("name")
+            if not isinstance(name, str):
+                name = node.get("memberName")
+            columns["ids"].append(node.get("id", -1))
+            columns["types"].append(intern(node["nodeType"]))
+            columns["fields"].append(intern(field))
+            columns["parents"].append(parent)
+            columns["names"].append(intern(name if isinstance(name, str) else None))
+            columns["src_starts"].append(start)
+            columns["src_lengths"].append(length)
+            columns["src_files"].append(file_index)
+            kind = node.get("kind")
+            columns["kinds"].append(intern(kind if isinstance(kind, str) else None))
+            type_string = (node.get("typeDescriptions") or {}).get("typeString")
+            columns["type_strings"].append(
+                intern(type_string if isinstance(type_string, str) else None)
+            )
+            reference = node.get("referencedDeclaration")
+            columns["references"].append(
+                reference if isinstance(reference, int) else -1
+            )
+            parent = index
+        stack.extend(
+            (child, parent, child_field)
+            for child_field, child in reversed(list(iter_child_fields(node)))
+        )
+
+    child_offsets = array("i", [0])
+    child_indices = array("i")
+    for node_children in children:
+        child_indices.extend(node_children)
+        child_offsets.append(len(child_indices))
+
+    string_offsets = array("i", [0])
+    string_data = bytearray()
+    for value in strings:
+        string_data += value.encode("utf-8")
+        string_offsets.append(len(string_data))
+
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(
+            HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                sys.byteorder == "little",
+                len(children),
+                len(child_indices),
+                len(strings),
+                len(string_data),
+            )
+        )
+        for column in NODE_COLUMNS:
+            snapshot_file.write(columns[column].tobytes())
+        snapshot_file.write(child_offsets.tobytes())
+        snapshot_file.write(child_indices.tobytes())
+        snapshot_file.write(string_offsets.tobytes())
+        snapshot_file.write(string_data)
+
+
+class ASTSnapshot:
+    """Read-only, memory-mapped view of a snapshot written by write_snapshot.
+
+    Loading only maps the file and slices it into typed memoryviews, so it
+    is near-instant regardless of AST size, and worker processes that map the
+    same snapshot share its pages through the OS page cache. Nodes are
+    addressed by their pre-order index; index 0 is the root.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._view = memoryview(self._mmap)
+
+        (
+            magic,
+            version,
+            little_endian,
+            node_count,
+            child_count,
+            string_count,
+            string_bytes,
+        ) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} AST snapshot")
+        if bool(little_endian) != (sys.byteorder == "little"):
+            raise ValueError(f"{path} was written on a machine of another byte order")
+
+        offset = HEADER.size
+
+        def take(count):
+            nonlocal offset
+            section = view[offset : offset + 4 * count].cast("i")
+            offset += 4 * count
+            return section
+
+        for column in NODE_COLUMNS:
+            setattr(self, column, take(node_count))
+        self.child_offsets = take(node_count + 1)
+        self.child_indices = take(child_count)
+        self.string_offsets = take(string_count + 1)
+        self.string_data = view[offset : offset + string_bytes]
+
+        self._strings: Dict[int, str] = {}
+        self._index_by_id: Optional[Dict[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def close(self) -> None:
+        """Release the column views and unmap the file.
+
+        Query methods return copies, but the column attributes are views of
+        the mapping: if a caller still holds a slice of one, the file stays
+        mapped until that slice is released instead of close() failing.
+        """
+        for column in NODE_COLUMNS:
+            getattr(self, column).release()
+        for section in (
+            self.child_offsets,
+            self.child_indices,
+            self.string_offsets,
+            self.string_data,
+        ):
+            section.release()
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id < 0:
+            return None
+        value = self._strings.get(string_id)
+        if value is None:
+            start = self.string_offsets[string_id]
+            end = self.string_offsets[string_id + 1]
+            value = str(self.string_data[start:end], "utf-8")
+            self._strings[string_id] = value
+        return value
+
+    def node_id(self, index: int) -> int:
+        return self.ids[index]
+
+    def node_type(self, index: int) -> str:
+        return self.string(self.types[index])
+
+    def field(self, index: int) -> Optional[str]:
+        """Name of the field of the parent node that holds this node."""
+        return self.string(self.fields[index])
+
+    def name(self, index: int) -> Optional[str]:
+        return self.string(self.names[index])
+
+    def parent(self, index: int) -> int:
+        return self.parents[index]
+
+    def kind(self, index: int) -> Optional[str]:
+        return self.string(self.kinds[index])
+
+    def type_string(self, index: int) -> Optional[str]:
+        return self.string(self.type_strings[index])
+
+    def reference(self, index: int) -> Optional[int]:
+        """AST id of the declaration the node refers to, if any."""
+        reference = self.references[index]
+        return reference if reference != -1 else None
+
+    def children(self, index: int) -> List[int]:
+        return self.child_indices[
+            self.child_offsets[index] : self.child_offsets[index + 1]
+        ].tolist()
+
+    def child(self, index: int, field: str) -> Optional[int]:
+        """Return the first child held in the given field of the node, if any."""
+        for child in self.children(index):
+            if self.field(child) == field:
+                return child
+        return None
+
+    def descendants(self, index: int) -> Iterator[int]:
+        """Yield index and every node below it in pre-order."""
+        stack = [index]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(self.children(current)))
+
+    def src(self, index: int) -> Tuple[int, int, int]:
+        return (
+            self.src_starts[index],
+            self.src_lengths[index],
+            self.src_files[index],
+        )
+
+    def index_of(self, node_id: int) -> Optional[int]:
+        """Return the index of the node with the given AST id."""
+        if self._index_by_id is None:
+            self._index_by_id = {value: index for index, value in enumerate(self.ids)}
+        return self._index_by_id.get(node_id)
+
+    def declaration_signature(self, index: int) -> str:
+        """Comma separated parameter types of the FunctionDefinition at index."""
+        parameter_list = self.child(index, "parameters")
+        if parameter_list is None:
+            return ""
+        return ",".join(
+            self.type_string(parameter) or ""
+            for parameter in self.children(parameter_list)
+        )
+
+    def contract_functions(self, index: int) -> Dict[str, int]:
+        """Indices of the FunctionDefinitions of a contract, keyed like
+        ast_index.contract_functions."""
+        function_indices = [
+            child
+            for child in self.children(index)
+            if self.node_type(child) == "FunctionDefinition"
+        ]
+        keys = overload_keys(
+            (
+                self.name(child) or self.kind(child) or "",
+                self.declaration_signature(child),
+            )
+            for child in function_indices
+        )
+        return dict(zip(keys, function_indices))
+
+    def of_type(self, node_type: str) -> List[int]:
+        """Return the indices of every node of node_type, in source order."""
+        for string_id in range(len(self.string_offsets) - 1):
+            if self.string(string_id) == node_type:
+                return [
+                    index
+                    for index, type_code in enumerate(self.types)
+                    if type_code == string_id
+                ]
+        return []
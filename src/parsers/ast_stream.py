@@ -0,0 +1,106 @@
+import json
+from typing import Any, Iterator, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class JSONStream:
+    """Minimal incremental reader over a JSON text file.
+
+    Only the structure the caller walks explicitly (here, the top-level
+    object and its "nodes" array) is tokenized by hand; every value inside is
+    decoded with the standard library decoder once its text has been read.
+    Consumed text is dropped, so memory is bounded by the largest value
+    rather than by the size of the file.
+    """
+
+    def __init__(self, fp, chunk_size=1 << 16):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self, size=None) -> bool:
+        """Read another chunk, returning False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.fp.read(max(size or 0, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text before appending so the buffer does not grow
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.position < len(self.buffer):
+                if self.buffer[self.position] not in _WHITESPACE:
+                    return self.buffer[self.position]
+                self.position += 1
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def expect(self, character: str) -> None:
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} but found {found!r}")
+        self.position += 1
+
+    def next_is(self, character: str) -> bool:
+        """Consume character if it is the next non-whitespace character."""
+        if self.peek() == character:
+            self.position += 1
+            return True
+        return False
+
+    def decode(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # Double the read size so large values are re-decoded only
+                # a logarithmic number of times
+                if not self.fill(len(self.buffer)):
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_source_unit(fp, chunk_size=1 << 16) -> Iterator[Tuple[str, Any]]:
+    """Stream a compact JSON SourceUnit one top-level node at a time.
+
+    Yields ("field", (key, value)) for every top-level field other than
+    "nodes", ("nodes", None) when the nodes array starts and ("node", node)
+    for each of its elements, in file order.
+    """
+    stream = JSONStream(fp, chunk_size)
+    stream.expect("{")
+    if stream.next_is("}"):
+        return
+    while True:
+        key = stream.decode()
+        stream.expect(":")
+        if key == "nodes":
+            yield "nodes", None
+            stream.expect("[")
+            if not stream.next_is("]"):
+                while True:
+                    yield "node", stream.decode()
+                    if not stream.next_is(","):
+                        stream.expect("]")
+                        break
+        else:
+            yield "field", (key, stream.decode())
+        if not stream.next_is(","):
+            stream.expect("}")
+            return
@@ -0,0 +1,66 @@
+from typing import Dict, List
+
+from src.parsers.ast_parser import SOLC_OUTPUTS, SolidityASTParser
+from src.parsers.solc import collect_sources, compile_standard_json, source_errors
+
+
+class SolidityBatchParser:
+    """Parse many Solidity files with one `solc --standard-json` process.
+
+    All sources are sent to solc over stdin and every AST is read back from
+    stdout, so no artifacts are written to disk and several batch parsers can
+    run concurrently. Files that fail to compile are retried on their own so
+    that one broken file does not fail the whole batch; their errors are kept
+    in `errors`.
+    """
+
+    def __init__(self, file_paths: List[str], cache=None, batch_size=256):
+        self.file_paths = file_paths
+        self.cache = cache
+        self.batch_size = batch_size
+        self.parsers: Dict[str, SolidityASTParser] = {}
+        self.errors: Dict[str, List[str]] = {}
+
+    def parse(self) -> Dict[str, SolidityASTParser]:
+        """Parse every file and return a parser per successfully compiled file."""
+        cache_keys = {}
+        pending = []
+        for file_path in self.file_paths:
+            if self.cache is not None:
+                cache_keys[file_path] = self.cache.key(file_path, SOLC_OUTPUTS)
+                ast = self.cache.get(cache_keys[file_path])
+                if ast is not None:
+                    self.add_parser(file_path, ast)
+                    continue
+            pending.append(file_path)
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start : start + self.batch_size]
+            failed = self.compile_batch(batch, cache_keys)
+            if len(batch) > 1:
+                for file_path in failed:
+                    self.compile_batch([file_path], cache_keys)
+
+        return self.parsers
+
+    def compile_batch(self, file_paths: List[str], cache_keys: dict) -> List[str]:
+        """Compile file_paths together and return the ones without an AST."""
+        output = compile_standard_json(collect_sources(file_paths))
+        sources = output.get("sources", {})
+        failed = []
+        for file_path in file_paths:
+            ast = sources.get(file_path, {}).get("ast")
+            if ast is None:
+                self.errors[file_path] = source_errors(output, file_path)
+                failed.append(file_path)
+                continue
+            self.errors.pop(file_path, None)
+            if self.cache is not None:
+                self.cache.put(cache_keys[file_path], ast)
+            self.add_parser(file_path, ast)
+        return failed
+
+    def add_parser(self, file_path: str, ast: dict) -> None:
+        parser = SolidityASTParser(file_path, cache=self.cache)
+        parser.load_ast(ast)
+        self.parsers[file_path] = parser
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Iterable, Optional
+
+from src.parsers.solc import get_solc_version, read_sources
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "SOLIDITY_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "solidity-call-graph"),
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_FORMAT_VERSION = "1"
+
+
+class CompileCache:
+    """On-disk, content-addressed cache of solc ASTs with LRU eviction.
+
+    Entries are keyed by a hash of the source file, every file it imports,
+    the solc version and the requested compiler outputs. Recency is tracked
+    through file modification times so that several processes can share one
+    cache directory without coordination.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, file_path: str, outputs: Iterable[str]) -> str:
+        """Compute the cache key for compiling file_path with the given outputs."""
+        digest = hashlib.sha256()
+        digest.update(CACHE_FORMAT_VERSION.encode())
+        digest.update(get_solc_version().encode())
+        digest.update("\0".join(sorted(outputs)).encode())
+        for path, content in read_sources(file_path):
+            digest.update(b"\0" + path.encode() + b"\0")
+            if content is None:
+                digest.update(b"<missing>")
+            else:
+                digest.update(hashlib.sha256(content).digest())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.ast.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached AST for key, or None on a miss."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r") as entry_file:
+                ast = json.load(entry_file)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # Touch the entry so that eviction treats it as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return ast
+
+    def put(self, key: str, ast: dict) -> None:
+        """Store an AST under key and evict old entries if over the size limit."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(ast, tmp_file, separators=(",", ":"))
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total_bytes = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".ast.json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".ast.json"):
+                    os.remove(entry.path)
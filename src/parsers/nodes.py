@@ -1,52 +1,22 @@
+# nodeType -> typed node class, filled in as subclasses are defined
+NODE_CLASSES = {}
+
+
 class ASTNode:
+    __slots__ = ("id", "nodeType", "src")
+
     def __init__(self, node):
         self.id = node.get("id")
         self.nodeType = node.get("nodeType")
         self.src = node.get("src")
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        NODE_CLASSES[cls.__name__] = cls
+
     @staticmethod
     def create(node):
-        nodeType = node.get("nodeType")
-        if nodeType == "SourceUnit":
-            return SourceUnit(node)
-        elif nodeType == "ContractDefinition":
-            return ContractDefinition(node)
-        elif nodeType == "FunctionCall":
-            return FunctionCall(node)
-        elif nodeType == "Block":
-            return Block(node)
-        elif nodeType == "VariableDeclaration":
-            return VariableDeclaration(node)
-        elif nodeType == "VariableDeclarationStatement":
-            return VariableDeclarationStatement(node)
-        elif nodeType == "NewExpression":
-            return NewExpression(node)
-        elif nodeType == "ExpressionStatement":
-            return ExpressionStatement(node)
-        elif nodeType == "IfStatement":
-            return IfStatement(node)
-        elif nodeType == "BinaryOperation":
-            return BinaryOperation(node)
-        elif nodeType == "FunctionDefinition":
-            return FunctionDefinition(node)
-        elif nodeType == "PragmaDirective":
-            return PragmaDirective(node)
-        elif nodeType == "ElementaryTypeName":
-            return ElementaryTypeName(node)
-        elif nodeType == "Literal":
-            return Literal(node)
-        elif nodeType == "Assignment":
-            return Assignment(node)
-        elif nodeType == "Return":
-            return Return(node)
-        elif nodeType == "Identifier":
-            return Identifier(node)
-        elif nodeType == "WhileStatement":
-            return WhileStatement(node)
-        elif nodeType == "UnaryOperation":
-            return UnaryOperation(node)
-        else:
-            return ASTNode(node)
+        return NODE_CLASSES.get(node.get("nodeType"), ASTNode)(node)
 
     def visualize(self, level=0):
         indent = "  " * level
@@ -56,6 +26,8 @@ class ASTNode:
 
 
 class SourceUnit(ASTNode):
+    __slots__ = ("license", "nodes")
+
     def __init__(self, node):
         super().__init__(node)
         self.license = node.get("license")
@@ -71,6 +43,8 @@ class SourceUnit(ASTNode):
 
 
 class ContractDefinition(ASTNode):
+    __slots__ = ("name", "baseContracts", "nodes")
+
     def __init__(self, node):
         super().__init__(node)
         self.name = node.get("name")
@@ -87,6 +61,17 @@ class ContractDefinition(ASTNode):
 
 
 class FunctionCall(ASTNode):
+    __slots__ = (
+        "arguments",
+        "expression",
+        "isConstant",
+        "isLValue",
+        "isPure",
+        "kind",
+        "tryCall",
+        "typeString",
+    )
+
     def __init__(self, node):
         super().__init__(node)
         self.arguments = [ASTNode.create(arg) for arg in node.get("arguments", [])]
@@ -118,6 +103,16 @@ class FunctionCall(ASTNode):
 
 
 class NewExpression(ASTNode):
+    __slots__ = (
+        "isConstant",
+        "isLValue",
+        "isPure",
+        "lValueRequested",
+        "typeString",
+        "typeName",
+        "argumentTypes",
+    )
+
     def __init__(self, node):
         super().__init__(node)
         self.isConstant = node.get("isConstant", False)
@@ -147,6 +142,8 @@ class NewExpression(ASTNode):
 
 
 class WhileStatement(ASTNode):
+    __slots__ = ("condition", "body", "nodes")
+
     def __init__(self, node):
         super().__init__(node)
         self.condition = ASTNode.create(node.get("condition"))
@@ -168,6 +165,8 @@ class WhileStatement(ASTNode):
 
 
 class UnaryOperation(ASTNode):
+    __slots__ = ("operator", "subExpression")
+
     def __init__(self, node):
         super().__init__(node)
         self.operator = node.get("operator")  # (e.g) ++, --
@@ -185,6 +184,8 @@ class UnaryOperation(ASTNode):
 
 
 class Return(ASTNode):
+    __slots__ = ("expression", "functionReturnParameters")
+
     def __init__(self, node):
         super().__init__(node)
         self.expression = (
@@ -206,6 +207,8 @@ class Return(ASTNode):
 
 
 class IfStatement(ASTNode):
+    __slots__ = ("condition", "trueBody", "falseBody")
+
     def __init__(self, node):
         super().__init__(node)
         self.condition = ASTNode.create(node.get("condition"))
@@ -233,6 +236,8 @@ class IfStatement(ASTNode):
 
 
 class BinaryOperation(ASTNode):
+    __slots__ = ("operator", "leftExpression", "rightExpression")
+
     def __init__(self, node):
         super().__init__(node)
         self.operator = node.get("operator")
@@ -253,6 +258,8 @@ class BinaryOperation(ASTNode):
 
 
 class VariableDeclaration(ASTNode):
+    __slots__ = ("name", "typeString", "visibility", "value")
+
     def __init__(self, node):
         super().__init__(node)
         self.name = node.get("name")
@@ -268,6 +275,8 @@ class VariableDeclaration(ASTNode):
 
 
 class Assignment(ASTNode):
+    __slots__ = ("operator", "leftHandSide", "rightHandSide")
+
     def __init__(self, node):
         super().__init__(node)
         self.operator = node.get("operator")  # The assignment operator, e.g., "="
@@ -293,6 +302,8 @@ class Assignment(ASTNode):
 
 
 class VariableDeclarationStatement(ASTNode):
+    __slots__ = ("declarations",)
+
     def __init__(self, node):
         super().__init__(node)
         self.declarations = [
@@ -310,6 +321,8 @@ class VariableDeclarationStatement(ASTNode):
 
 
 class PragmaDirective(ASTNode):
+    __slots__ = ("literals",)
+
     def __init__(self, node):
         super().__init__(node)
         self.literals = node.get("literals", [])  # e.g., ["solidity", "^", "0.8", ".0"]
@@ -323,6 +336,8 @@ class PragmaDirective(ASTNode):
 
 
 class ElementaryTypeName(ASTNode):
+    __slots__ = ("name",)
+
     def __init__(self, node):
         super().__init__(node)
         self.name = node.get("name")  # e.g., "uint256", "address"
@@ -334,9 +349,20 @@ class ElementaryTypeName(ASTNode):
 
 
 class FunctionDefinition(ASTNode):
+    __slots__ = (
+        "name",
+        "kind",
+        "visibility",
+        "stateMutability",
+        "parameters",
+        "returnParameters",
+        "body",
+    )
+
     def __init__(self, node):
         super().__init__(node)
         self.name = node.get("name")
+        self.kind = node.get("kind")
         self.visibility = node.get("visibility")
         self.stateMutability = node.get("stateMutability")
         self.parameters = [
@@ -372,6 +398,8 @@ class FunctionDefinition(ASTNode):
 
 
 class Block(ASTNode):
+    __slots__ = ("statements",)
+
     def __init__(self, node):
         super().__init__(node)
         self.statements = [ASTNode.create(stmt) for stmt in node.get("statements", [])]
@@ -390,6 +418,8 @@ class Block(ASTNode):
 
 
 class ExpressionStatement(ASTNode):
+    __slots__ = ("expression",)
+
     def __init__(self, node):
         super().__init__(node)
         self.expression = ASTNode.create(node.get("expression"))
@@ -404,6 +434,8 @@ class ExpressionStatement(ASTNode):
 
 
 class Literal(ASTNode):
+    __slots__ = ("kind", "value")
+
     def __init__(self, node):
         super().__init__(node)
         self.kind = node.get("kind")  # e.g., "string", "number"
@@ -417,6 +449,8 @@ class Literal(ASTNode):
 
 
 class Identifier(ASTNode):
+    __slots__ = ("name",)
+
     def __init__(self, node):
         super().__init__(node)
         self.name = node.get("name")  # e.g., "uint256", "address"
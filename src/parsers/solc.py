@@ -0,0 +1,140 @@
+import functools
+import json
+import os
+import re
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.metrics import span
+
+SOLC = os.environ.get("SOLC", "solc")
+
+# Output selection used for in-memory compilation; only the AST is needed
+AST_OUTPUT_SELECTION = {"*": {"": ["ast"]}}
+
+IMPORT_PATTERN = re.compile(
+    r"""^\s*import\s+(?:[^"';]*?\s+from\s+)?["']([^"']+)["'][^;]*;""", re.MULTILINE
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_solc_version() -> str:
+    """Return the version string reported by the solc binary on PATH."""
+    result = subprocess.run(
+        [SOLC, "--version"], check=True, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("Version:"):
+            return line.split(":", 1)[1].strip()
+    return result.stdout.strip()
+
+
+def resolve_import_path(import_path: str, importing_file: str) -> str:
+    """Resolve an import the way solc does for a plain `solc <file>` invocation.
+
+    Relative imports ("./", "../") are resolved against the importing file,
+    everything else against the current working directory.
+    """
+    if import_path.startswith("./") or import_path.startswith("../"):
+        base_dir = os.path.dirname(importing_file)
+        return os.path.normpath(os.path.join(base_dir, import_path))
+    return os.path.normpath(import_path)
+
+
+def resolve_imports(file_path: str) -> List[str]:
+    """Return every file transitively imported by file_path, in discovery order.
+
+    Imports that cannot be found on disk are still returned so that callers
+    can include them in cache keys; solc will report them when compiling.
+    """
+    resolved = []
+    seen = {os.path.normpath(file_path)}
+    pending = [file_path]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(current, "r") as source_file:
+                source_code = source_file.read()
+        except OSError:
+            continue
+        for import_path in IMPORT_PATTERN.findall(source_code):
+            path = resolve_import_path(import_path, current)
+            if path not in seen:
+                seen.add(path)
+                resolved.append(path)
+                pending.append(path)
+    return resolved
+
+
+def read_sources(file_path: str) -> List[Tuple[str, Optional[bytes]]]:
+    """Return (path, content) for file_path and all of its resolved imports.
+
+    The content of an import that cannot be read is None.
+    """
+    sources = []
+    for path in [file_path] + resolve_imports(file_path):
+        try:
+            with open(path, "rb") as source_file:
+                sources.append((path, source_file.read()))
+        except OSError:
+            sources.append((path, None))
+    return sources
+
+
+class SolcError(Exception):
+    """Raised when solc fails or reports errors for the requested sources."""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def compile_standard_json(
+    sources: Dict[str, str], output_selection: Optional[dict] = None
+) -> dict:
+    """Compile sources in a single `solc --standard-json` process.
+
+    sources maps source unit names to their content. The compiler input is
+    passed over stdin and the output is read from stdout, so nothing is
+    written to disk. Errors are returned in the "errors" entry of the output
+    rather than raised, so that callers can decide per source whether the
+    compilation failed.
+    """
+    compiler_input = {
+        "language": "Solidity",
+        "sources": {path: {"content": content} for path, content in sources.items()},
+        "settings": {"outputSelection": output_selection or AST_OUTPUT_SELECTION},
+    }
+    with span("solc", sources=len(sources)):
+        result = subprocess.run(
+            [SOLC, "--standard-json"],
+            input=json.dumps(compiler_input),
+            capture_output=True,
+            text=True,
+        )
+    if not result.stdout:
+        raise SolcError(f"solc --standard-json failed: {result.stderr.strip()}")
+    with span("json_load"):
+        return json.loads(result.stdout)
+
+
+def collect_sources(file_paths: List[str]) -> Dict[str, str]:
+    """Read file_paths and everything they import into a standard-json source map."""
+    sources = {}
+    for file_path in file_paths:
+        for path, content in read_sources(file_path):
+            if path not in sources and content is not None:
+                sources[path] = content.decode("utf-8")
+    return sources
+
+
+def source_errors(output: dict, file_path: str) -> List[str]:
+    """Return the formatted error messages solc reported for file_path."""
+    messages = []
+    for error in output.get("errors", []):
+        if error.get("severity") != "error":
+            continue
+        location = error.get("sourceLocation", {}).get("file")
+        if location is None or location == file_path:
+            messages.append(error.get("formattedMessage", error.get("message", "")))
+    return messages
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.utils.metrics import count
+
+# Fields of compact JSON AST nodes that can hold child nodes. Everything else
+# (typeDescriptions, nameLocations, argumentTypes, ...) is metadata and is
+# never walked.
+CHILD_FIELDS = frozenset(
+    {
+        # Source units, contracts and declarations
+        "nodes",
+        "baseContracts",
+        "baseName",
+        "libraryName",
+        "functionList",
+        "function",
+        "definition",
+        "symbolAliases",
+        "foreign",
+        "members",
+        "underlyingType",
+        "parameters",
+        "returnParameters",
+        "modifiers",
+        "modifierName",
+        "overrides",
+        "body",
+        "value",
+        # Type names
+        "typeName",
+        "pathNode",
+        "keyType",
+        "valueType",
+        "baseType",
+        "length",
+        "parameterTypes",
+        "returnParameterTypes",
+        # Statements
+        "statements",
+        "declarations",
+        "initialValue",
+        "condition",
+        "trueBody",
+        "falseBody",
+        "initializationExpression",
+        "loopExpression",
+        "externalCall",
+        "clauses",
+        "block",
+        "eventCall",
+        "errorCall",
+        # Expressions
+        "expression",
+        "arguments",
+        "options",
+        "leftExpression",
+        "rightExpression",
+        "leftHandSide",
+        "rightHandSide",
+        "subExpression",
+        "trueExpression",
+        "falseExpression",
+        "components",
+        "baseExpression",
+        "indexExpression",
+        "startExpression",
+        "endExpression",
+        # Inline assembly (Yul)
+        "AST",
+        "cases",
+        "pre",
+        "post",
+        "functionName",
+        "variables",
+        "variableNames",
+        "returnVariables",
+    }
+)
+
+
+def iter_child_fields(node: dict) -> Iterator[Tuple[str, dict]]:
+    """Yield (field name, child) for the direct children of node in source order."""
+    for key, value in node.items():
+        if key not in CHILD_FIELDS:
+            continue
+        if isinstance(value, dict):
+            yield key, value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    yield key, item
+
+
+def iter_children(node: dict) -> List[dict]:
+    """Return the direct children of node in source order."""
+    children = []
+    for key, value in node.items():
+        if key not in CHILD_FIELDS:
+            continue
+        if isinstance(value, dict):
+            children.append(value)
+        elif isinstance(value, list):
+            children.extend(item for item in value if isinstance(item, dict))
+    return children
+
+
+def iter_nodes(root: dict) -> Iterator[dict]:
+    """Yield root and every node below it in pre-order, without recursion."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(iter_children(node)))
+
+
+class ASTVisitor:
+    """Table-dispatched, iterative visitor over compact JSON ASTs.
+
+    Handlers are registered per nodeType, or for every node with a nodeType
+    of None, and are all run during a single pre-order traversal, so several
+    analyses can share one walk of the AST. An explicit stack is used, so
+    deeply nested ASTs cannot hit the recursion limit.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[Optional[str], List[Callable[[dict], None]]] = defaultdict(
+            list
+        )
+
+    def register(self, node_type: Optional[str], handler: Callable[[dict], None]):
+        self.handlers[node_type].append(handler)
+        return self
+
+    def visit(self, root: dict) -> None:
+        handlers = self.handlers
+        any_handlers = handlers.get(None, [])
+        visited = 0
+        for node in iter_nodes(root):
+            visited += 1
+            for handler in handlers.get(node.get("nodeType"), ()):
+                handler(node)
+            for handler in any_handlers:
+                handler(node)
+        count("nodes_visited", visited)
@@ -0,0 +1,432 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.analyzers.call_graph_analyzer import (
+    CALL_GRAPH_EDGE_ATTRIBUTES,
+    CALL_GRAPH_NODE_ATTRIBUTES,
+    CallGraphAnalyzer,
+)
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.control_flow_graph_analyzer import (
+    CFG_EDGE_ATTRIBUTES,
+    CFG_NODE_ATTRIBUTES,
+    ControlFlowGraphAnalyzer,
+)
+from src.analyzers.data_flow_analyzer import DataFlowAnalyzer
+from src.exporters.streaming import WRITERS, open_graph_writers
+from src.parsers.ast_parser import SolidityASTParser
+from src.parsers.batch_parser import SolidityBatchParser
+from src.parsers.compile_cache import CompileCache
+from src.pipeline.stream_analysis import StreamingAnalysis
+from src.utils.events import EVENTS
+
+# Compact JSON ASTs written by solc --ast-compact-json, analyzed without solc
+AST_FILE_SUFFIX = ".sol_json.ast"
+
+
+class FileResult(NamedTuple):
+    """Compact, picklable summary of running the pipeline on one file.
+
+    Call graph edges are (caller, callee) pairs of "Contract.function" keys.
+    When a stage fails, error names the stage and the fields of the stages
+    that did not run keep their defaults. Functions whose CFG could not be
+    built do not fail the file; they are counted in cfg_errors.
+    """
+
+    file_path: str
+    error: Optional[str] = None
+    contracts: int = 0
+    functions: int = 0
+    cha_edges: Tuple[Tuple[str, str], ...] = ()
+    rta_edges: Tuple[Tuple[str, str], ...] = ()
+    cfg_nodes: int = 0
+    cfg_edges: int = 0
+    reaching_definitions: int = 0
+    live_variables: int = 0
+    cfg_functions: int = 0
+    distinct_cfgs: int = 0
+    cfg_errors: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class CorpusSummary(NamedTuple):
+    files: int
+    failed: int
+    seconds: float
+    cfg_functions: int = 0
+    distinct_cfgs: int = 0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+
+def _edges(call_graph) -> Tuple[Tuple[str, str], ...]:
+    return tuple(
+        (caller, callee)
+        for caller, callees in call_graph.items()
+        for callee in sorted(callees)
+    )
+
+
+def export_name(file_path: str) -> str:
+    """Flatten a source path into a file name prefix for its exported graphs."""
+    return os.path.normpath(file_path).strip(os.sep).replace(os.sep, "__")
+
+
+def analyze_parser(
+    parser,
+    export_dir: Optional[str] = None,
+    export_formats: Sequence[str] = (),
+    control_flow_graph_analyzer: Optional[ControlFlowGraphAnalyzer] = None,
+) -> FileResult:
+    """Run the analysis pipeline on a parsed file without rendering any graphs.
+
+    With export_formats, the CHA and RTA call graphs and the CFGs are also
+    streamed to files in export_dir, named after the source file, as they
+    are resolved. A control_flow_graph_analyzer that already built the CFGs
+    of the file is used as is.
+    """
+    start = time.perf_counter()
+    result = {"file_path": parser.file_path}
+    stage = "class_hierarchy"
+    try:
+        class_hierarchy_analyzer = ClassHierarchyAnalyzer(parser)
+        call_graph_analyzer = CallGraphAnalyzer(parser, class_hierarchy_analyzer)
+        # Through the context, so the call graphs reuse this hierarchy and
+        # its dispatch index
+        class_hierarchy = call_graph_analyzer.context.get("class_hierarchy")
+        result["contracts"] = len(class_hierarchy)
+        result["functions"] = sum(
+            len(info["functions"]) for info in class_hierarchy.values()
+        )
+
+        stage = "call_graph"
+        instantiated_contracts = call_graph_analyzer.context.get(
+            "instantiated_contracts"
+        )
+        # Each call graph is resolved once, streamed while it is collected
+        for algorithm, field in (("CHA", "cha_edges"), ("RTA", "rta_edges")):
+            name = call_graph_analyzer.graph_name(algorithm)
+            writer = open_graph_writers(
+                export_dir,
+                f"{export_name(parser.file_path)}.{name}",
+                export_formats,
+                CALL_GRAPH_NODE_ATTRIBUTES,
+                CALL_GRAPH_EDGE_ATTRIBUTES,
+            )
+            if writer is not None:
+                with writer:
+                    call_graph = call_graph_analyzer.write_call_graph(
+                        writer, class_hierarchy, algorithm, instantiated_contracts
+                    )
+            else:
+                call_graph = call_graph_analyzer.write_call_graph(
+                    None, class_hierarchy, algorithm, instantiated_contracts
+                )
+            result[field] = _edges(call_graph)
+
+        stage = "control_flow"
+        if control_flow_graph_analyzer is None:
+            # Files are already spread over the pool, so analyze functions in-process
+            control_flow_graph_analyzer = ControlFlowGraphAnalyzer(parser, workers=1)
+            control_flow_graph_analyzer.parse()
+        if export_formats:
+            with open_graph_writers(
+                export_dir,
+                f"{export_name(parser.file_path)}.cfg",
+                export_formats,
+                CFG_NODE_ATTRIBUTES,
+                CFG_EDGE_ATTRIBUTES,
+            ) as writer:
+                control_flow_graph_analyzer.write_cfg(writer)
+        function_cfgs = control_flow_graph_analyzer.function_cfgs.values()
+        result["cfg_nodes"] = sum(len(cfg) for cfg in function_cfgs)
+        result["cfg_edges"] = sum(cfg.edge_count() for cfg in function_cfgs)
+        function_stats = control_flow_graph_analyzer.dedup_stats["functions"]
+        result["cfg_functions"] = function_stats.total
+        result["distinct_cfgs"] = function_stats.distinct
+        result["cfg_errors"] = len(control_flow_graph_analyzer.errors)
+
+        stage = "data_flow"
+        data_flow_analyzer = DataFlowAnalyzer(
+            parser, control_flow_graph_analyzer, workers=1
+        )
+        data_flow_analyzer.analyze()
+        result["reaching_definitions"] = sum(
+            len(out_set) for out_set in data_flow_analyzer.out_sets.values()
+        )
+        result["live_variables"] = sum(
+            len(live_in) for live_in in data_flow_analyzer.live_in_sets.values()
+        )
+    except Exception as e:
+        result["error"] = f"{stage}: {e!r}"
+    result["seconds"] = time.perf_counter() - start
+    return FileResult(**result)
+
+
+def analyze_ast_file(
+    file_path: str,
+    export_dir: Optional[str] = None,
+    export_formats: Sequence[str] = (),
+) -> FileResult:
+    """Analyze a compiled compact JSON AST file while it is streamed; see StreamingAnalysis."""
+    start = time.perf_counter()
+    parser = SolidityASTParser(file_path)
+    streaming_analysis = StreamingAnalysis(parser, workers=1)
+    try:
+        streaming_analysis.run(file_path)
+    except Exception as e:
+        return FileResult(
+            file_path, f"parse: {e!r}", seconds=time.perf_counter() - start
+        )
+    parse_seconds = time.perf_counter() - start
+    result = analyze_parser(
+        parser, export_dir, export_formats, streaming_analysis.cfg_analyzer
+    )
+    return result._replace(seconds=result.seconds + parse_seconds)
+
+
+def analyze_files(
+    file_paths: List[str],
+    cache_dir: Optional[str],
+    export_dir: Optional[str] = None,
+    export_formats: Sequence[str] = (),
+) -> List[FileResult]:
+    """Worker entry point: compile a chunk of files with one solc process and analyze them.
+
+    Compiled AST files in the chunk are not compiled but streamed, see
+    analyze_ast_file.
+    """
+    results = {
+        file_path: analyze_ast_file(file_path, export_dir, export_formats)
+        for file_path in file_paths
+        if file_path.endswith(AST_FILE_SUFFIX)
+    }
+    source_paths = [path for path in file_paths if path not in results]
+    if source_paths:
+        results.update(
+            zip(
+                source_paths,
+                compile_and_analyze(
+                    source_paths, cache_dir, export_dir, export_formats
+                ),
+            )
+        )
+    return [results[file_path] for file_path in file_paths]
+
+
+def compile_and_analyze(
+    file_paths: List[str],
+    cache_dir: Optional[str],
+    export_dir: Optional[str] = None,
+    export_formats: Sequence[str] = (),
+) -> List[FileResult]:
+    """Compile Solidity files with one solc process and analyze them."""
+    start = time.perf_counter()
+    cache = CompileCache(cache_dir) if cache_dir else None
+    batch_parser = SolidityBatchParser(file_paths, cache=cache)
+    try:
+        parsers = batch_parser.parse()
+    except Exception as e:
+        elapsed = (time.perf_counter() - start) / len(file_paths)
+        return [
+            FileResult(path, f"parse: {e!r}", seconds=elapsed) for path in file_paths
+        ]
+    parse_seconds = (time.perf_counter() - start) / len(file_paths)
+
+    results = []
+    for file_path in file_paths:
+        if file_path not in parsers:
+            errors = "; ".join(batch_parser.errors.get(file_path, [])) or "no AST"
+            results.append(
+                FileResult(file_path, f"parse: {errors}", seconds=parse_seconds)
+            )
+            continue
+        result = analyze_parser(parsers[file_path], export_dir, export_formats)
+        results.append(result._replace(seconds=result.seconds + parse_seconds))
+        # Drop the parsed AST as soon as the file is done to bound worker memory
+        del parsers[file_path]
+    return results
+
+
+def worker_failed(file_paths: List[str], error: BaseException) -> List[FileResult]:
+    """Results of a chunk whose worker failed before returning any."""
+    return [FileResult(path, f"worker: {error!r}") for path in file_paths]
+
+
+def _quiet_events():
+    EVENTS.quiet()
+
+
+class CorpusRunner:
+    """Run the analysis pipeline over many files on a process pool.
+
+    Files are handed to workers in chunks so that each chunk is compiled by a
+    single solc process. Results are yielded as chunks complete, and a file
+    that fails to compile or analyze is reported in its result instead of
+    stopping the run. With export_formats, each worker streams the graphs of
+    its files to export_dir, so they can be read while the run goes on.
+
+    A worker that dies (e.g. killed for running out of memory) breaks the
+    pool and fails every chunk still pending on it. Those chunks are run
+    again one at a time, each on a fresh single-worker pool, so a chunk that
+    kills its worker again is reported as failed with a "worker" error and
+    the others complete.
+    """
+
+    def __init__(
+        self,
+        file_paths: List[str],
+        workers: Optional[int] = None,
+        chunk_size: int = 16,
+        cache_dir: Optional[str] = None,
+        quiet: bool = True,
+        export_dir: Optional[str] = None,
+        export_formats: Sequence[str] = (),
+    ):
+        self.file_paths = file_paths
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.cache_dir = cache_dir
+        self.quiet = quiet
+        self.export_dir = export_dir
+        self.export_formats = tuple(export_formats)
+        self.summary: Optional[CorpusSummary] = None
+
+    def chunks(self) -> Iterator[List[str]]:
+        for start in range(0, len(self.file_paths), self.chunk_size):
+            yield self.file_paths[start : start + self.chunk_size]
+
+    def submit(self, executor: ProcessPoolExecutor, chunk: List[str]):
+        return executor.submit(
+            analyze_files,
+            chunk,
+            self.cache_dir,
+            self.export_dir,
+            self.export_formats,
+        )
+
+    def chunk_results(self) -> Iterator[List[FileResult]]:
+        """Yield the results of each chunk as it completes, surviving dead workers."""
+        initializer = _quiet_events if self.quiet else None
+        lost = []
+        with ProcessPoolExecutor(self.workers, initializer=initializer) as executor:
+            futures = {self.submit(executor, chunk): chunk for chunk in self.chunks()}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    lost.append(futures[future])
+                except Exception as e:
+                    yield worker_failed(futures[future], e)
+        for chunk in lost:
+            with ProcessPoolExecutor(1, initializer=initializer) as executor:
+                try:
+                    results = self.submit(executor, chunk).result()
+                except Exception as e:
+                    results = worker_failed(chunk, e)
+            yield results
+
+    def run(self) -> Iterator[FileResult]:
+        """Yield a FileResult per file, then store the run summary in self.summary."""
+        start = time.perf_counter()
+        files = failed = cfg_functions = distinct_cfgs = 0
+        for results in self.chunk_results():
+            for result in results:
+                files += 1
+                failed += not result.ok
+                cfg_functions += result.cfg_functions
+                distinct_cfgs += result.distinct_cfgs
+                yield result
+        self.summary = CorpusSummary(
+            files,
+            failed,
+            time.perf_counter() - start,
+            cfg_functions,
+            distinct_cfgs,
+        )
+
+
+def find_solidity_files(paths: List[str]) -> List[str]:
+    """Expand directories into the .sol and compiled AST files they contain, sorted by path."""
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                file_paths.extend(
+                    os.path.join(root, name)
+                    for name in files
+                    if name.endswith((".sol", AST_FILE_SUFFIX))
+                )
+        else:
+            file_paths.append(path)
+    return sorted(file_paths)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Run the analysis pipeline over a corpus of Solidity files."
+    )
+    arg_parser.add_argument(
+        "paths", nargs="+", help="Solidity or .sol_json.ast files, or directories"
+    )
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--chunk-size", type=int, default=16)
+    arg_parser.add_argument(
+        "--cache-dir", default=None, help="compile cache directory (disabled if unset)"
+    )
+    arg_parser.add_argument(
+        "--export-dir", default=None, help="stream call graphs and CFGs here"
+    )
+    arg_parser.add_argument(
+        "--export-format",
+        action="append",
+        choices=sorted(WRITERS),
+        help="format of the exported graphs, may be repeated (default ndjson)",
+    )
+    args = arg_parser.parse_args(argv)
+    export_formats = ()
+    if args.export_dir:
+        export_formats = args.export_format or ["ndjson"]
+
+    runner = CorpusRunner(
+        find_solidity_files(args.paths),
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        cache_dir=args.cache_dir,
+        export_dir=args.export_dir,
+        export_formats=export_formats,
+    )
+    for result in runner.run():
+        if not result.ok:
+            print(f"FAILED {result.file_path}: {result.error}", file=sys.stderr)
+        elif result.cfg_errors:
+            print(
+                f"{result.file_path}: no CFG for {result.cfg_errors} functions",
+                file=sys.stderr,
+            )
+    summary = runner.summary
+    print(
+        f"{summary.files} files, {summary.failed} failed in {summary.seconds:.2f}s "
+        f"({summary.files_per_second:.1f} files/s)"
+    )
+    if summary.cfg_functions:
+        print(
+            f"{summary.distinct_cfgs} distinct function CFGs built for "
+            f"{summary.cfg_functions} functions "
+            f"({summary.cfg_functions - summary.distinct_cfgs} deduplicated)"
+        )
+
+
+if __name__ == "__main__":
+    main()
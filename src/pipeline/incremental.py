@@ -0,0 +1,362 @@
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.compact_cfg import CompactCFG
+from src.analyzers.control_flow_graph_analyzer import (
+    build_function_cfgs,
+    collect_function_definitions,
+    function_ids,
+    relabel_cfg,
+)
+from src.analyzers.data_flow_analyzer import FunctionDataFlow, solve_functions
+from src.analyzers.dispatch_index import DispatchIndex
+from src.analyzers.fingerprint import fingerprint
+from src.parsers.ast_parser import SolidityASTParser
+from src.parsers.compile_cache import CompileCache
+from src.parsers.solc import resolve_imports
+from src.utils.metrics import METRICS
+from src.utils.parallel import map_in_chunks
+
+FunctionKey = Tuple[str, str]
+
+
+class UpdateReport(NamedTuple):
+    """What one IncrementalAnalyzer.update recomputed."""
+
+    changed_contracts: List[str]
+    changed_functions: List[FunctionKey]
+    removed_functions: List[FunctionKey]
+    relinked_functions: List[str]
+    seconds: float
+
+    def __str__(self):
+        return (
+            f"{len(self.changed_contracts)} contracts and "
+            f"{len(self.changed_functions)} functions changed, "
+            f"{len(self.removed_functions)} removed, "
+            f"{len(self.relinked_functions)} call graph entries relinked "
+            f"in {self.seconds:.3f}s"
+        )
+
+
+def analyze_functions(function_nodes: List[dict]) -> List[tuple]:
+    """Worker entry point: build the CFG and data flow facts of each function.
+
+    Returns (graph, data_flow, error) per function; errors are collected as
+    in build_function_cfgs, and failures of the solver are recorded the same way.
+    """
+    results = []
+    for graph, error in build_function_cfgs(function_nodes):
+        if error is not None:
+            results.append((None, None, error))
+            continue
+        try:
+            (data_flow,) = solve_functions([graph])
+        except Exception as e:
+            results.append((None, None, repr(e)))
+            continue
+        results.append((graph, data_flow, None))
+    return results
+
+
+class IncrementalAnalyzer:
+    """Keeps the analyses of one file up to date across edits.
+
+    Every update re-parses the file, then fingerprints each contract
+    subtree, ignoring ids and source offsets. Only the functions of contracts
+    whose fingerprint changed are fingerprinted in turn, and only functions
+    whose own fingerprint changed get a new CFG and data flow facts; the
+    CFGs of the others are relabeled with the new AST ids. CHA
+    call graph entries are re-resolved for those functions and for callers
+    of any function whose name or signature was added or removed; a change of
+    base contracts relinks everything. The RTA call graph is derived from the
+    CHA one on demand.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        cache: Optional[CompileCache] = None,
+        workers: Optional[int] = 1,
+    ):
+        self.file_path = file_path
+        self.cache = cache
+        self.workers = workers
+        self.parser: Optional[SolidityASTParser] = None
+        self.contract_fingerprints: Dict[str, str] = {}
+        self.function_fingerprints: Dict[FunctionKey, str] = {}
+        self.function_cfgs: Dict[FunctionKey, CompactCFG] = {}
+        self.data_flow: Dict[FunctionKey, FunctionDataFlow] = {}
+        self.errors: Dict[FunctionKey, str] = {}
+        self.class_hierarchy: dict = {}
+        self.call_sites: Dict[str, Optional[list]] = {}
+        self.cha_call_graph: Dict[str, Set[str]] = {}
+        self.instantiated_contracts: Set[str] = set()
+
+    def update(self) -> UpdateReport:
+        """Re-parse the file and recompute what its edits invalidated."""
+        with METRICS.span("incremental_update", file=self.file_path):
+            return self._update()
+
+    def _update(self) -> UpdateReport:
+        start = time.perf_counter()
+        previous_parser = self.parser
+        parser = SolidityASTParser(self.file_path, cache=self.cache)
+        parser.parse()
+        self.parser = parser
+
+        contracts = {
+            node["name"]: node for node in parser.index.of_type("ContractDefinition")
+        }
+        contract_fingerprints = {
+            name: fingerprint(node) for name, node in contracts.items()
+        }
+        changed_contracts = [
+            name
+            for name, contract_fingerprint in contract_fingerprints.items()
+            if self.contract_fingerprints.get(name) != contract_fingerprint
+        ]
+        self.contract_fingerprints = contract_fingerprints
+
+        changed_functions: Dict[FunctionKey, dict] = {}
+        removed_functions = [
+            key for key in self.function_fingerprints if key[0] not in contracts
+        ]
+        for contract_name in changed_contracts:
+            function_definitions = collect_function_definitions(
+                contracts[contract_name]
+            )
+            for key, function_node in function_definitions.items():
+                function_fingerprint = fingerprint(function_node)
+                if self.function_fingerprints.get(key) != function_fingerprint:
+                    self.function_fingerprints[key] = function_fingerprint
+                    changed_functions[key] = function_node
+            removed_functions.extend(
+                key
+                for key in self.function_fingerprints
+                if key[0] == contract_name and key not in function_definitions
+            )
+
+        for key in removed_functions:
+            self.function_fingerprints.pop(key, None)
+            self.function_cfgs.pop(key, None)
+            self.data_flow.pop(key, None)
+            self.errors.pop(key, None)
+        if previous_parser is not None:
+            self.relabel_functions(previous_parser, parser, changed_functions)
+        self.rebuild_functions(changed_functions)
+
+        # CFG keys and call graph keys name functions the same way
+        dirty_call_keys = {
+            f"{contract_name}.{function_name}"
+            for contract_name, function_name in changed_functions
+        }
+        dirty_call_keys.update(
+            f"{contract_name}.{function_name}"
+            for contract_name, function_name in removed_functions
+        )
+        relinked_functions = self.relink(parser, dirty_call_keys)
+
+        return UpdateReport(
+            changed_contracts,
+            list(changed_functions),
+            removed_functions,
+            relinked_functions,
+            time.perf_counter() - start,
+        )
+
+    def relabel_functions(
+        self,
+        previous_parser: SolidityASTParser,
+        parser: SolidityASTParser,
+        changed_functions: Dict[FunctionKey, dict],
+    ) -> None:
+        """Move the labels of the retained CFGs to the ids of the new AST.
+
+        Edits elsewhere in the file renumber the AST, so a function whose
+        fingerprint did not change may still have new node ids.
+        """
+        for key, graph in self.function_cfgs.items():
+            if key in changed_functions:
+                continue
+            graph = relabel_cfg(
+                graph,
+                function_ids(previous_parser.index.get_function(*key)),
+                parser.index.get_function(*key),
+            )
+            self.function_cfgs[key] = graph
+            self.data_flow[key].graph = graph
+
+    def rebuild_functions(self, function_nodes: Dict[FunctionKey, dict]) -> None:
+        """Build the CFG and data flow facts of the given functions."""
+        keys = list(function_nodes)
+        results = map_in_chunks(
+            analyze_functions, [function_nodes[key] for key in keys], self.workers
+        )
+        for key, (graph, data_flow, error) in zip(keys, results):
+            if error is not None:
+                self.function_cfgs.pop(key, None)
+                self.data_flow.pop(key, None)
+                self.errors[key] = error
+                continue
+            data_flow.graph = graph
+            self.function_cfgs[key] = graph
+            self.data_flow[key] = data_flow
+            self.errors.pop(key, None)
+
+    def relink(self, parser: SolidityASTParser, dirty_call_keys: Set[str]) -> List[str]:
+        """Re-resolve the CHA call graph entries invalidated by this update.
+
+        dirty_call_keys are the "contract.function" entries whose bodies
+        changed; their call sites are collected again. Callers of a name whose
+        declarations changed keep their call sites and are only re-resolved.
+        """
+        class_hierarchy_analyzer = ClassHierarchyAnalyzer(parser)
+        class_hierarchy = class_hierarchy_analyzer.build_class_hierarchy(parser.ast_v2)
+        call_graph_analyzer = CallGraphAnalyzer(parser, class_hierarchy_analyzer)
+        self.instantiated_contracts = (
+            call_graph_analyzer.identify_instantiated_contracts()
+        )
+
+        call_keys = {
+            f"{contract_name}.{function_name}"
+            for contract_name, contract_info in class_hierarchy.items()
+            for function_name in contract_info["keys"]
+        }
+        for call_key in set(self.cha_call_graph) - call_keys:
+            del self.cha_call_graph[call_key]
+            self.call_sites.pop(call_key, None)
+
+        if self.bases(class_hierarchy) != self.bases(self.class_hierarchy):
+            relink_keys = set(call_keys)
+        else:
+            changed_names = {
+                function_name
+                for _, function_name, _ in self.declarations(class_hierarchy)
+                ^ self.declarations(self.class_hierarchy)
+            }
+            relink_keys = {
+                call_key
+                for call_key, call_sites in self.call_sites.items()
+                if call_sites
+                and any(call_site.name in changed_names for call_site in call_sites)
+            }
+            relink_keys |= dirty_call_keys & call_keys
+            relink_keys |= call_keys - set(self.cha_call_graph)
+        self.class_hierarchy = class_hierarchy
+
+        dispatch_index = DispatchIndex(class_hierarchy)
+        for call_key in relink_keys:
+            if call_key in dirty_call_keys or call_key not in self.call_sites:
+                contract_name, function_name = call_key.split(".", 1)
+                function_node = parser.index.get_function(contract_name, function_name)
+                self.call_sites[call_key] = (
+                    call_graph_analyzer.find_function_calls(function_node)
+                    if function_node is not None
+                    else None
+                )
+            targets = set()
+            for call_site in self.call_sites[call_key] or ():
+                targets.update(
+                    call_graph_analyzer.resolve_function_calls(
+                        call_site.name, call_site.signature, dispatch_index
+                    )
+                )
+            self.cha_call_graph[call_key] = targets
+        return sorted(relink_keys)
+
+    @staticmethod
+    def bases(class_hierarchy: dict) -> Dict[str, List[str]]:
+        return {
+            contract_name: contract_info["baseContracts"]
+            for contract_name, contract_info in class_hierarchy.items()
+        }
+
+    @staticmethod
+    def declarations(class_hierarchy: dict) -> Set[Tuple[str, str, str]]:
+        """Return every (contract, function, parameter signature) in the hierarchy."""
+        return {
+            (contract_name, function_name, signature)
+            for contract_name, contract_info in class_hierarchy.items()
+            for function_name, signature in zip(
+                contract_info["functions"], contract_info["signatures"]
+            )
+        }
+
+    def rta_call_graph(self) -> Dict[str, Set[str]]:
+        """The CHA call graph restricted to targets in instantiated contracts."""
+        return {
+            call_key: {
+                target
+                for target in targets
+                if target.split(".")[0] in self.instantiated_contracts
+            }
+            for call_key, targets in self.cha_call_graph.items()
+        }
+
+    def watched_files(self) -> List[str]:
+        return [self.file_path] + resolve_imports(self.file_path)
+
+    def mtimes(self) -> Dict[str, Optional[float]]:
+        mtimes = {}
+        for path in self.watched_files():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def watch(self, interval: float = 0.5, on_update=print) -> None:
+        """Poll the file and its imports, updating whenever one of them changes.
+
+        on_update is called with each UpdateReport, or with the exception if
+        an update fails; the previous results are kept in that case. Runs
+        until interrupted.
+        """
+        last_mtimes = None
+        while True:
+            mtimes = self.mtimes()
+            if mtimes != last_mtimes:
+                last_mtimes = mtimes
+                try:
+                    on_update(self.update())
+                except Exception as e:
+                    on_update(e)
+            time.sleep(interval)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Analyze a Solidity file, recomputing only what edits change."
+    )
+    arg_parser.add_argument("file_path")
+    arg_parser.add_argument(
+        "--watch", action="store_true", help="re-analyze whenever the file changes"
+    )
+    arg_parser.add_argument("--interval", type=float, default=0.5)
+    arg_parser.add_argument("--workers", type=int, default=1)
+    arg_parser.add_argument(
+        "--cache-dir", default=None, help="compile cache directory (default cache)"
+    )
+    args = arg_parser.parse_args(argv)
+
+    cache = CompileCache(args.cache_dir) if args.cache_dir else CompileCache()
+    analyzer = IncrementalAnalyzer(args.file_path, cache=cache, workers=args.workers)
+    if not args.watch:
+        print(analyzer.update())
+        for key, error in analyzer.errors.items():
+            print(f"FAILED {key[0]}.{key[1]}: {error}", file=sys.stderr)
+        return
+    try:
+        analyzer.watch(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+import argparse
+import errno
+import inspect
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from src.parsers.compile_cache import CompileCache
+from src.pipeline.incremental import IncrementalAnalyzer
+from src.utils.events import EVENTS
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+ANALYSIS_ERROR = -32000
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class Project:
+    """One loaded file: its IncrementalAnalyzer and indexes derived from it.
+
+    The reverse call graphs are built on the first callers query after each
+    update and reused until the next one.
+    """
+
+    def __init__(self, analyzer: IncrementalAnalyzer):
+        self.analyzer = analyzer
+        self.mtimes = None
+        self._callers: Dict[str, Dict[str, Set[str]]] = {}
+        self._rta_call_graph: Optional[Dict[str, Set[str]]] = None
+
+    def refresh(self) -> Optional[dict]:
+        """Update the analyses if the file or one of its imports changed since."""
+        mtimes = self.analyzer.mtimes()
+        if mtimes == self.mtimes:
+            return None
+        report = self.analyzer.update()
+        self.mtimes = mtimes
+        self._callers = {}
+        self._rta_call_graph = None
+        return report._asdict()
+
+    def call_graph(self, algorithm: str) -> Dict[str, Set[str]]:
+        if algorithm == "CHA":
+            return self.analyzer.cha_call_graph
+        if algorithm == "RTA":
+            if self._rta_call_graph is None:
+                self._rta_call_graph = self.analyzer.rta_call_graph()
+            return self._rta_call_graph
+        raise RPCError(INVALID_PARAMS, f"Invalid algorithm {algorithm}")
+
+    def callers(self, algorithm: str) -> Dict[str, Set[str]]:
+        if algorithm not in self._callers:
+            callers = defaultdict(set)
+            for caller, callees in self.call_graph(algorithm).items():
+                for callee in callees:
+                    callers[callee].add(caller)
+            self._callers[algorithm] = callers
+        return self._callers[algorithm]
+
+
+def function_key(function: str):
+    """Split "Contract.function" into the (contract, function) key of the CFGs."""
+    contract_name, separator, function_name = function.partition(".")
+    if not separator:
+        raise RPCError(INVALID_PARAMS, f"Expected Contract.function, got {function}")
+    return contract_name, function_name
+
+
+class AnalysisServer:
+    """Keeps projects loaded between queries and answers JSON-RPC requests.
+
+    Each file is analyzed once by an IncrementalAnalyzer, which keeps its
+    AST, index, class hierarchy, call graphs, CFGs and data flow facts in
+    memory. Before answering a query about a file, the modification times of
+    the file and its imports are checked; if one changed, the file is
+    re-parsed and only what the edit invalidated is recomputed. Requests are
+    handled one at a time.
+    """
+
+    def __init__(self, cache: Optional[CompileCache] = None, workers: int = 1):
+        self.cache = cache
+        self.workers = workers
+        self.projects: Dict[str, Project] = {}
+        self.lock = threading.Lock()
+        self.methods = {
+            "load": self.load,
+            "unload": self.unload,
+            "files": self.files,
+            "functions": self.functions,
+            "callees": self.callees,
+            "callers": self.callers,
+            "cfg": self.cfg,
+            "reaching_definitions": self.reaching_definitions,
+            "live_variables": self.live_variables,
+        }
+
+    def project(self, file: str) -> Project:
+        """Return the up-to-date project of file, loading it on first use."""
+        path = os.path.abspath(file)
+        project = self.projects.get(path)
+        if project is None:
+            if not os.path.exists(path):
+                raise RPCError(INVALID_PARAMS, f"No such file {file}")
+            analyzer = IncrementalAnalyzer(path, cache=self.cache, workers=self.workers)
+            project = Project(analyzer)
+        report = project.refresh()
+        self.projects[path] = project
+        if report is not None:
+            EVENTS.info("reloaded", file=path, seconds=round(report["seconds"], 3))
+        return project
+
+    def load(self, file: str) -> dict:
+        project = self.project(file)
+        analyzer = project.analyzer
+        return {
+            "file": analyzer.file_path,
+            "contracts": len(analyzer.class_hierarchy),
+            "functions": len(analyzer.cha_call_graph),
+            "cfgs": len(analyzer.function_cfgs),
+            "errors": {
+                f"{contract}.{function}": error
+                for (contract, function), error in analyzer.errors.items()
+            },
+        }
+
+    def unload(self, file: str) -> bool:
+        return self.projects.pop(os.path.abspath(file), None) is not None
+
+    def files(self) -> List[str]:
+        return sorted(self.projects)
+
+    def functions(self, file: str) -> List[str]:
+        return sorted(self.project(file).analyzer.cha_call_graph)
+
+    def callees(self, file: str, function: str, algorithm: str = "CHA") -> List[str]:
+        call_graph = self.project(file).call_graph(algorithm)
+        if function not in call_graph:
+            raise RPCError(INVALID_PARAMS, f"Unknown function {function}")
+        return sorted(call_graph[function])
+
+    def callers(self, file: str, function: str, algorithm: str = "CHA") -> List[str]:
+        project = self.project(file)
+        if function not in project.call_graph(algorithm):
+            raise RPCError(INVALID_PARAMS, f"Unknown function {function}")
+        return sorted(project.callers(algorithm).get(function, ()))
+
+    def function_cfg(self, file: str, function: str):
+        analyzer = self.project(file).analyzer
+        key = function_key(function)
+        if key in analyzer.errors:
+            raise RPCError(ANALYSIS_ERROR, analyzer.errors[key])
+        if key not in analyzer.function_cfgs:
+            raise RPCError(INVALID_PARAMS, f"Unknown function {function}")
+        return analyzer, key
+
+    def cfg(self, file: str, function: str) -> dict:
+        analyzer, key = self.function_cfg(file, function)
+        graph = analyzer.function_cfgs[key]
+        return {
+            "nodes": [
+                {
+                    "id": graph.labels[node],
+                    "type": graph.node_types[node],
+                    "statements": [
+                        str(statement) for statement in graph.statements[node]
+                    ],
+                }
+                for node in graph.node_ids()
+            ],
+            "edges": [
+                {
+                    "source": graph.labels[source],
+                    "target": graph.labels[target],
+                    "annotation": annotation,
+                }
+                for source, target, annotation in graph.edges()
+            ],
+        }
+
+    def facts(self, file, function, node, before, after):
+        """Decode the sets of one data flow analysis, at node or at every node."""
+        analyzer, key = self.function_cfg(file, function)
+        data_flow = analyzer.data_flow[key]
+        graph = analyzer.function_cfgs[key]
+        if node is None:
+            nodes = graph.node_ids()
+        else:
+            index = graph.index_of(node)
+            if index is None:
+                raise RPCError(INVALID_PARAMS, f"Unknown node {node} in {function}")
+            nodes = [index]
+        variables = data_flow.variables
+        return {
+            graph.labels[index]: {
+                "in": sorted(variables.decode(getattr(data_flow, before)[index])),
+                "out": sorted(variables.decode(getattr(data_flow, after)[index])),
+            }
+            for index in nodes
+        }
+
+    def reaching_definitions(
+        self, file: str, function: str, node: Optional[str] = None
+    ) -> dict:
+        return self.facts(file, function, node, "in_bits", "out_bits")
+
+    def live_variables(
+        self, file: str, function: str, node: Optional[str] = None
+    ) -> dict:
+        return self.facts(file, function, node, "live_in_bits", "live_out_bits")
+
+    def handle(self, request) -> Optional[dict]:
+        """Answer one decoded JSON-RPC request; notifications get no response."""
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(
+                request.get("method"), str
+            ):
+                raise RPCError(INVALID_REQUEST, "Invalid request")
+            method = self.methods.get(request["method"])
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"No method {request['method']}")
+            params = request.get("params", {})
+            try:
+                if isinstance(params, list):
+                    arguments = inspect.signature(method).bind(*params)
+                elif isinstance(params, dict):
+                    arguments = inspect.signature(method).bind(**params)
+                else:
+                    raise TypeError("params must be an array or an object")
+            except TypeError as e:
+                raise RPCError(INVALID_PARAMS, str(e))
+            start = time.perf_counter()
+            with self.lock:
+                result = method(*arguments.args, **arguments.kwargs)
+            EVENTS.debug(
+                "query",
+                method=request["method"],
+                ms=round((time.perf_counter() - start) * 1000, 3),
+            )
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except RPCError as e:
+            response = {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": e.code, "message": e.message},
+            }
+        except Exception as e:
+            response = {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": ANALYSIS_ERROR, "message": repr(e)},
+            }
+        if isinstance(request, dict) and "id" not in request:
+            return None
+        return response
+
+    def handle_line(self, line: str) -> Optional[str]:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": PARSE_ERROR, "message": str(e)},
+            }
+        else:
+            response = self.handle(request)
+        if response is None:
+            return None
+        return json.dumps(response, default=str)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON-RPC request per line and writes one response per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.decode().strip()
+            if not line:
+                continue
+            response = self.server.analysis_server.handle_line(line)
+            if response is not None:
+                self.wfile.write(response.encode() + b"\n")
+                self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """Remove the Unix socket at socket_path if no server is listening on it."""
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(
+            errno.EEXIST, "Not a socket, refusing to replace it", socket_path
+        )
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "A server is listening on", socket_path)
+
+
+def serve(
+    analysis_server: AnalysisServer,
+    socket_path: Optional[str] = None,
+    port: Optional[int] = None,
+):
+    """Create a socket server on a Unix socket, or on localhost:port.
+
+    A socket left at socket_path by a server that is gone is replaced. Raises
+    OSError if anything else is there: a file that is not a socket, or the
+    socket of a server still accepting connections.
+    """
+    if socket_path is not None:
+        remove_stale_socket(socket_path)
+        server = _UnixServer(socket_path, _RequestHandler)
+    else:
+        server = _TCPServer(("127.0.0.1", port), _RequestHandler)
+    server.analysis_server = analysis_server
+    return server
+
+
+class Client:
+    """Minimal client sending one JSON-RPC request per line."""
+
+    def __init__(self, socket_path: Optional[str] = None, port: Optional[int] = None):
+        if socket_path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(socket_path)
+        else:
+            self.socket = socket.create_connection(("127.0.0.1", port))
+        self.stream = self.socket.makefile("rwb")
+        self.next_id = 0
+
+    def call(self, method: str, **params):
+        """Send a request and return its result, raising RPCError on failure."""
+        self.next_id += 1
+        request = {"jsonrpc": "2.0", "id": self.next_id, "method": method}
+        request["params"] = params
+        self.stream.write(json.dumps(request).encode() + b"\n")
+        self.stream.flush()
+        response = json.loads(self.stream.readline())
+        if "error" in response:
+            raise RPCError(response["error"]["code"], response["error"]["message"])
+        return response["result"]
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Keep Solidity files analyzed in memory and answer JSON-RPC queries."
+    )
+    address = arg_parser.add_mutually_exclusive_group(required=True)
+    address.add_argument("--socket", help="listen on this Unix socket")
+    address.add_argument("--port", type=int, help="listen on localhost:PORT")
+    arg_parser.add_argument("--preload", nargs="*", default=[], help="files to load")
+    arg_parser.add_argument("--workers", type=int, default=1)
+    arg_parser.add_argument(
+        "--cache-dir", default=None, help="compile cache directory (default cache)"
+    )
+    args = arg_parser.parse_args(argv)
+
+    cache = CompileCache(args.cache_dir) if args.cache_dir else CompileCache()
+    analysis_server = AnalysisServer(cache=cache, workers=args.workers)
+    for file in args.preload:
+        analysis_server.load(file)
+    server = serve(analysis_server, socket_path=args.socket, port=args.port)
+    EVENTS.info("listening", address=args.socket or f"127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
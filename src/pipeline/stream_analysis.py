@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.analyzers.call_graph_analyzer import (
+    CallGraphAnalyzer,
+    collect_function_calls,
+    new_expression_contract,
+)
+from src.analyzers.class_hierarchy_analyzer import (
+    ClassHierarchyAnalyzer,
+    contract_entry,
+)
+from src.analyzers.control_flow_graph_analyzer import (
+    ControlFlowGraphAnalyzer,
+    collect_function_definitions,
+)
+from src.analyzers.dispatch_index import CallSite, expression_signature
+from src.parsers.ast_index import declaration_signature
+from src.parsers.ast_parser import SolidityASTParser
+from src.parsers.nodes import ContractDefinition
+from src.parsers.visitor import ASTVisitor
+from src.utils.metrics import METRICS
+
+# A call whose signature is known once the whole file is read: callee name,
+# referenced declaration id, signature of its function type, src
+PendingCall = Tuple[str, Optional[int], Optional[str], Optional[str]]
+
+
+class StreamingAnalysis:
+    """Analyze a compact JSON AST file while it is streamed, one contract at a time.
+
+    The parser is loaded with keep_raw=False, so no raw AST or index of the
+    whole file is ever built. Each top-level node is handed to add() as soon
+    as it is read: contracts get their class hierarchy entry, their call
+    sites and their function CFGs, then their raw dicts are dropped. Only
+    what later contracts need is kept: the signature of every function
+    declaration, so calls that refer to declarations further down the file
+    can still be resolved to one overload, and the instantiated contracts.
+
+    After run(), the class hierarchy, call sites and instantiated contracts
+    are stored in the parser's analysis context, so call_graph_analyzer
+    builds the CHA and RTA call graphs as after a full parse, and
+    cfg_analyzer holds every function CFG for a DataFlowAnalyzer.
+    """
+
+    def __init__(self, parser: SolidityASTParser, workers: Optional[int] = 1):
+        self.parser = parser
+        self.class_hierarchy_analyzer = ClassHierarchyAnalyzer(parser)
+        self.call_graph_analyzer = CallGraphAnalyzer(
+            parser, self.class_hierarchy_analyzer
+        )
+        self.cfg_analyzer = ControlFlowGraphAnalyzer(parser, workers=workers)
+        self.class_hierarchy: dict = {}
+        self.instantiated_contracts: Set[str] = set()
+        self.signatures: Dict[int, str] = {}
+        self.pending_calls: Dict[Tuple[str, str], List[PendingCall]] = {}
+
+    def run(self, ast_file: str) -> None:
+        """Stream ast_file through add(), then store the results with finish()."""
+        self.cfg_analyzer.reset()
+        with METRICS.span("stream_analysis", file=ast_file):
+            for raw_node, typed_node in self.parser.stream_ast_file(
+                ast_file, keep_raw=False
+            ):
+                self.add(raw_node, typed_node)
+        self.finish()
+
+    def add(self, raw_node: dict, typed_node) -> None:
+        """Analyze one top-level node of the source unit."""
+        visitor = ASTVisitor()
+        visitor.register("FunctionDefinition", self.add_declaration)
+        visitor.register("NewExpression", self.add_new_expression)
+        visitor.visit(raw_node)
+        if type(typed_node) != ContractDefinition:
+            return
+
+        self.class_hierarchy[typed_node.name] = contract_entry(typed_node)
+        for key, function_node in collect_function_definitions(raw_node).items():
+            self.pending_calls.setdefault(
+                key,
+                [
+                    (
+                        function_name,
+                        expression.get("referencedDeclaration"),
+                        expression_signature(expression),
+                        src,
+                    )
+                    for function_name, expression, src in collect_function_calls(
+                        function_node
+                    )
+                ],
+            )
+        self.cfg_analyzer.add_contracts([raw_node])
+
+    def add_declaration(self, node: dict) -> None:
+        if "id" in node:
+            self.signatures[node["id"]] = declaration_signature(node)
+
+    def add_new_expression(self, node: dict) -> None:
+        contract_name = new_expression_contract(node)
+        if contract_name:
+            self.instantiated_contracts.add(contract_name)
+
+    def finish(self) -> None:
+        """Resolve the pending call signatures and store the results in the context."""
+        call_sites = {
+            key: [
+                CallSite(function_name, self.signatures.get(reference, signature), src)
+                for function_name, reference, signature, src in calls
+            ]
+            for key, calls in self.pending_calls.items()
+        }
+        context = self.call_graph_analyzer.context
+        context.put("class_hierarchy", self.class_hierarchy)
+        context.put("call_sites", call_sites)
+        context.put("instantiated_contracts", self.instantiated_contracts)
@@ -0,0 +1,81 @@
+import argparse
+
+from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
+from src.exporters.graph_exporter import EXPORTER
+from src.exporters.views import DIRECTIONS
+from src.parsers.ast_parser import SolidityASTParser
+from src.parsers.compile_cache import CompileCache
+
+
+def build_call_graph(call_graph_analyzer, algorithm):
+    context = call_graph_analyzer.context
+    class_hierarchy = context.get("class_hierarchy")
+    if algorithm == "RTA":
+        return call_graph_analyzer.build_rta_call_graph(
+            class_hierarchy, context.get("instantiated_contracts")
+        )
+    return call_graph_analyzer.build_cha_call_graph(class_hierarchy)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Draw part of the call graph or of the CFGs of a Solidity file."
+    )
+    arg_parser.add_argument("file_path")
+    view = arg_parser.add_mutually_exclusive_group(required=True)
+    view.add_argument(
+        "--neighborhood",
+        metavar="CONTRACT.FUNCTION",
+        help="draw the call graph around this function",
+    )
+    view.add_argument(
+        "--contracts",
+        action="store_true",
+        help="draw the call graph with one node per contract",
+    )
+    view.add_argument(
+        "--cfg", metavar="CONTRACT.FUNCTION", help="draw the CFG of this function"
+    )
+    arg_parser.add_argument("--hops", type=int, default=1)
+    arg_parser.add_argument("--direction", choices=DIRECTIONS, default="both")
+    arg_parser.add_argument("--algorithm", choices=["CHA", "RTA"], default="CHA")
+    arg_parser.add_argument(
+        "--render", default=None, help="also render to this image format, e.g. png"
+    )
+    arg_parser.add_argument(
+        "--cache-dir", default=None, help="compile cache directory (default cache)"
+    )
+    args = arg_parser.parse_args(argv)
+
+    if args.render:
+        EXPORTER.render_format = args.render
+    cache = CompileCache(args.cache_dir) if args.cache_dir else CompileCache()
+    parser = SolidityASTParser(args.file_path, cache=cache)
+    parser.parse()
+
+    if args.cfg:
+        contract_name, function_name = args.cfg.split(".", 1)
+        ControlFlowGraphAnalyzer(parser).visualize_function(
+            contract_name, function_name
+        )
+    else:
+        class_hierarchy_analyzer = ClassHierarchyAnalyzer(parser)
+        call_graph_analyzer = CallGraphAnalyzer(parser, class_hierarchy_analyzer)
+        call_graph = build_call_graph(call_graph_analyzer, args.algorithm)
+        if args.contracts:
+            call_graph_analyzer.visualize_contracts(call_graph, args.algorithm)
+        else:
+            call_graph_analyzer.visualize_neighborhood(
+                call_graph,
+                args.algorithm,
+                args.neighborhood,
+                hops=args.hops,
+                direction=args.direction,
+            )
+    EXPORTER.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+TRACE = 5
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+QUIET = 100
+
+LEVEL_NAMES = {
+    TRACE: "trace",
+    DEBUG: "debug",
+    INFO: "info",
+    WARNING: "warning",
+    ERROR: "error",
+    QUIET: "quiet",
+}
+# Trace events only ever reach trace sinks, so trace is not a minimum level
+LEVELS = {name: level for level, name in LEVEL_NAMES.items() if level != TRACE}
+
+# Minimum level of the events written to stderr: debug, info, warning, error
+# or quiet
+LOG_LEVEL_ENV = "SOLIDITY_LOG_LEVEL"
+
+
+class Event(NamedTuple):
+    level: int
+    name: str
+    fields: Dict[str, object]
+    time: float
+
+    @property
+    def level_name(self) -> str:
+        return LEVEL_NAMES.get(self.level, str(self.level))
+
+
+Sink = Callable[[Event], None]
+
+
+class StreamSink:
+    """Writes each event as one readable line: level, name and key=value fields."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def __call__(self, event: Event) -> None:
+        fields = " ".join(f"{key}={value}" for key, value in event.fields.items())
+        stream = self.stream or sys.stderr
+        print(f"[{event.level_name}] {event.name} {fields}".rstrip(), file=stream)
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+class JSONLinesSink:
+    """Writes each event as one JSON object per line."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __call__(self, event: Event) -> None:
+        record = {"time": event.time, "level": event.level_name, "event": event.name}
+        record.update(event.fields)
+        self.stream.write(json.dumps(record, default=_json_default) + "\n")
+
+
+class EventChannel:
+    """Leveled, structured diagnostics shared by the parser and the analyzers.
+
+    Events below self.level are dropped before anything is built from them,
+    and callers in hot paths can check enabled(level) first to skip
+    computing their fields. Trace events, such as the per-node fixpoint
+    dumps, bypass the level and reach only the sinks added with
+    add_trace_sink, so they cost nothing unless one is registered.
+    """
+
+    def __init__(self, level: int = INFO, sinks: List[Sink] = ()):
+        self.level = level
+        self.sinks: List[Sink] = list(sinks)
+        self.trace_sinks: List[Sink] = []
+
+    @property
+    def tracing(self) -> bool:
+        return bool(self.trace_sinks)
+
+    def set_level(self, level) -> None:
+        """Set the minimum level, given as a number or as a name such as "debug"."""
+        self.level = LEVELS[level] if isinstance(level, str) else level
+
+    def quiet(self) -> None:
+        self.level = QUIET
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level and bool(self.sinks)
+
+    def add_sink(self, sink: Sink) -> None:
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink: Sink) -> None:
+        self.sinks.remove(sink)
+
+    def add_trace_sink(self, sink: Sink) -> None:
+        self.trace_sinks.append(sink)
+
+    def remove_trace_sink(self, sink: Sink) -> None:
+        self.trace_sinks.remove(sink)
+
+    def emit(self, level: int, name: str, **fields) -> None:
+        if level < self.level:
+            return
+        event = Event(level, name, fields, time.time())
+        for sink in self.sinks:
+            sink(event)
+
+    def trace(self, name: str, **fields) -> None:
+        if not self.trace_sinks:
+            return
+        event = Event(TRACE, name, fields, time.time())
+        for sink in self.trace_sinks:
+            sink(event)
+
+    def debug(self, name: str, **fields) -> None:
+        self.emit(DEBUG, name, **fields)
+
+    def info(self, name: str, **fields) -> None:
+        self.emit(INFO, name, **fields)
+
+    def warning(self, name: str, **fields) -> None:
+        self.emit(WARNING, name, **fields)
+
+    def error(self, name: str, **fields) -> None:
+        self.emit(ERROR, name, **fields)
+
+
+EVENTS = EventChannel(
+    level=LEVELS.get(os.environ.get(LOG_LEVEL_ENV, "info").lower(), INFO),
+    sinks=[StreamSink()],
+)
@@ -0,0 +1,196 @@
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from src.utils.profiling import PROFILE_ENV, profiler_from_environment
+
+# Set to a path to collect metrics and write them there as JSON at the end of a run
+METRICS_ENV = "SOLIDITY_METRICS"
+# Set to a path to collect metrics and write them there as Chrome trace events
+TRACE_ENV = "SOLIDITY_TRACE"
+
+
+class _NullSpan:
+    """Shared do-nothing span returned while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed phase, used as a context manager. Spans nest."""
+
+    __slots__ = ("metrics", "name", "args", "start", "seconds", "depth")
+
+    def __init__(self, metrics: "Metrics", name: str, args: dict):
+        self.metrics = metrics
+        self.name = name
+        self.args = args
+        self.start = 0.0
+        self.seconds = 0.0
+        self.depth = 0
+
+    def __enter__(self):
+        self.depth = len(self.metrics.stack)
+        self.metrics.stack.append(self)
+        for listener in self.metrics.listeners:
+            listener.span_entered(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.start
+        for listener in reversed(self.metrics.listeners):
+            listener.span_exited(self)
+        self.metrics.stack.pop()
+        self.metrics.spans.append(self)
+        return False
+
+
+class Metrics:
+    """Timed spans and counters shared by the parser and the analyzers.
+
+    While disabled, span() returns a shared no-op context manager and
+    count() returns immediately, so instrumented code pays one attribute
+    check per call. Spans are kept in the order they finish.
+
+    Listeners, such as the PhaseProfiler, get span_entered(span) and
+    span_exited(span) calls around every span; their own cost is left out of
+    the span's time.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: List[Span] = []
+        self.stack: List[Span] = []
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.listeners: list = []
+        self.origin = time.perf_counter()
+
+    def add_listener(self, listener) -> None:
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        self.listeners.remove(listener)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.spans = []
+        self.stack = []
+        self.counters = defaultdict(int)
+        self.origin = time.perf_counter()
+
+    def span(self, name: str, **args):
+        """Time the enclosed block as a phase called name."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += amount
+
+    def totals(self) -> Dict[str, float]:
+        """Total seconds spent in each phase, summed over its spans."""
+        totals = defaultdict(float)
+        for span in self.spans:
+            totals[span.name] += span.seconds
+        return dict(totals)
+
+    def to_dict(self) -> dict:
+        return {
+            "spans": [
+                {
+                    "name": span.name,
+                    "start": span.start - self.origin,
+                    "seconds": span.seconds,
+                    "depth": span.depth,
+                    "args": span.args,
+                }
+                for span in self.spans
+            ],
+            "totals": self.totals(),
+            "counters": dict(self.counters),
+        }
+
+    def chrome_trace_events(self) -> List[dict]:
+        """Spans as complete ("X") events and counters as one counter ("C") event."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": span.seconds * 1e6,
+                "pid": pid,
+                "tid": 0,
+                "args": span.args,
+            }
+            for span in self.spans
+        ]
+        if self.counters:
+            events.append(
+                {
+                    "name": "counters",
+                    "ph": "C",
+                    "ts": (time.perf_counter() - self.origin) * 1e6,
+                    "pid": pid,
+                    "tid": 0,
+                    "args": dict(self.counters),
+                }
+            )
+        return events
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2, default=str)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write a trace viewable in chrome://tracing or Perfetto."""
+        with open(path, "w") as trace_file:
+            json.dump(
+                {"traceEvents": self.chrome_trace_events()}, trace_file, default=str
+            )
+
+
+METRICS = Metrics(
+    enabled=bool(
+        os.environ.get(METRICS_ENV)
+        or os.environ.get(TRACE_ENV)
+        or os.environ.get(PROFILE_ENV)
+    )
+)
+_profiler = profiler_from_environment()
+if _profiler is not None:
+    METRICS.add_listener(_profiler)
+
+# Module-level shortcuts for the shared instance
+span = METRICS.span
+count = METRICS.count
+
+
+def export_from_environment(
+    metrics_path: Optional[str] = None, trace_path: Optional[str] = None
+) -> None:
+    """Write the shared metrics to the paths named by the environment, if any."""
+    metrics_path = metrics_path or os.environ.get(METRICS_ENV)
+    trace_path = trace_path or os.environ.get(TRACE_ENV)
+    if metrics_path:
+        METRICS.write_json(metrics_path)
+    if trace_path:
+        METRICS.write_chrome_trace(trace_path)
@@ -0,0 +1,60 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+def shared_executor(workers: int) -> ProcessPoolExecutor:
+    """Return the process pool shared by every map_in_chunks call.
+
+    The pool is started on first use and reused afterwards, so repeated
+    parse()/analyze() calls do not pay for starting processes again; it is
+    replaced only when a different number of workers is asked for.
+    """
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown_executor()
+        _executor = ProcessPoolExecutor(workers)
+        _executor_workers = workers
+    return _executor
+
+
+@atexit.register
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def map_in_chunks(
+    function: Callable[[List[T]], List[R]],
+    items: List[T],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[R]:
+    """Apply function to chunks of items on a process pool and concatenate the results.
+
+    function takes a list of items and returns a list of results, so each
+    worker call amortizes its pickling overhead over a whole chunk; it must be
+    defined at module level. workers None means one per CPU. With one worker
+    or a single item everything runs in this process and no pool is used;
+    otherwise the pool of shared_executor is used.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(items) <= 1:
+        return function(items)
+    chunk_size = chunk_size or max(1, -(-len(items) // (workers * 4)))
+    chunks = [
+        items[start : start + chunk_size] for start in range(0, len(items), chunk_size)
+    ]
+    results: List[R] = []
+    for chunk_results in shared_executor(workers).map(function, chunks):
+        results.extend(chunk_results)
+    return results
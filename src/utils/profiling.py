@@ -0,0 +1,259 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, NamedTuple, Optional
+
+from src.utils.events import EVENTS
+
+# Set to a directory to profile every phase; each run writes to a new
+# subdirectory named after its start time and process id
+PROFILE_ENV = "SOLIDITY_PROFILE"
+# Comma-separated span names to profile instead of the outermost spans
+PROFILE_PHASES_ENV = "SOLIDITY_PROFILE_PHASES"
+# Seconds between two stack samples
+PROFILE_INTERVAL_ENV = "SOLIDITY_PROFILE_INTERVAL"
+
+DEFAULT_INTERVAL = 0.001
+TOP_ALLOCATIONS = 10
+
+
+def frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """Samples the Python stack of one thread from a background thread.
+
+    Stacks are counted in collapsed form, root frame first and frames joined
+    by ";", which is what flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+
+class Allocation(NamedTuple):
+    site: str
+    size: int
+    count: int
+
+
+class PhaseProfile(NamedTuple):
+    """What profiling one phase measured; sizes are in bytes."""
+
+    label: str
+    name: str
+    args: dict
+    seconds: float
+    peak: int
+    net: int
+    samples: int
+    allocations: List[Allocation]
+
+
+class PhaseProfiler:
+    """Profiles phases (metrics spans) with cProfile, a stack sampler and tracemalloc.
+
+    By default the outermost spans are profiled (compile, class_hierarchy,
+    call_graph, cfg, data_flow, ...); phases restricts profiling to the named
+    spans. Only one phase is profiled at a time, so a phase nested in a
+    profiled one is part of its parent's profile. Each phase gets, in the run
+    directory, a .prof file for pstats or snakeviz and a .collapsed file for
+    flame graphs; stacks.collapsed holds all phases under one root frame per
+    phase, and phases.txt and phases.json the peak and net memory growth and
+    top allocation sites of each phase. Work done in pool processes is not
+    captured, so profile with workers=1.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        phases: Optional[List[str]] = None,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.directory = os.path.join(
+            root, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        )
+        self.phases = set(phases) if phases else None
+        self.interval = interval
+        self.pid = os.getpid()
+        self.results: List[PhaseProfile] = []
+        self.active = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._start_memory = 0
+        self._stop_tracemalloc = False
+
+    def wants(self, span) -> bool:
+        # Forked pool workers inherit the profiler but must not write to its run
+        if self.active is not None or os.getpid() != self.pid:
+            return False
+        if self.phases is None:
+            return span.depth == 0
+        return span.name in self.phases
+
+    def span_entered(self, span) -> None:
+        if not self.wants(span):
+            return
+        self.active = span
+        self._stop_tracemalloc = not tracemalloc.is_tracing()
+        if self._stop_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._start_memory = tracemalloc.get_traced_memory()[0]
+        self._snapshot = tracemalloc.take_snapshot()
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def span_exited(self, span) -> None:
+        if span is not self.active:
+            return
+        self._profile.disable()
+        self._sampler.stop()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if self._stop_tracemalloc:
+            tracemalloc.stop()
+        self.active = None
+
+        if not self.results:
+            os.makedirs(self.directory, exist_ok=True)
+            EVENTS.info("profiling", directory=self.directory)
+        label = f"{len(self.results):02d}-{span.name}"
+        path = os.path.join(self.directory, label)
+        self._profile.dump_stats(path + ".prof")
+        self.write_collapsed(path + ".collapsed", self._sampler.stacks)
+        self.write_collapsed(
+            os.path.join(self.directory, "stacks.collapsed"),
+            self._sampler.stacks,
+            root=label,
+            mode="a",
+        )
+
+        self.results.append(
+            PhaseProfile(
+                label,
+                span.name,
+                span.args,
+                span.seconds,
+                peak - self._start_memory,
+                current - self._start_memory,
+                sum(self._sampler.stacks.values()),
+                self.top_allocations(self._snapshot, snapshot),
+            )
+        )
+        self._profile = self._sampler = self._snapshot = None
+        self.write_report()
+
+    @staticmethod
+    def top_allocations(
+        before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+    ) -> List[Allocation]:
+        """The source lines whose allocations grew the most between two snapshots."""
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, threading.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        differences = after.filter_traces(filters).compare_to(
+            before.filter_traces(filters), "lineno"
+        )
+        return [
+            Allocation(
+                str(difference.traceback[0]),
+                difference.size_diff,
+                difference.count_diff,
+            )
+            for difference in differences[:TOP_ALLOCATIONS]
+            if difference.size_diff > 0
+        ]
+
+    @staticmethod
+    def write_collapsed(path: str, stacks: Counter, root: str = None, mode="w"):
+        with open(path, mode) as collapsed_file:
+            for stack, samples in stacks.most_common():
+                if root is not None:
+                    stack = f"{root};{stack}"
+                collapsed_file.write(f"{stack} {samples}\n")
+
+    def write_report(self) -> None:
+        """Rewrite phases.txt and phases.json with every phase profiled so far."""
+        lines = [
+            f"{'phase':<28} {'seconds':>10} {'peak KiB':>12} {'net KiB':>12} "
+            f"{'samples':>8}"
+        ]
+        for result in self.results:
+            lines.append(
+                f"{result.label:<28} {result.seconds:>10.4f} "
+                f"{result.peak / 1024:>12.1f} {result.net / 1024:>12.1f} "
+                f"{result.samples:>8}"
+            )
+        for result in self.results:
+            lines.append("")
+            lines.append(f"{result.label} top allocation sites:")
+            for allocation in result.allocations:
+                lines.append(
+                    f"  {allocation.size / 1024:>10.1f} KiB "
+                    f"{allocation.count:>8} blocks  {allocation.site}"
+                )
+        with open(os.path.join(self.directory, "phases.txt"), "w") as report_file:
+            report_file.write("\n".join(lines) + "\n")
+        with open(os.path.join(self.directory, "phases.json"), "w") as report_file:
+            json.dump(
+                [
+                    dict(
+                        result._asdict(),
+                        allocations=[
+                            allocation._asdict() for allocation in result.allocations
+                        ],
+                    )
+                    for result in self.results
+                ],
+                report_file,
+                indent=2,
+                default=str,
+            )
+
+
+def profiler_from_environment() -> Optional[PhaseProfiler]:
+    """Return a PhaseProfiler configured by the environment, or None if it is off."""
+    root = os.environ.get(PROFILE_ENV)
+    if not root:
+        return None
+    phases = os.environ.get(PROFILE_PHASES_ENV)
+    return PhaseProfiler(
+        root,
+        phases=[phase.strip() for phase in phases.split(",")] if phases else None,
+        interval=float(os.environ.get(PROFILE_INTERVAL_ENV, DEFAULT_INTERVAL)),
+    )
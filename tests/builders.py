@@ -0,0 +1,132 @@
+from typing import Iterable, Optional, Tuple
+
+
+class ASTBuilder:
+    """Builds compact JSON AST dicts, shaped like solc's output, for tests.
+
+    Every node gets the next free id and a src derived from it, so two
+    builders started at different ids produce subtrees that only differ in
+    their ids and offsets.
+    """
+
+    def __init__(self, first_id: int = 1):
+        self.next_id = first_id
+
+    def node(self, node_type: str, **fields) -> dict:
+        node_id = self.next_id
+        self.next_id += 1
+        return {"id": node_id, "nodeType": node_type, "src": f"{node_id}:1:0", **fields}
+
+    def identifier(self, name: str, declaration: Optional[int] = None) -> dict:
+        return self.node("Identifier", name=name, referencedDeclaration=declaration)
+
+    def literal(self, value: str) -> dict:
+        return self.node("Literal", kind="number", value=value)
+
+    def binary(self, left: dict, operator: str, right: dict) -> dict:
+        return self.node(
+            "BinaryOperation",
+            leftExpression=left,
+            operator=operator,
+            rightExpression=right,
+        )
+
+    def declare(self, name: str, value: str, type_name: str = "uint256") -> dict:
+        declaration = self.node(
+            "VariableDeclaration",
+            name=name,
+            typeName=self.node("ElementaryTypeName", name=type_name),
+            typeDescriptions={"typeString": type_name},
+        )
+        return self.node(
+            "VariableDeclarationStatement",
+            declarations=[declaration],
+            initialValue=self.literal(value),
+        )
+
+    def assign(self, name: str, value: dict) -> dict:
+        assignment = self.node(
+            "Assignment",
+            leftHandSide=self.identifier(name),
+            operator="=",
+            rightHandSide=value,
+        )
+        return self.node("ExpressionStatement", expression=assignment)
+
+    def call(self, name: str, declaration: Optional[dict] = None, arguments=()) -> dict:
+        """An expression statement calling name, bound to a FunctionDefinition."""
+        expression = self.identifier(
+            name, declaration["id"] if declaration is not None else None
+        )
+        call = self.node(
+            "FunctionCall", expression=expression, arguments=list(arguments)
+        )
+        return self.node("ExpressionStatement", expression=call)
+
+    def new(self, contract_name: str) -> dict:
+        """An expression statement creating an instance of contract_name."""
+        type_name = self.node(
+            "UserDefinedTypeName",
+            pathNode=self.node("IdentifierPath", name=contract_name),
+        )
+        new_expression = self.node("NewExpression", typeName=type_name)
+        call = self.node("FunctionCall", expression=new_expression, arguments=[])
+        return self.node("ExpressionStatement", expression=call)
+
+    def block(self, *statements: dict) -> dict:
+        return self.node("Block", statements=list(statements))
+
+    def if_(self, condition: dict, true_body: dict, false_body: Optional[dict] = None):
+        fields = {"condition": condition, "trueBody": true_body}
+        if false_body is not None:
+            fields["falseBody"] = false_body
+        return self.node("IfStatement", **fields)
+
+    def while_(self, condition: dict, body: dict) -> dict:
+        return self.node("WhileStatement", condition=condition, body=body)
+
+    def return_(self, expression: dict) -> dict:
+        return self.node("Return", expression=expression)
+
+    def function(
+        self,
+        name: str,
+        *statements: dict,
+        parameters: Iterable[Tuple[str, str]] = (),
+        kind: str = "function",
+    ) -> dict:
+        parameter_nodes = [
+            self.node(
+                "VariableDeclaration",
+                name=parameter_name,
+                typeName=self.node("ElementaryTypeName", name=type_string),
+                typeDescriptions={"typeString": type_string},
+            )
+            for parameter_name, type_string in parameters
+        ]
+        return self.node(
+            "FunctionDefinition",
+            name=name,
+            kind=kind,
+            visibility="public",
+            stateMutability="nonpayable",
+            parameters=self.node("ParameterList", parameters=parameter_nodes),
+            returnParameters=self.node("ParameterList", parameters=[]),
+            body=self.block(*statements),
+        )
+
+    def contract(self, name: str, *functions: dict, bases: Iterable[str] = ()):
+        base_contracts = [
+            self.node("InheritanceSpecifier", baseName=self.identifier(base))
+            for base in bases
+        ]
+        return self.node(
+            "ContractDefinition",
+            name=name,
+            contractKind="contract",
+            baseContracts=base_contracts,
+            nodes=list(functions),
+        )
+
+    def source_unit(self, *contracts: dict) -> dict:
+        return self.node("SourceUnit", nodes=list(contracts))
@@ -0,0 +1,66 @@
+from src.analyzers import call_graph_analyzer as call_graph_module
+from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.dispatch_index import DispatchIndex
+from src.parsers.ast_parser import SolidityASTParser
+from src.pipeline.corpus_runner import analyze_parser
+from tests.builders import ASTBuilder
+
+DERIVED_FROM_INDEX = (
+    "ast",
+    "class_hierarchy",
+    "dispatch_index",
+    "call_sites",
+    "instantiated_contracts",
+)
+
+
+def sample_parser() -> SolidityASTParser:
+    ast = ASTBuilder()
+    g = ast.function("g")
+    source_unit = ast.source_unit(
+        ast.contract("A", g, ast.function("f", ast.call("g", g), ast.new("A"))),
+        ast.contract("B", bases=["A"]),
+    )
+    parser = SolidityASTParser("sample.sol")
+    parser.load_ast(source_unit)
+    return parser
+
+
+def test_invalidating_the_index_drops_everything_derived_from_it():
+    parser = sample_parser()
+    call_graph_analyzer = CallGraphAnalyzer(parser, ClassHierarchyAnalyzer(parser))
+    context = call_graph_analyzer.context
+    call_graph_analyzer.build_rta_call_graph(
+        context.get("class_hierarchy"), context.get("instantiated_contracts")
+    )
+    assert all(context.peek(name) is not None for name in DERIVED_FROM_INDEX)
+
+    context.invalidate("index")
+
+    assert context.results == {}
+
+
+def test_corpus_runner_builds_one_hierarchy_and_one_dispatch_index(monkeypatch):
+    built = {"hierarchies": 0, "dispatch_indexes": 0}
+    build_class_hierarchy = ClassHierarchyAnalyzer._build_class_hierarchy
+
+    def counting_build(self, ast):
+        built["hierarchies"] += 1
+        return build_class_hierarchy(self, ast)
+
+    class CountingDispatchIndex(DispatchIndex):
+        def __init__(self, class_hierarchy):
+            built["dispatch_indexes"] += 1
+            super().__init__(class_hierarchy)
+
+    monkeypatch.setattr(
+        ClassHierarchyAnalyzer, "_build_class_hierarchy", counting_build
+    )
+    monkeypatch.setattr(call_graph_module, "DispatchIndex", CountingDispatchIndex)
+
+    result = analyze_parser(sample_parser())
+
+    assert result.ok, result.error
+    assert result.cha_edges and result.rta_edges
+    assert built == {"hierarchies": 1, "dispatch_indexes": 1}
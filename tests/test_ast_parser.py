@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
+from src.parsers.ast_parser import SolidityASTParser
+from tests.builders import ASTBuilder
+
+
+@pytest.fixture
+def ast_file(tmp_path):
+    ast = ASTBuilder()
+    g = ast.function("g")
+    source_unit = ast.source_unit(
+        ast.contract("A", g, ast.function("f", ast.call("g", g))),
+        ast.contract("B", bases=["A"]),
+    )
+    path = tmp_path / "sample.sol_json.ast"
+    path.write_text(json.dumps(source_unit))
+    return str(path), source_unit
+
+
+def test_streaming_with_raw_nodes_matches_load_ast(ast_file):
+    path, source_unit = ast_file
+    streamed = SolidityASTParser("sample.sol")
+    streamed.load_ast_file(path)
+    loaded = SolidityASTParser("sample.sol")
+    loaded.load_ast(source_unit)
+
+    assert streamed.ast == loaded.ast
+    assert streamed.index.nodes_by_id.keys() == loaded.index.nodes_by_id.keys()
+    assert streamed.index.functions.keys() == loaded.index.functions.keys()
+
+
+def test_streaming_without_raw_nodes_fails_loudly_for_index_users(ast_file):
+    path, _ = ast_file
+    parser = SolidityASTParser("sample.sol")
+    parser.load_ast_file(path, keep_raw=False)
+
+    hierarchy = ClassHierarchyAnalyzer(parser).build_class_hierarchy(parser.ast_v2)
+    assert hierarchy["B"]["baseContracts"] == ["A"]
+    with pytest.raises(ValueError, match="keep_raw=False"):
+        ControlFlowGraphAnalyzer(parser, workers=1).parse()
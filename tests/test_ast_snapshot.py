@@ -0,0 +1,71 @@
+import pytest
+
+from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.parsers.ast_parser import SolidityASTParser
+from tests.builders import ASTBuilder
+
+
+@pytest.fixture
+def parser():
+    ast = ASTBuilder()
+    transfer = ast.function("transfer", parameters=[("to", "address")])
+    transfer_amount = ast.function(
+        "transfer", parameters=[("to", "address"), ("amount", "uint256")]
+    )
+    token = ast.contract("Token", transfer, transfer_amount)
+    other_transfer = ast.function("transfer", parameters=[("to", "address")])
+    other = ast.contract("Other", other_transfer, bases=["Token"])
+    wallet = ast.contract(
+        "Wallet",
+        ast.function(
+            "",
+            ast.new("Token"),
+            ast.call("transfer", transfer_amount),
+            kind="constructor",
+        ),
+        ast.function("pay", ast.call("transfer", transfer), ast.call("missing")),
+    )
+    parser = SolidityASTParser("wallet.sol")
+    parser.load_ast(ast.source_unit(token, other, wallet))
+    return parser
+
+
+def call_graphs(parser):
+    analyzer = CallGraphAnalyzer(parser, ClassHierarchyAnalyzer(parser))
+    class_hierarchy = analyzer.context.get("class_hierarchy")
+    instantiated_contracts = analyzer.context.get("instantiated_contracts")
+    return (
+        class_hierarchy,
+        analyzer.context.get("call_sites"),
+        analyzer.build_cha_call_graph(class_hierarchy),
+        analyzer.build_rta_call_graph(class_hierarchy, instantiated_contracts),
+    )
+
+
+def test_call_graphs_from_snapshot_match_json_ast(parser, tmp_path):
+    snapshot_path = str(tmp_path / "wallet.snapshot")
+    parser.save_snapshot(snapshot_path)
+    snapshot_parser = SolidityASTParser("wallet.sol")
+    snapshot_parser.load_snapshot(snapshot_path)
+
+    expected = call_graphs(parser)
+    assert call_graphs(snapshot_parser) == expected
+    cha_call_graph, rta_call_graph = expected[2:]
+    assert cha_call_graph["Wallet.pay"] == {"Token.transfer", "Other.transfer"}
+    assert rta_call_graph["Wallet.pay"] == {"Token.transfer"}
+    snapshot_parser.snapshot.close()
+
+
+def test_snapshot_can_be_reloaded_while_results_are_held(parser, tmp_path):
+    snapshot_path = str(tmp_path / "wallet.snapshot")
+    parser.save_snapshot(snapshot_path)
+    snapshot = parser.load_snapshot(snapshot_path)
+    children = snapshot.children(0)
+    ids = snapshot.ids[:3]
+
+    reloaded = parser.load_snapshot(snapshot_path)
+    assert reloaded.children(0) == children
+    assert list(ids) == list(reloaded.ids[:3])
+    ids.release()
+    reloaded.close()
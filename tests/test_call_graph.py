@@ -0,0 +1,107 @@
+import io
+
+import pytest
+
+from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
+from src.exporters.streaming import GraphWriter
+from src.parsers.ast_parser import SolidityASTParser
+from tests.builders import ASTBuilder
+
+
+def overloads_parser() -> SolidityASTParser:
+    ast = ASTBuilder()
+    g = ast.function("g")
+    h = ast.function("h")
+    f_uint = ast.function("f", ast.call("g", g), parameters=[("x", "uint256")])
+    f_address = ast.function("f", ast.call("h", h), parameters=[("a", "address")])
+    caller = ast.function("caller", ast.call("f", f_address))
+    constructor = ast.function("", ast.call("f", f_uint), kind="constructor")
+    source_unit = ast.source_unit(
+        ast.contract("A", constructor, f_uint, f_address, g, h, caller)
+    )
+    parser = SolidityASTParser("overloads.sol")
+    parser.load_ast(source_unit)
+    return parser
+
+
+def test_overloads_are_separate_call_graph_nodes():
+    parser = overloads_parser()
+    call_graph_analyzer = CallGraphAnalyzer(parser, ClassHierarchyAnalyzer(parser))
+    class_hierarchy = call_graph_analyzer.context.get("class_hierarchy")
+    call_graph = call_graph_analyzer.build_cha_call_graph(class_hierarchy)
+
+    assert call_graph == {
+        "A.constructor": {"A.f"},
+        "A.f": {"A.g"},
+        "A.f(address)": {"A.h"},
+        "A.g": set(),
+        "A.h": set(),
+        "A.caller": {"A.f(address)"},
+    }
+    assert parser.index.get_function("A", "f(address)")["parameters"]["parameters"]
+    edges = list(call_graph_analyzer.iter_call_edges(class_hierarchy, "CHA"))
+    assert {(edge.source, edge.target) for edge in edges} == {
+        (caller, callee) for caller, callees in call_graph.items() for callee in callees
+    }
+
+
+def test_cfg_keys_match_call_graph_keys():
+    parser = overloads_parser()
+    call_graph_analyzer = CallGraphAnalyzer(parser, ClassHierarchyAnalyzer(parser))
+    call_graph = call_graph_analyzer.build_cha_call_graph(
+        call_graph_analyzer.context.get("class_hierarchy")
+    )
+    cfg_analyzer = ControlFlowGraphAnalyzer(parser, workers=1)
+    cfg_analyzer.parse()
+
+    assert {
+        f"{contract_name}.{function_name}"
+        for contract_name, function_name in cfg_analyzer.function_cfgs
+    } == set(call_graph)
+
+
+class RecordingWriter(GraphWriter):
+    def write_node(self, node_id: str, **attributes) -> None:
+        self.nodes.append(node_id)
+
+    def write_edge(self, source: str, target: str, **attributes) -> None:
+        self.edges.append((source, target))
+
+
+class CountingCallGraphAnalyzer(CallGraphAnalyzer):
+    resolved = 0
+
+    def resolve_function_calls(self, called_func, signature, dispatch_index):
+        self.resolved += 1
+        return super().resolve_function_calls(called_func, signature, dispatch_index)
+
+
+def test_streaming_resolves_each_call_site_once():
+    parser = overloads_parser()
+    call_graph_analyzer = CountingCallGraphAnalyzer(
+        parser, ClassHierarchyAnalyzer(parser)
+    )
+    class_hierarchy = call_graph_analyzer.context.get("class_hierarchy")
+    writer = RecordingWriter(io.StringIO())
+    writer.nodes, writer.edges = [], []
+    call_graph = call_graph_analyzer.write_call_graph(writer, class_hierarchy, "CHA")
+
+    # Every call site in these contracts has one target
+    assert call_graph_analyzer.resolved == len(writer.edges) == 4
+    assert call_graph == call_graph_analyzer.build_cha_call_graph(class_hierarchy)
+    assert writer.nodes == list(call_graph)
+
+
+def test_dispatch_index_targets_cannot_be_mutated():
+    parser = overloads_parser()
+    call_graph_analyzer = CallGraphAnalyzer(parser, ClassHierarchyAnalyzer(parser))
+    dispatch_index = call_graph_analyzer.context.get("dispatch_index")
+
+    targets = dispatch_index.resolve("f", "address")
+    assert targets == {"A.f(address)"}
+    with pytest.raises(AttributeError):
+        targets.add("A.g")
+    assert dispatch_index.resolve("f", "address") == {"A.f(address)"}
+    assert dispatch_index.resolve("missing") == frozenset()
@@ -0,0 +1,113 @@
+from src.analyzers.control_flow_graph_analyzer import (
+    ControlFlowGraphAnalyzer,
+    build_function_cfgs,
+    collect_function_definitions,
+)
+from src.analyzers.data_flow_analyzer import DataFlowAnalyzer
+from src.parsers.ast_parser import SolidityASTParser
+from tests.builders import ASTBuilder
+
+
+def test_failing_function_is_recorded_and_the_others_still_build():
+    ast = ASTBuilder()
+    condition = ast.binary(ast.identifier("x"), ">", ast.literal("1"))
+    else_if = ast.if_(
+        condition,
+        ast.block(ast.assign("x", ast.literal("2"))),
+        ast.if_(condition, ast.block(ast.assign("x", ast.literal("3")))),
+    )
+    source_unit = ast.source_unit(
+        ast.contract(
+            "A",
+            ast.function("empty"),
+            ast.function("broken", ast.declare("x", "0"), else_if),
+            ast.function("fine", ast.declare("y", "1")),
+        )
+    )
+    parser = SolidityASTParser("errors.sol")
+    parser.load_ast(source_unit)
+
+    cfg_analyzer = ControlFlowGraphAnalyzer(parser)
+    cfg_analyzer.parse()
+
+    assert set(cfg_analyzer.function_cfgs) == {("A", "empty"), ("A", "fine")}
+    assert set(cfg_analyzer.errors) == {("A", "broken")}
+    assert cfg_analyzer.function_cfgs[("A", "empty")].edge_count() == 1
+    data_flow = DataFlowAnalyzer(parser, cfg_analyzer)
+    data_flow.analyze()
+    assert set(data_flow.functions) == {("A", "empty"), ("A", "fine")}
+
+
+def looping_function(ast: ASTBuilder, name: str) -> dict:
+    return ast.function(
+        name,
+        ast.declare("cool_var1", "0"),
+        ast.declare("j", "1"),
+        ast.while_(
+            ast.binary(ast.identifier("j"), "<", ast.literal("10")),
+            ast.block(
+                ast.assign("j", ast.identifier("cool_var1")),
+                ast.if_(
+                    ast.binary(ast.identifier("j"), ">", ast.literal("5")),
+                    ast.block(ast.assign("cool_var1", ast.literal("2"))),
+                ),
+            ),
+        ),
+        ast.return_(ast.identifier("j")),
+    )
+
+
+def graph_contents(cfg):
+    return {
+        label: (
+            node.node_type,
+            [str(statement) for statement in node.statements],
+            node.gens,
+            [
+                (target.node_id, annotation)
+                for target, annotation in node.outgoing_edges
+            ],
+        )
+        for label, node in cfg.nodes.items()
+    }
+
+
+def test_deduplicated_cfgs_match_building_every_function():
+    ast = ASTBuilder()
+    source_unit = ast.source_unit(
+        ast.contract("A", looping_function(ast, "f"), looping_function(ast, "g")),
+        ast.contract("B", looping_function(ast, "f"), looping_function(ast, "g")),
+        ast.contract("E", looping_function(ast, "h")),
+    )
+    parser = SolidityASTParser("duplicates.sol")
+    parser.load_ast(source_unit)
+
+    deduplicated = ControlFlowGraphAnalyzer(parser)
+    deduplicated.parse()
+    assert deduplicated.dedup_stats["functions"].distinct == 1
+
+    reference = ControlFlowGraphAnalyzer(parser)
+    for contract_node in parser.index.of_type("ContractDefinition"):
+        for key, function_node in collect_function_definitions(contract_node).items():
+            ((graph, _),) = build_function_cfgs([function_node])
+            reference.function_cfgs[key] = graph
+
+    assert graph_contents(deduplicated.combined_cfg()) == graph_contents(
+        reference.combined_cfg()
+    )
+    assert len(deduplicated.combined_cfg().nodes) == sum(
+        len(graph) for graph in reference.function_cfgs.values()
+    )
+
+    deduplicated_flow = DataFlowAnalyzer(parser, deduplicated)
+    deduplicated_flow.analyze()
+    reference_flow = DataFlowAnalyzer(parser, reference)
+    reference_flow.analyze()
+    assert deduplicated_flow.dedup_stats.distinct == 1
+    for attribute in ("in_sets", "out_sets", "live_in_sets", "live_out_sets"):
+        assert getattr(deduplicated_flow, attribute) == getattr(
+            reference_flow, attribute
+        )
+    exit_h = reference.function_cfgs[("E", "h")].labels[-1]
+    assert deduplicated_flow.get_in_set(exit_h) == reference_flow.get_in_set(exit_h)
+    assert deduplicated_flow.get_in_set(exit_h)
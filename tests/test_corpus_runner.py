@@ -0,0 +1,43 @@
+import json
+import os
+
+from src.pipeline import corpus_runner
+from src.pipeline.corpus_runner import CorpusRunner, FileResult
+from tests.builders import ASTBuilder
+
+
+def crash_on_crash_sol(file_paths, *args):
+    """Stands in for analyze_files; the worker handed crash.sol dies."""
+    if "crash.sol" in file_paths:
+        os._exit(1)
+    return [FileResult(path) for path in file_paths]
+
+
+def test_dead_worker_fails_only_its_own_chunk(monkeypatch):
+    monkeypatch.setattr(corpus_runner, "analyze_files", crash_on_crash_sol)
+    file_paths = ["a.sol", "crash.sol", "b.sol", "c.sol"]
+    runner = CorpusRunner(file_paths, workers=2, chunk_size=1)
+
+    results = {result.file_path: result for result in runner.run()}
+
+    assert set(results) == set(file_paths)
+    assert results["crash.sol"].error.startswith("worker: ")
+    assert all(results[path].ok for path in ("a.sol", "b.sol", "c.sol"))
+    assert runner.summary.files == 4 and runner.summary.failed == 1
+
+
+def test_ast_files_are_streamed_without_solc(tmp_path):
+    ast = ASTBuilder()
+    g = ast.function("g")
+    path = tmp_path / "sample.sol_json.ast"
+    path.write_text(
+        json.dumps(
+            ast.source_unit(ast.contract("A", g, ast.function("f", ast.call("g", g))))
+        )
+    )
+
+    (result,) = corpus_runner.analyze_files([str(path)], cache_dir=None)
+
+    assert result.ok, result.error
+    assert result.cha_edges == (("A.f", "A.g"),)
+    assert result.cfg_functions == 2
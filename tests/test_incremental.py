@@ -0,0 +1,43 @@
+import pytest
+
+from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
+from src.parsers.ast_parser import SolidityASTParser
+from src.pipeline.incremental import IncrementalAnalyzer
+from tests.builders import ASTBuilder
+from tests.test_data_flow import if_function, while_function
+
+
+def sample_source_unit(first_id: int) -> dict:
+    ast = ASTBuilder(first_id)
+    return ast.source_unit(
+        ast.contract("A", while_function(ast)),
+        ast.contract("B", if_function(ast)),
+    )
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """Make SolidityASTParser.parse load the AST in compiled["ast"] instead of running solc."""
+    compiled = {}
+    monkeypatch.setattr(
+        SolidityASTParser, "parse", lambda parser: parser.load_ast(compiled["ast"])
+    )
+    return compiled
+
+
+def test_renumbered_functions_keep_their_cfgs_under_the_new_ids(compiled):
+    compiled["ast"] = sample_source_unit(first_id=1)
+    analyzer = IncrementalAnalyzer("sample.sol")
+    analyzer.update()
+    retained = analyzer.function_cfgs[("A", "while_loop")]
+
+    compiled["ast"] = sample_source_unit(first_id=6001)
+    report = analyzer.update()
+
+    assert report.changed_functions == []
+    rebuilt = ControlFlowGraphAnalyzer(analyzer.parser)
+    rebuilt.parse()
+    for key, graph in rebuilt.function_cfgs.items():
+        assert analyzer.function_cfgs[key].labels == graph.labels
+        assert analyzer.data_flow[key].graph is analyzer.function_cfgs[key]
+    assert analyzer.function_cfgs[("A", "while_loop")].base is retained
@@ -0,0 +1,59 @@
+import os
+import socket
+
+import pytest
+
+from src.pipeline.server import (
+    ANALYSIS_ERROR,
+    INVALID_PARAMS,
+    AnalysisServer,
+    serve,
+)
+
+
+def error_code(response):
+    return response["error"]["code"]
+
+
+def test_only_binding_errors_are_invalid_params():
+    analysis_server = AnalysisServer()
+
+    def broken(file):
+        return len(None)
+
+    analysis_server.methods["broken"] = broken
+    request = {"jsonrpc": "2.0", "id": 1}
+
+    response = analysis_server.handle({**request, "method": "files", "params": [1]})
+    assert error_code(response) == INVALID_PARAMS
+    response = analysis_server.handle(
+        {**request, "method": "broken", "params": {"path": "a.sol"}}
+    )
+    assert error_code(response) == INVALID_PARAMS
+    response = analysis_server.handle(
+        {**request, "method": "broken", "params": {"file": "a.sol"}}
+    )
+    assert error_code(response) == ANALYSIS_ERROR
+    assert "TypeError" in response["error"]["message"]
+    response = analysis_server.handle({**request, "method": "files", "params": []})
+    assert response["result"] == []
+
+
+def test_serve_only_replaces_stale_sockets(tmp_path):
+    path = str(tmp_path / "server.sock")
+    with open(path, "w") as file:
+        file.write("not a socket")
+    with pytest.raises(FileExistsError):
+        serve(AnalysisServer(), socket_path=path)
+    assert os.path.isfile(path)
+
+    os.remove(path)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    server = serve(AnalysisServer(), socket_path=path)
+    try:
+        with pytest.raises(OSError):
+            serve(AnalysisServer(), socket_path=path)
+    finally:
+        server.server_close()
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from src.analyzers.call_graph_analyzer import CallGraphAnalyzer
+from src.analyzers.class_hierarchy_analyzer import ClassHierarchyAnalyzer
+from src.analyzers.control_flow_graph_analyzer import ControlFlowGraphAnalyzer
+from src.analyzers.data_flow_analyzer import DataFlowAnalyzer
+from src.parsers.ast_parser import SolidityASTParser
+from src.pipeline.stream_analysis import StreamingAnalysis
+from tests.builders import ASTBuilder
+
+
+@pytest.fixture
+def ast_file(tmp_path):
+    ast = ASTBuilder()
+    g_uint = ast.function("g", ast.declare("x", "1"), parameters=[("x", "uint256")])
+    g_address = ast.function("g", parameters=[("to", "address")])
+    loop = ast.function(
+        "f",
+        ast.declare("i", "0"),
+        ast.while_(
+            ast.binary(ast.identifier("i"), "<", ast.literal("3")),
+            ast.block(ast.assign("i", ast.literal("1"))),
+        ),
+        # Refers to the second overload of g, declared further down the file
+        ast.call("g", g_address),
+        ast.new("B"),
+    )
+    source_unit = ast.source_unit(
+        ast.contract("A", loop),
+        ast.contract("B", g_uint, g_address, bases=["A"]),
+    )
+    path = tmp_path / "sample.sol_json.ast"
+    path.write_text(json.dumps(source_unit))
+    return str(path)
+
+
+def test_streaming_analysis_matches_a_full_load(ast_file):
+    loaded = SolidityASTParser(ast_file)
+    loaded.load_ast_file(ast_file)
+    call_graph_analyzer = CallGraphAnalyzer(loaded, ClassHierarchyAnalyzer(loaded))
+    cfg_analyzer = ControlFlowGraphAnalyzer(loaded, workers=1)
+    cfg_analyzer.parse()
+    data_flow_analyzer = DataFlowAnalyzer(loaded, cfg_analyzer)
+    data_flow_analyzer.analyze()
+
+    streamed = SolidityASTParser(ast_file)
+    streaming_analysis = StreamingAnalysis(streamed)
+    streaming_analysis.run(ast_file)
+    streamed_data_flow = DataFlowAnalyzer(streamed, streaming_analysis.cfg_analyzer)
+    streamed_data_flow.analyze()
+
+    assert streamed.ast is None
+    streamed_context = streaming_analysis.call_graph_analyzer.context
+    for name in ("class_hierarchy", "call_sites", "instantiated_contracts"):
+        assert streamed_context.get(name) == call_graph_analyzer.context.get(name)
+    hierarchy = streamed_context.get("class_hierarchy")
+    for algorithm in ("CHA", "RTA"):
+        call_graph = streaming_analysis.call_graph_analyzer.write_call_graph(
+            None, hierarchy, algorithm, streamed_context.get("instantiated_contracts")
+        )
+        assert call_graph == call_graph_analyzer.write_call_graph(
+            None, hierarchy, algorithm, streamed_context.get("instantiated_contracts")
+        )
+        assert call_graph["A.f"] == {"B.g(address)"}
+    assert {
+        key: graph.labels
+        for key, graph in streaming_analysis.cfg_analyzer.function_cfgs.items()
+    } == {key: graph.labels for key, graph in cfg_analyzer.function_cfgs.items()}
+    assert streamed_data_flow.out_sets == data_flow_analyzer.out_sets
+    assert streamed_data_flow.live_in_sets == data_flow_analyzer.live_in_sets